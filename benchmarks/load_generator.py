@@ -0,0 +1,333 @@
+"""Measure the ceiling of the load generator against a local zero-latency server.
+
+Runs a concurrency sweep of token_benchmark_ray.py for each client backend against
+llmperf.mock_server, whose TTFT and inter-token latency are known exactly. The
+difference between what the benchmark measures and what the server was configured to
+do is the load generator's measurement error, which grows once a backend can no longer
+keep up with its streams. For each level this reports the error, the requests and
+tokens per second sustained and the client CPU time per output token, and for each
+backend the highest level whose error stays within the thresholds. The server runs in
+its own process, and its own overhead is counted in the error, so the ceiling found is
+a lower bound.
+
+    python benchmarks/load_generator.py --backends asyncio:openai,ray:openai \\
+        --concurrency 1,8,32,128 --output load_generator.jsonl
+"""
+
+import argparse
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+from llmperf.catalog import ResultsCatalog
+from startup_time import REPO_ROOT, git_revision
+
+# The summary keys each level is reported from.
+SUMMARY_METRICS = [
+    "results_ttft_s_quantiles_p50",
+    "results_ttft_s_quantiles_p99",
+    "results_inter_token_latency_s_quantiles_p50",
+    "results_pooled_inter_token_latency_s_quantiles_p99",
+    "results_mean_output_throughput_token_per_s",
+    "results_num_completed_requests_per_min",
+    "results_error_rate",
+    "results_client_overhead_processing_time_per_token_s",
+    "results_client_overhead_driver_cpu_utilization_mean",
+    "results_client_overhead_client_cpu_cores",
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, ttft_s: float, itl_s: float) -> subprocess.Popen:
+    """Start the mock server and wait until it answers."""
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "llmperf.mock_server",
+            "--port",
+            str(port),
+            "--ttft-base-s",
+            str(ttft_s),
+            "--itl-mean-s",
+            str(itl_s),
+            "--estimate-prompt-tokens",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/v1/models", timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("the mock server did not start")
+
+
+def run_backend_sweep(
+    engine: str,
+    llm_api: str,
+    concurrency: List[int],
+    rounds: int,
+    output_tokens: int,
+    port: int,
+) -> List[Dict[str, Any]]:
+    """Run the benchmark CLI over the concurrency levels with one backend.
+
+    Returns:
+        The summary metrics of each level, lowest level first.
+    """
+    env = dict(os.environ, OPENAI_API_BASE=f"http://127.0.0.1:{port}/v1")
+    env.setdefault("OPENAI_API_KEY", "stub")
+    # LiteLLM routes to the OpenAI compatible server by the model's prefix.
+    model = "openai/stub" if llm_api == "litellm" else "stub"
+    with tempfile.TemporaryDirectory() as results_dir:
+        subprocess.run(
+            [
+                sys.executable,
+                str(REPO_ROOT / "token_benchmark_ray.py"),
+                "--model",
+                model,
+                "--llm-api",
+                llm_api,
+                "--engine",
+                engine,
+                "--mean-input-tokens",
+                "100",
+                "--stddev-input-tokens",
+                "0",
+                "--mean-output-tokens",
+                str(output_tokens),
+                "--stddev-output-tokens",
+                "0",
+                "--num-concurrent-requests",
+                ",".join(str(level) for level in concurrency),
+                "--rounds",
+                str(rounds),
+                "--results-dir",
+                results_dir,
+                "--catalog",
+                "",
+            ],
+            env=env,
+            cwd=REPO_ROOT,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+        with ResultsCatalog(":memory:") as catalog:
+            catalog.index_directory(results_dir)
+            runs = catalog.query(SUMMARY_METRICS)
+    return runs.sort_values("concurrency").to_dict("records")
+
+
+def level_result(
+    run: Dict[str, Any], server_ttft_s: float, server_itl_s: float
+) -> Dict[str, Any]:
+    """The measurement error, throughput and CPU cost of one level."""
+    tokens_per_s = run["results_mean_output_throughput_token_per_s"]
+    # Ray clients report their own CPU time; the asyncio engine runs in the driver.
+    cpu_cores = sum(
+        0.0 if math.isnan(run[key]) else run[key]
+        for key in [
+            "results_client_overhead_driver_cpu_utilization_mean",
+            "results_client_overhead_client_cpu_cores",
+        ]
+    )
+    return {
+        "concurrency": int(run["concurrency"]),
+        "ttft_error_p50_s": run["results_ttft_s_quantiles_p50"] - server_ttft_s,
+        "ttft_error_p99_s": run["results_ttft_s_quantiles_p99"] - server_ttft_s,
+        "itl_error_p50_s": run["results_inter_token_latency_s_quantiles_p50"]
+        - server_itl_s,
+        "itl_error_p99_s": run["results_pooled_inter_token_latency_s_quantiles_p99"]
+        - server_itl_s,
+        "requests_per_s": run["results_num_completed_requests_per_min"] / 60,
+        "tokens_per_s": tokens_per_s,
+        "error_rate": run["results_error_rate"],
+        "cpu_s_per_token": cpu_cores / tokens_per_s if tokens_per_s else None,
+        "processing_s_per_token": run[
+            "results_client_overhead_processing_time_per_token_s"
+        ],
+    }
+
+
+def ceiling(
+    levels: List[Dict[str, Any]], max_ttft_error_s: float, max_itl_error_s: float
+) -> Optional[Dict[str, Any]]:
+    """The highest level below the first one whose error exceeds a threshold."""
+    best = None
+    for level in levels:
+        if (
+            level["error_rate"]
+            or level["ttft_error_p50_s"] > max_ttft_error_s
+            or level["itl_error_p50_s"] > max_itl_error_s
+        ):
+            break
+        best = level
+    return best
+
+
+def run_load_generator_benchmark(
+    backends: List[str],
+    concurrency: List[int],
+    rounds: int,
+    output_tokens: int,
+    server_ttft_s: float,
+    server_itl_s: float,
+    max_ttft_error_s: float,
+    max_itl_error_s: float,
+) -> Dict[str, Any]:
+    port = _free_port()
+    server = start_server(port, server_ttft_s, server_itl_s)
+    try:
+        results = {
+            "timestamp": int(time.time()),
+            "revision": git_revision(),
+            "server_ttft_s": server_ttft_s,
+            "server_itl_s": server_itl_s,
+            "output_tokens": output_tokens,
+            "backends": {},
+        }
+        for backend in backends:
+            engine, llm_api = backend.split(":")
+            try:
+                runs = run_backend_sweep(
+                    engine, llm_api, concurrency, rounds, output_tokens, port
+                )
+            except subprocess.CalledProcessError as e:
+                print(f"{backend}: the benchmark failed with exit code {e.returncode}")
+                results["backends"][backend] = {"error": str(e)}
+                continue
+            levels = [level_result(run, server_ttft_s, server_itl_s) for run in runs]
+            best = ceiling(levels, max_ttft_error_s, max_itl_error_s)
+            results["backends"][backend] = {"levels": levels, "ceiling": best}
+
+            print(f"\n{backend}")
+            for level in levels:
+                cpu = level["cpu_s_per_token"]
+                print(
+                    f"    concurrency {level['concurrency']}: "
+                    f"TTFT error p50 {level['ttft_error_p50_s'] * 1e3:.2f}ms "
+                    f"p99 {level['ttft_error_p99_s'] * 1e3:.2f}ms, "
+                    f"ITL error p50 {level['itl_error_p50_s'] * 1e6:.0f}us, "
+                    f"{level['requests_per_s']:.1f} req/s, "
+                    f"{level['tokens_per_s']:.0f} tokens/s, "
+                    f"CPU {'n/a' if cpu is None else f'{cpu * 1e6:.1f}us'}/token"
+                )
+            if best is None:
+                print("    No level stayed within the error thresholds.")
+            else:
+                print(
+                    f"    Ceiling: concurrency {best['concurrency']}, "
+                    f"{best['requests_per_s']:.1f} req/s, "
+                    f"{best['tokens_per_s']:.0f} tokens/s"
+                )
+        return results
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument(
+        "--backends",
+        type=str,
+        default="asyncio:openai,ray:openai,ray:litellm",
+        help=(
+            "Comma separated engine:llm-api pairs to measure. Backends that fail, "
+            "e.g. because their client library is not installed, are reported and "
+            "skipped. (default: %(default)s)"
+        ),
+    )
+    args.add_argument(
+        "--concurrency",
+        type=str,
+        default="1,4,16,64,256",
+        help="Comma separated concurrency levels to sweep. (default: %(default)s)",
+    )
+    args.add_argument(
+        "--rounds",
+        type=int,
+        default=4,
+        help="Each level completes level * rounds requests. (default: %(default)s)",
+    )
+    args.add_argument(
+        "--output-tokens",
+        type=int,
+        default=200,
+        help="The tokens streamed per response. (default: %(default)s)",
+    )
+    args.add_argument(
+        "--server-ttft-s",
+        type=float,
+        default=0.0,
+        help="The TTFT the server is configured with. (default: %(default)s)",
+    )
+    args.add_argument(
+        "--server-itl-s",
+        type=float,
+        default=0.0,
+        help=(
+            "The gap between tokens the server is configured with. "
+            "(default: %(default)s)"
+        ),
+    )
+    args.add_argument(
+        "--max-ttft-error-s",
+        type=float,
+        default=0.01,
+        help=(
+            "The p50 TTFT error a level may have to count towards the ceiling. "
+            "(default: %(default)s)"
+        ),
+    )
+    args.add_argument(
+        "--max-itl-error-s",
+        type=float,
+        default=0.001,
+        help=(
+            "The p50 inter-token latency error a level may have to count towards "
+            "the ceiling. (default: %(default)s)"
+        ),
+    )
+    args.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help=(
+            "If set, append the results as one JSON line to this file, to track "
+            "the ceiling across versions. (default: %(default)s)"
+        ),
+    )
+    args = args.parse_args()
+
+    results = run_load_generator_benchmark(
+        backends=args.backends.split(","),
+        concurrency=[int(level) for level in args.concurrency.split(",")],
+        rounds=args.rounds,
+        output_tokens=args.output_tokens,
+        server_ttft_s=args.server_ttft_s,
+        server_itl_s=args.server_itl_s,
+        max_ttft_error_s=args.max_ttft_error_s,
+        max_itl_error_s=args.max_itl_error_s,
+    )
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(json.dumps(results) + "\n")
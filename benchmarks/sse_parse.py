@@ -0,0 +1,129 @@
+"""Measure the client-side cost of parsing one streamed chunk.
+
+Parses a synthetic OpenAI chat completions stream with the line-based loop the
+clients used before llmperf.sse, and with SSEParser using both the standard library
+JSON decoder and the fastest one available. The cost per chunk is time the clients
+spend between reading a token and reading the next one.
+
+    python benchmarks/sse_parse.py --num-chunks 100000 --read-size 4096
+"""
+
+import argparse
+import json
+import time
+from typing import Callable, Dict, List
+
+from llmperf import sse
+from llmperf.sse import SSEParser
+
+
+def make_stream(num_chunks: int) -> bytes:
+    """Return the body of a stream of num_chunks single-token deltas."""
+    events = []
+    for i in range(num_chunks):
+        chunk = {
+            "id": "chatcmpl-0",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "stub",
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": {"content": f" tok{i % 100}"},
+                    "finish_reason": None,
+                }
+            ],
+        }
+        events.append(b"data: " + json.dumps(chunk).encode() + b"\n\n")
+    events.append(b"data: [DONE]\n\n")
+    return b"".join(events)
+
+
+def split_reads(stream: bytes, read_size: int) -> List[bytes]:
+    """Split the stream the way socket reads of read_size bytes would."""
+    return [stream[i : i + read_size] for i in range(0, len(stream), read_size)]
+
+
+def parse_lines(reads: List[bytes]) -> str:
+    """The loop the clients used before: split lines, strip, slice and concatenate."""
+    generated_text = ""
+    pending = b""
+    for read in reads:
+        lines = (pending + read).split(b"\n")
+        pending = lines.pop()
+        for chunk in lines:
+            chunk = chunk.strip()
+            if not chunk:
+                continue
+            chunk = chunk[len("data: ") :]
+            if chunk == b"[DONE]":
+                continue
+            data = json.loads(chunk)
+            delta = data["choices"][0]["delta"]
+            if delta.get("content", None):
+                generated_text += delta["content"]
+    return generated_text
+
+
+def parse_sse(reads: List[bytes], loads: Callable) -> str:
+    """The loop the clients use now."""
+    parser = SSEParser()
+    generated_text = []
+    for read in reads:
+        for payload in parser.feed(read):
+            if payload == b"[DONE]":
+                continue
+            data = loads(payload)
+            content = data["choices"][0]["delta"].get("content")
+            if content:
+                generated_text.append(content)
+    return "".join(generated_text)
+
+
+def run_sse_benchmark(
+    num_chunks: int, read_size: int, repeats: int
+) -> Dict[str, float]:
+    reads = split_reads(make_stream(num_chunks), read_size)
+    parsers = {
+        "line loop + json": lambda: parse_lines(reads),
+        "SSEParser + json": lambda: parse_sse(reads, json.loads),
+        f"SSEParser + {sse.loads.__module__}": lambda: parse_sse(reads, sse.loads),
+    }
+    expected = parsers["line loop + json"]()
+    results = {}
+    for name, parse in parsers.items():
+        if parse() != expected:
+            raise RuntimeError(f"{name} parsed a different text")
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            parse()
+            best = min(best, time.perf_counter() - start)
+        results[name] = best / num_chunks * 1e9
+        print(f"{name}: {results[name]:.0f} ns/chunk")
+    return results
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument(
+        "--num-chunks",
+        type=int,
+        default=100000,
+        help="The number of chunks in the stream. (default: %(default)s)",
+    )
+    args.add_argument(
+        "--read-size",
+        type=int,
+        default=4096,
+        help="The number of bytes per simulated socket read. (default: %(default)s)",
+    )
+    args.add_argument(
+        "--repeats",
+        type=int,
+        default=5,
+        help="Runs per parser; the fastest is reported. (default: %(default)s)",
+    )
+    args = args.parse_args()
+
+    run_sse_benchmark(args.num_chunks, args.read_size, args.repeats)
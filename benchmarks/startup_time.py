@@ -0,0 +1,176 @@
+"""Measure how long token_benchmark_ray.py takes to send its first request.
+
+Runs the benchmark CLI against a local stub server that answers every request with a
+short stream, and records the time from launching the process to the stub receiving
+the first request. Import-time regressions in the CLI or in llmperf show up here.
+
+    python benchmarks/startup_time.py --repeats 5 --output startup_times.jsonl
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules whose import cost is reported on its own, each in a fresh interpreter.
+IMPORTED_MODULES = ["llmperf.common", "llmperf.utils"]
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    first_request_time: Optional[float] = None
+
+    def do_POST(self):
+        if _StubHandler.first_request_time is None:
+            _StubHandler.first_request_time = time.time()
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        chunk = {"choices": [{"delta": {"content": " token"}}]}
+        for _ in range(4):
+            self.wfile.write(b"data: " + json.dumps(chunk).encode() + b"\n\n")
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def time_to_first_request(engine: str, port: int) -> Dict[str, float]:
+    """Run the CLI for a single request and time its startup.
+
+    Returns:
+        The seconds from launching the CLI to the stub receiving the first request,
+        and to the CLI exiting.
+    """
+    _StubHandler.first_request_time = None
+    env = dict(os.environ, OPENAI_API_BASE=f"http://127.0.0.1:{port}/v1")
+    env.setdefault("OPENAI_API_KEY", "stub")
+    with tempfile.TemporaryDirectory() as results_dir:
+        start_time = time.time()
+        subprocess.run(
+            [
+                sys.executable,
+                str(REPO_ROOT / "token_benchmark_ray.py"),
+                "--model",
+                "stub",
+                "--llm-api",
+                "openai",
+                "--engine",
+                engine,
+                "--mean-input-tokens",
+                "100",
+                "--stddev-input-tokens",
+                "0",
+                "--max-num-completed-requests",
+                "1",
+                "--num-concurrent-requests",
+                "1",
+                "--results-dir",
+                results_dir,
+            ],
+            env=env,
+            cwd=REPO_ROOT,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+        end_time = time.time()
+    if _StubHandler.first_request_time is None:
+        raise RuntimeError("the benchmark exited without sending a request")
+    return {
+        "time_to_first_request_s": _StubHandler.first_request_time - start_time,
+        "total_time_s": end_time - start_time,
+    }
+
+
+def import_time(module: str) -> float:
+    """Return the seconds a fresh interpreter takes to import module."""
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - start)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_startup_benchmark(engines: List[str], repeats: int) -> Dict[str, Any]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        results = {"timestamp": int(time.time()), "revision": git_revision()}
+        for module in IMPORTED_MODULES:
+            times = [import_time(module) for _ in range(repeats)]
+            results[f"import_{module}_s"] = statistics.median(times)
+            print(f"import {module}: {statistics.median(times):.3f}s")
+        for engine in engines:
+            runs = [
+                time_to_first_request(engine, server.server_address[1])
+                for _ in range(repeats)
+            ]
+            for metric in ["time_to_first_request_s", "total_time_s"]:
+                value = statistics.median(run[metric] for run in runs)
+                results[f"{engine}_{metric}"] = value
+                print(f"{engine} {metric}: {value:.3f}")
+        return results
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument(
+        "--engines",
+        type=str,
+        default="asyncio,ray",
+        help="Comma separated engines to measure. (default: %(default)s)",
+    )
+    args.add_argument(
+        "--repeats",
+        type=int,
+        default=3,
+        help="Runs per measurement; the median is reported. (default: %(default)s)",
+    )
+    args.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help=(
+            "If set, append the results as one JSON line to this file, to track "
+            "startup time across versions. (default: %(default)s)"
+        ),
+    )
+    args = args.parse_args()
+
+    results = run_startup_benchmark(args.engines.split(","), args.repeats)
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(json.dumps(results) + "\n")
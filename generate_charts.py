@@ -1,20 +1,77 @@
 import argparse
 import csv
+import hashlib
 import json
 import logging
 import os
-import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 
 import matplotlib.pyplot as plt
 import numpy as np
 import seaborn as sns
 
+from llmperf.catalog import open_catalog
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 sns.set_style("whitegrid")
 sns.set_palette("husl")
 
+# The summary keys of each chart, p25, p50 and p75 in order.
+CHART_METRICS = {
+    "inter_token_latency": [
+        "results_inter_token_latency_s_quantiles_p25",
+        "results_inter_token_latency_s_quantiles_p50",
+        "results_inter_token_latency_s_quantiles_p75",
+    ],
+    "end_to_end_latency": [
+        "results_end_to_end_latency_s_quantiles_p25",
+        "results_end_to_end_latency_s_quantiles_p50",
+        "results_end_to_end_latency_s_quantiles_p75",
+    ],
+    "time_to_first_token": [
+        "results_ttft_s_quantiles_p25",
+        "results_ttft_s_quantiles_p50",
+        "results_ttft_s_quantiles_p75",
+    ],
+    "output_throughput": [
+        "results_request_output_throughput_token_per_s_quantiles_p25",
+        "results_request_output_throughput_token_per_s_quantiles_p50",
+        "results_request_output_throughput_token_per_s_quantiles_p75",
+    ],
+}
+
+# The title and y axis label of each chart, in the order of the 2x2 overview.
+PANELS = {
+    "inter_token_latency": ("Inter-token Latency (seconds)", "Seconds"),
+    "end_to_end_latency": ("End-to-End Latency (seconds)", "Seconds"),
+    "time_to_first_token": ("Time to First Token (seconds)", "Seconds"),
+    "output_throughput": ("Output Throughput (tokens/s)", "Tokens per second"),
+}
+
+CHART_DPI = 300
+
+# The 2x2 overview of every metric, only rendered when asked for.
+OVERVIEW_CHART = "performance_chart"
+
+# Content hashes of the charts in a results directory, to skip re-rendering
+# charts whose data has not changed.
+CHART_HASHES_FILE = ".chart_hashes.json"
+
+# Bump to re-render every chart after changing how charts are drawn.
+CHART_STYLE_VERSION = 1
+
+LINE_PROPERTIES = {"linewidth": 2.5, "alpha": 0.85, "marker": "o", "markersize": 8}
+COLORS = ["#2E86AB", "#A23B72", "#F18F01"]
+
+GOODPUT_METRICS = [
+    "results_mean_output_throughput_token_per_s",
+    "results_goodput_token_per_s",
+    "results_slo_attainment",
+]
+
 
 def convert_to_percentile(data_dict, percentile_index=1):
     """
@@ -34,163 +91,340 @@ def convert_to_percentile(data_dict, percentile_index=1):
     return list(percentile_data.values())
 
 
-def generate_charts(results_dir):
-    store = {}
-    store2 = {}
-    store3 = {}
-    store4 = {}
+def summarize_partial_runs(results_dir, catalog_path=None):
+    """
+    Write the missing summaries of runs that were interrupted after writing
+    JSON lines individual responses, reading the responses back in chunks.
 
-    # Iterate through results directory
+    :param results_dir: Directory to search for individual responses files
+    :param catalog_path: Results catalog to register the summaries in, if set
+    """
+    suffix = "_individual_responses.jsonl"
     for root, dirs, files in os.walk(results_dir):
         for file_name in files:
-            match = re.search(r"(_summary)", file_name)
-
-            if match:
-                file_path = os.path.join(root, file_name)
-
-                with open(file_path, "r") as file:
-                    data = json.load(file)
-                    concurrent_user = int(root.split("/")[-1])
-
-                    # Extract p25, p50, p75
-                    store[concurrent_user] = [
-                        data["results_inter_token_latency_s_quantiles_p25"],
-                        data["results_inter_token_latency_s_quantiles_p50"],
-                        data["results_inter_token_latency_s_quantiles_p75"],
-                    ]
-                    store2[concurrent_user] = [
-                        data["results_end_to_end_latency_s_quantiles_p25"],
-                        data["results_end_to_end_latency_s_quantiles_p50"],
-                        data["results_end_to_end_latency_s_quantiles_p75"],
-                    ]
-                    store3[concurrent_user] = [
-                        data["results_ttft_s_quantiles_p25"],
-                        data["results_ttft_s_quantiles_p50"],
-                        data["results_ttft_s_quantiles_p75"],
-                    ]
-                    store4[concurrent_user] = [
-                        data[
-                            "results_request_output_throughput_token_per_s_quantiles_p25"
-                        ],
-                        data[
-                            "results_request_output_throughput_token_per_s_quantiles_p50"
-                        ],
-                        data[
-                            "results_request_output_throughput_token_per_s_quantiles_p75"
-                        ],
-                    ]
-
-    x = np.array(sorted(store.keys()))
-
-    # ITL
-    p25_sorted = convert_to_percentile(store, percentile_index=0)
-    p50_sorted = convert_to_percentile(store, percentile_index=1)
-    p75_sorted = convert_to_percentile(store, percentile_index=2)
-
-    # End-to-End Latency
-    e2e_p25_sorted = convert_to_percentile(store2, percentile_index=0)
-    e2e_p50_sorted = convert_to_percentile(store2, percentile_index=1)
-    e2e_p75_sorted = convert_to_percentile(store2, percentile_index=2)
-
-    # Time to First Token
-    ttft_p25_sorted = convert_to_percentile(store3, percentile_index=0)
-    ttft_p50_sorted = convert_to_percentile(store3, percentile_index=1)
-    ttft_p75_sorted = convert_to_percentile(store3, percentile_index=2)
-
-    # Tokens per Second (Throughput)
-    tps_p25_sorted = convert_to_percentile(store4, percentile_index=0)
-    tps_p50_sorted = convert_to_percentile(store4, percentile_index=1)
-    tps_p75_sorted = convert_to_percentile(store4, percentile_index=2)
-
-    # Write data to CSV files
-    csv_data = {
-        "inter_token_latency.csv": {
-            "headers": ["Concurrent_Users", "P25", "P50", "P75"],
-            "data": list(zip(x, p25_sorted, p50_sorted, p75_sorted)),
-        },
-        "end_to_end_latency.csv": {
-            "headers": ["Concurrent_Users", "P25", "P50", "P75"],
-            "data": list(zip(x, e2e_p25_sorted, e2e_p50_sorted, e2e_p75_sorted)),
-        },
-        "time_to_first_token.csv": {
-            "headers": ["Concurrent_Users", "P25", "P50", "P75"],
-            "data": list(zip(x, ttft_p25_sorted, ttft_p50_sorted, ttft_p75_sorted)),
-        },
-        "output_throughput.csv": {
-            "headers": ["Concurrent_Users", "P25", "P50", "P75"],
-            "data": list(zip(x, tps_p25_sorted, tps_p50_sorted, tps_p75_sorted)),
-        },
-    }
+            if not file_name.endswith(suffix):
+                continue
+            filename = file_name[: -len(suffix)]
+            if f"{filename}_summary.json" in files:
+                continue
+
+            # Only needed for partial runs, and imports the benchmark's dependencies.
+            from token_benchmark_ray import (
+                summarize_individual_responses,
+                write_summary,
+            )
+
+            logger.info(f"Summarizing partial run {os.path.join(root, file_name)}")
+            # Sweep levels are saved to a directory named after their concurrency.
+            level = os.path.basename(root)
+            summary = summarize_individual_responses(
+                os.path.join(root, file_name),
+                num_concurrent_requests=int(level) if level.isdigit() else None,
+            )
+            write_summary(summary, Path(root), filename, catalog_path)
+
+
+def load_chart_data(results_dir, catalog_path=None):
+    """
+    Read the chart data of the runs under results_dir from the results catalog
+    and write it to one CSV per chart.
+
+    :param results_dir: Directory of the concurrency sweep to chart
+    :param catalog_path: Results catalog to query. Without one, the summaries
+        under results_dir are indexed into an in-memory catalog.
+    :return: The concurrency levels, a dictionary with each panel's
+        [p25, p50, p75] series, and the goodput store of the levels run with
+        per-request SLOs
+    """
+    summarize_partial_runs(results_dir, catalog_path)
+
+    chart_metrics = [name for names in CHART_METRICS.values() for name in names]
+    with open_catalog(results_dir, catalog_path) as catalog:
+        runs = catalog.query(chart_metrics + GOODPUT_METRICS, results_dir=results_dir)
+    # Runs are oldest first, so the latest run at each level is charted.
+    runs = runs.dropna(subset=["concurrency"]).drop_duplicates(
+        "concurrency", keep="last"
+    )
 
-    for filename, csv_info in csv_data.items():
-        csv_path = os.path.join(results_dir, filename)
+    def level_values(names):
+        return {
+            int(row["concurrency"]): [row[name] for name in names]
+            for _, row in runs.iterrows()
+        }
+
+    x = sorted(int(level) for level in runs["concurrency"])
+    panels = {}
+    for panel, names in CHART_METRICS.items():
+        store = level_values(names)
+        panels[panel] = [
+            convert_to_percentile(store, percentile_index=i) for i in range(3)
+        ]
+
+        csv_path = os.path.join(results_dir, f"{panel}.csv")
         with open(csv_path, "w", newline="") as csvfile:
             writer = csv.writer(csvfile)
-            writer.writerow(csv_info["headers"])
-            writer.writerows(csv_info["data"])
+            writer.writerow(["Concurrent_Users", "P25", "P50", "P75"])
+            writer.writerows(zip(x, *panels[panel]))
         logger.info(f"CSV data saved to {csv_path}")
 
-    # Creating the figure and subplots
+    # Overall and SLO-meeting output throughput, for runs with per-request SLOs.
+    goodput_store = {
+        level: values
+        for level, values in level_values(GOODPUT_METRICS).items()
+        if not np.isnan(values[1])
+    }
+    return x, panels, goodput_store
+
+
+def plot_panel(ax, x, series, title, ylabel):
+    """
+    Plot the p25, p50 and p75 of one metric by concurrency level.
+
+    :param ax: Axes to plot on
+    :param x: Concurrency levels
+    :param series: The [p25, p50, p75] values at each level
+    :param title: Title of the chart
+    :param ylabel: Label of the y axis
+    """
+    p25, p50, p75 = series
+    ax.plot(x, p75, label="p75", color=COLORS[0], **LINE_PROPERTIES)
+    ax.plot(x, p50, label="p50", color=COLORS[1], **LINE_PROPERTIES)
+    ax.plot(x, p25, label="p25", color=COLORS[2], **LINE_PROPERTIES)
+    ax.set_title(title, fontsize=14)
+    ax.set_xlabel("Concurrent Users", fontsize=12)
+    ax.set_ylabel(ylabel, fontsize=12)
+    ax.set_xticks(x)
+    ax.tick_params(axis="both", labelsize=10)
+    ax.legend(fontsize=10)
+    ax.grid(True)
+
+
+def save_chart(fig, path):
+    """Save a figure as PNG, or as SVG if path ends with .svg, and close it."""
+    fig.savefig(path, dpi=CHART_DPI, bbox_inches="tight", facecolor="white")
+    plt.close(fig)
+    logger.info(f"Chart saved to {path}")
+
+
+def render_panel_chart(job):
+    """Render one metric's chart on its own figure."""
+    fig, ax = plt.subplots(figsize=(8, 6))
+    title, ylabel = PANELS[job["panel"]]
+    plot_panel(ax, job["x"], job["series"], title, ylabel)
+    save_chart(fig, job["path"])
+
+
+def render_performance_chart(job):
+    """Render the 2x2 overview of every metric's chart."""
     fig, axes = plt.subplots(2, 2, figsize=(16, 12))
     fig.tight_layout(pad=6.0)
-    line_properties = {"linewidth": 2.5, "alpha": 0.85, "marker": "o", "markersize": 8}
-    colors = ["#2E86AB", "#A23B72", "#F18F01"]
-
-    # Inter-token Latency
-    axes[0, 0].plot(x, p75_sorted, label="p75", color=colors[0], **line_properties)
-    axes[0, 0].plot(x, p50_sorted, label="p50", color=colors[1], **line_properties)
-    axes[0, 0].plot(x, p25_sorted, label="p25", color=colors[2], **line_properties)
-    axes[0, 0].set_title("Inter-token Latency (seconds)", fontsize=14)
-    axes[0, 0].set_xlabel("Concurrent Users", fontsize=12)
-    axes[0, 0].set_ylabel("Seconds", fontsize=12)
-    axes[0, 0].set_xticks(x)
-    axes[0, 0].tick_params(axis="both", labelsize=10)
-    axes[0, 0].legend(fontsize=10)
-    axes[0, 0].grid(True)
-
-    # End-to-End Latency
-    axes[0, 1].plot(x, e2e_p75_sorted, label="p75", color=colors[0], **line_properties)
-    axes[0, 1].plot(x, e2e_p50_sorted, label="p50", color=colors[1], **line_properties)
-    axes[0, 1].plot(x, e2e_p25_sorted, label="p25", color=colors[2], **line_properties)
-    axes[0, 1].set_title("End-to-End Latency (seconds)", fontsize=14)
-    axes[0, 1].set_xlabel("Concurrent Users", fontsize=12)
-    axes[0, 1].set_ylabel("Seconds", fontsize=12)
-    axes[0, 1].set_xticks(x)
-    axes[0, 1].tick_params(axis="both", labelsize=10)
-    axes[0, 1].legend(fontsize=10)
-    axes[0, 1].grid(True)
-
-    # Time to First Token
-    axes[1, 0].plot(x, ttft_p75_sorted, label="p75", color=colors[0], **line_properties)
-    axes[1, 0].plot(x, ttft_p50_sorted, label="p50", color=colors[1], **line_properties)
-    axes[1, 0].plot(x, ttft_p25_sorted, label="p25", color=colors[2], **line_properties)
-    axes[1, 0].set_title("Time to First Token (seconds)", fontsize=14)
-    axes[1, 0].set_xlabel("Concurrent Users", fontsize=12)
-    axes[1, 0].set_ylabel("Seconds", fontsize=12)
-    axes[1, 0].set_xticks(x)
-    axes[1, 0].tick_params(axis="both", labelsize=10)
-    axes[1, 0].legend(fontsize=10)
-    axes[1, 0].grid(True)
-
-    # Output Throughput
-    axes[1, 1].plot(x, tps_p75_sorted, label="p75", color=colors[0], **line_properties)
-    axes[1, 1].plot(x, tps_p50_sorted, label="p50", color=colors[1], **line_properties)
-    axes[1, 1].plot(x, tps_p25_sorted, label="p25", color=colors[2], **line_properties)
-    axes[1, 1].set_title("Output Throughput (tokens/s)", fontsize=14)
-    axes[1, 1].set_xlabel("Concurrent Users", fontsize=12)
-    axes[1, 1].set_ylabel("Tokens per second", fontsize=12)
-    axes[1, 1].set_xticks(x)
-    axes[1, 1].tick_params(axis="both", labelsize=10)
-    axes[1, 1].legend(fontsize=10)
-    axes[1, 1].grid(True)
-
-    plt.savefig(
-        os.path.join(results_dir, "performance_chart.png"),
-        dpi=300,
-        bbox_inches="tight",
-        facecolor="white",
+    for ax, (panel, (title, ylabel)) in zip(axes.flat, PANELS.items()):
+        plot_panel(ax, job["x"], job["panels"][panel], title, ylabel)
+    save_chart(fig, job["path"])
+
+
+def render_goodput_chart(job):
+    """
+    Plot goodput next to the overall output throughput for each concurrency level.
+    """
+    x = job["x"]
+    fig, ax = plt.subplots(figsize=(8, 6))
+    ax.plot(
+        x,
+        job["throughput"],
+        label="Output throughput",
+        color=COLORS[0],
+        **LINE_PROPERTIES,
+    )
+    ax.plot(x, job["goodput"], label="Goodput", color=COLORS[1], **LINE_PROPERTIES)
+    ax.set_title("Goodput vs Output Throughput (tokens/s)", fontsize=14)
+    ax.set_xlabel("Concurrent Users", fontsize=12)
+    ax.set_ylabel("Tokens per second", fontsize=12)
+    ax.set_xticks(x)
+    ax.tick_params(axis="both", labelsize=10)
+    ax.legend(fontsize=10)
+    ax.grid(True)
+    save_chart(fig, job["path"])
+
+
+def write_goodput_csv(results_dir, goodput_store):
+    """
+    Write goodput next to the overall output throughput for each concurrency level.
+
+    :param results_dir: Directory to write goodput.csv to
+    :param goodput_store: Dictionary with concurrent users as keys and lists of
+        [output throughput, goodput, SLO attainment] as values
+    :return: The concurrency levels and the throughput, goodput and SLO
+        attainment at each
+    """
+    x = sorted(goodput_store.keys())
+    columns = [
+        convert_to_percentile(goodput_store, percentile_index=i) for i in range(3)
+    ]
+
+    csv_path = os.path.join(results_dir, "goodput.csv")
+    with open(csv_path, "w", newline="") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(
+            ["Concurrent_Users", "Output_Throughput", "Goodput", "SLO_Attainment"]
+        )
+        writer.writerows(zip(x, *columns))
+    logger.info(f"CSV data saved to {csv_path}")
+    return x, columns
+
+
+def chart_jobs(results_dir, catalog_path=None, svg=False, overview=False):
+    """
+    List the charts to render for the runs under results_dir.
+
+    :param results_dir: Directory of the concurrency sweep to chart
+    :param catalog_path: Results catalog to read the summaries from
+    :param svg: Also render each chart as SVG
+    :param overview: Also render the 2x2 overview of every metric
+    :return: A list of (render function, job) pairs, where each job holds the
+        path to render to and the data to plot
+    """
+    x, panels, goodput_store = load_chart_data(results_dir, catalog_path)
+    extensions = ["png", "svg"] if svg else ["png"]
+
+    jobs = []
+    for extension in extensions:
+        for panel, series in panels.items():
+            jobs.append(
+                (
+                    render_panel_chart,
+                    {
+                        "path": os.path.join(results_dir, f"{panel}.{extension}"),
+                        "panel": panel,
+                        "x": x,
+                        "series": series,
+                    },
+                )
+            )
+        if overview:
+            jobs.append(
+                (
+                    render_performance_chart,
+                    {
+                        "path": os.path.join(
+                            results_dir, f"{OVERVIEW_CHART}.{extension}"
+                        ),
+                        "x": x,
+                        "panels": panels,
+                    },
+                )
+            )
+    if goodput_store:
+        goodput_x, (throughput, goodput, _) = write_goodput_csv(
+            results_dir, goodput_store
+        )
+        for extension in extensions:
+            jobs.append(
+                (
+                    render_goodput_chart,
+                    {
+                        "path": os.path.join(results_dir, f"goodput_chart.{extension}"),
+                        "x": goodput_x,
+                        "throughput": throughput,
+                        "goodput": goodput,
+                    },
+                )
+            )
+    return jobs
+
+
+def job_hash(render, job):
+    """Hash what a chart is rendered from: its data, renderer and style version."""
+    content = json.dumps(
+        [CHART_STYLE_VERSION, CHART_DPI, render.__name__, job], default=float
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def _run_job(render_and_job):
+    render, job = render_and_job
+    render(job)
+
+
+def render_charts(jobs, processes=None):
+    """
+    Render charts in a process pool, skipping charts whose content hash matches
+    the one recorded when they were last rendered.
+
+    :param jobs: (render function, job) pairs from chart_jobs
+    :param processes: Number of processes to render with (defaults to the
+        number of CPUs)
+    :return: The number of charts rendered
+    """
+    manifests = {}
+    pending = []
+    for render, job in jobs:
+        chart_dir, chart_file = os.path.split(job["path"])
+        if chart_dir not in manifests:
+            manifest_path = os.path.join(chart_dir, CHART_HASHES_FILE)
+            manifests[chart_dir] = {}
+            if os.path.exists(manifest_path):
+                with open(manifest_path, "r") as f:
+                    manifests[chart_dir] = json.load(f)
+        digest = job_hash(render, job)
+        if (
+            os.path.exists(job["path"])
+            and manifests[chart_dir].get(chart_file) == digest
+        ):
+            logger.info(f"Chart unchanged, skipping {job['path']}")
+            continue
+        pending.append((render, job))
+        manifests[chart_dir][chart_file] = digest
+
+    if len(pending) > 1 and processes != 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            list(executor.map(_run_job, pending))
+    else:
+        for render_and_job in pending:
+            _run_job(render_and_job)
+
+    for chart_dir, manifest in manifests.items():
+        with open(os.path.join(chart_dir, CHART_HASHES_FILE), "w") as f:
+            json.dump(manifest, f, indent=4, sort_keys=True)
+    return len(pending)
+
+
+def charts_rendered(results_dir, overview=False):
+    """
+    Whether every metric's chart, and the overview if asked for, is rendered in
+    results_dir.
+
+    :param results_dir: Directory of a concurrency sweep
+    :param overview: Also require the 2x2 overview
+    """
+    charts = list(PANELS) + ([OVERVIEW_CHART] if overview else [])
+    return all(
+        os.path.exists(os.path.join(results_dir, f"{chart}.png")) for chart in charts
     )
-    logger.info(f"Chart saved to {os.path.join(results_dir, 'performance_chart.png')}")
+
+
+def generate_charts(
+    results_dirs, catalog_path=None, svg=False, processes=None, overview=False
+):
+    """
+    Chart the runs under each of results_dirs by concurrency level. Every chart
+    of every directory is rendered straight to its own file in one process pool.
+
+    :param results_dirs: A directory of a concurrency sweep, or a list of them
+    :param catalog_path: Results catalog to read the summaries from. Without
+        one, the summaries under each directory are indexed in memory.
+    :param svg: Also render each chart as SVG
+    :param processes: Number of processes to render with
+    :param overview: Also render the 2x2 overview of every metric, which the
+        reports include
+    """
+    if isinstance(results_dirs, str):
+        results_dirs = [results_dirs]
+    jobs = []
+    for results_dir in results_dirs:
+        jobs.extend(chart_jobs(results_dir, catalog_path, svg, overview))
+    num_rendered = render_charts(jobs, processes)
+    logger.info(f"Rendered {num_rendered} of {len(jobs)} charts")
 
 
 if __name__ == "__main__":
@@ -198,18 +432,54 @@ if __name__ == "__main__":
         description="Generate charts from benchmark results."
     )
     parser.add_argument(
-        "--results-dir", required=True, help="Path to the results directory."
+        "--results-dir",
+        required=True,
+        nargs="+",
+        help="Path to the results directory, or several to chart together.",
+    )
+    parser.add_argument(
+        "--catalog",
+        default=None,
+        help=(
+            "Results catalog to read the summaries from. By default the summaries "
+            "under the results directory are indexed in memory."
+        ),
+    )
+    parser.add_argument(
+        "--svg",
+        action="store_true",
+        help="Also render each chart as SVG.",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="Number of processes to render charts with (defaults to the number of CPUs).",
+    )
+    parser.add_argument(
+        "--overview",
+        action="store_true",
+        help=f"Also render the 2x2 overview {OVERVIEW_CHART}.png of every metric, "
+        "which the reports include.",
     )
     args = parser.parse_args()
 
     # Handle both relative and absolute paths
-    results_dir = args.results_dir
-    if not os.path.isabs(results_dir):
-        results_dir = os.path.join(os.getcwd(), results_dir)
+    results_dirs = [
+        (
+            results_dir
+            if os.path.isabs(results_dir)
+            else os.path.join(os.getcwd(), results_dir)
+        )
+        for results_dir in args.results_dir
+    ]
 
-    if os.path.exists(results_dir):
-        generate_charts(results_dir)
-    else:
-        logger.error(f"Results directory does not exist: {results_dir}")
+    missing = [
+        results_dir for results_dir in results_dirs if not os.path.exists(results_dir)
+    ]
+    if missing:
+        for results_dir in missing:
+            logger.error(f"Results directory does not exist: {results_dir}")
         logger.error(f"Current working directory: {os.getcwd()}")
         exit(1)
+    generate_charts(results_dirs, args.catalog, args.svg, args.processes, args.overview)
@@ -1,5 +1,4 @@
 import argparse
-import json
 import logging
 import os
 import shutil
@@ -7,7 +6,9 @@ from datetime import datetime
 
 import pandas as pd
 import yaml
-from PIL import Image
+
+from generate_charts import OVERVIEW_CHART, PANELS, charts_rendered, generate_charts
+from llmperf.catalog import open_catalog
 
 logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
 logger = logging.getLogger(__name__)
@@ -190,41 +191,20 @@ def copy_inference_diagram(output_dir):
         return False
 
 
-def split_and_copy_charts(results_dir, output_dir, use_case):
-    """Split the 2x2 performance chart and copy to output directory with use_case prefix."""
-    chart_path = os.path.join(results_dir, "performance_chart.png")
-    if not os.path.exists(chart_path):
-        logger.warning(f"Performance chart not found: {chart_path}")
+def copy_charts(results_dir, output_dir, use_case):
+    """Copy the per-metric charts and the full performance chart to output directory with use_case prefix."""
+    charts = list(PANELS) + [OVERVIEW_CHART]
+    if not charts_rendered(results_dir, overview=True):
+        logger.warning(f"Performance charts not found: {results_dir}")
         return False
 
-    img = Image.open(chart_path)
-    width, height = img.size
-
-    mapping = [
-        "inter_token_latency",
-        "end_to_end_latency",
-        "time_to_first_token",
-        "output_throughput",
-    ]
-
-    half_width = width // 2
-    half_height = height // 2
-
-    boxes = [
-        (0, 0, half_width, half_height),
-        (half_width, 0, width, half_height),
-        (0, half_height, half_width, height),
-        (half_width, half_height, width, height),
-    ]
-
-    for i, box in enumerate(boxes):
-        part = img.crop(box)
-        output_path = os.path.join(output_dir, f"{use_case}_{mapping[i]}.png")
-        part.save(output_path)
-        logger.info(f"Saved: {output_path}")
-
-    # Copy full chart
-    shutil.copy(chart_path, os.path.join(output_dir, f"{use_case}_performance_chart.png"))
+    for chart in charts:
+        for extension in ["png", "svg"]:
+            chart_path = os.path.join(results_dir, f"{chart}.{extension}")
+            if os.path.exists(chart_path):
+                output_path = os.path.join(output_dir, f"{use_case}_{chart}.{extension}")
+                shutil.copy(chart_path, output_path)
+                logger.info(f"Saved: {output_path}")
     return True
 
 
@@ -251,23 +231,26 @@ def generate_metrics_description_section(t):
 """
 
 
-def read_fixed_tokens_from_summary(results_dir):
-    """Read the actual fixed input/output tokens from a summary JSON in results_dir."""
-    import glob
-    for summary_file in glob.glob(os.path.join(results_dir, "*", "*_summary.json")):
-        try:
-            with open(summary_file, "r") as f:
-                data = json.load(f)
-            return (
-                data.get("results_number_input_tokens_mean", data.get("mean_input_tokens", 0)),
-                data.get("results_number_output_tokens_mean", data.get("mean_output_tokens", 0)),
-            )
-        except (json.JSONDecodeError, KeyError):
-            continue
-    return None, None
+def read_fixed_tokens_from_summary(results_dir, catalog_path=None):
+    """Read the actual fixed input/output tokens of the runs in results_dir from the results catalog."""
+    metrics = [
+        "results_number_input_tokens_mean",
+        "mean_input_tokens",
+        "results_number_output_tokens_mean",
+        "mean_output_tokens",
+    ]
+    with open_catalog(results_dir, catalog_path) as catalog:
+        runs = catalog.query(metrics, results_dir=results_dir)
+    if runs.empty:
+        return None, None
+    run = runs.iloc[0].fillna(0)
+    return (
+        run["results_number_input_tokens_mean"] or run["mean_input_tokens"],
+        run["results_number_output_tokens_mean"] or run["mean_output_tokens"],
+    )
 
 
-def generate_use_case_section(use_case, preset_config, results_dir, output_dir, section_num, t):
+def generate_use_case_section(use_case, preset_config, results_dir, output_dir, section_num, t, catalog_path=None):
     """Generate a section for one use case."""
     # Get use case display name
     use_case_names = {
@@ -284,10 +267,10 @@ def generate_use_case_section(use_case, preset_config, results_dir, output_dir,
     max_out = preset_config.get("max_output_tokens", 0)
 
     # Read actual fixed tokens used from summary JSON
-    fixed_in, fixed_out = read_fixed_tokens_from_summary(results_dir)
+    fixed_in, fixed_out = read_fixed_tokens_from_summary(results_dir, catalog_path)
 
-    # Split and copy charts for this use case
-    split_and_copy_charts(results_dir, output_dir, use_case)
+    # Copy charts for this use case
+    copy_charts(results_dir, output_dir, use_case)
 
     # Load metrics tables
     metrics_tables = load_metrics_data(results_dir, t)
@@ -330,7 +313,7 @@ def generate_use_case_section(use_case, preset_config, results_dir, output_dir,
     return section
 
 
-def generate_overall_report(base_results_dir, model_name, output_dir, lang="en"):
+def generate_overall_report(base_results_dir, model_name, output_dir, lang="en", catalog_path=None):
     """Generate a single overall report combining all use cases."""
     os.makedirs(output_dir, exist_ok=True)
 
@@ -353,15 +336,29 @@ def generate_overall_report(base_results_dir, model_name, output_dir, lang="en")
     # Add metrics description section (only once)
     report_content += generate_metrics_description_section(t)
 
+    use_case_dirs = {
+        use_case: os.path.join(base_results_dir, use_case, "raw_data", "performance")
+        for use_case in presets.keys()
+    }
+
+    # Reuse the charts already rendered by generate_charts.py --overview, and render
+    # only the use cases missing some in one process pool
+    unrendered_dirs = [
+        d
+        for d in use_case_dirs.values()
+        if os.path.exists(d) and not charts_rendered(d, overview=True)
+    ]
+    if unrendered_dirs:
+        generate_charts(unrendered_dirs, catalog_path, overview=True)
+
     # Find and iterate through all use cases that have results
     section_num = 2
-    for use_case in presets.keys():
-        use_case_dir = os.path.join(base_results_dir, use_case, "raw_data", "performance")
+    for use_case, use_case_dir in use_case_dirs.items():
         if os.path.exists(use_case_dir):
             logger.info(f"Processing use case: {use_case}")
             preset_config = presets[use_case]
             report_content += generate_use_case_section(
-                use_case, preset_config, use_case_dir, output_dir, section_num, t
+                use_case, preset_config, use_case_dir, output_dir, section_num, t, catalog_path
             )
             section_num += 1
         else:
@@ -392,6 +389,10 @@ if __name__ == "__main__":
         "--language", choices=["en", "tw", "cn"], default="en",
         help="Report language: en (English), tw (Traditional Chinese), cn (Simplified Chinese)"
     )
+    parser.add_argument(
+        "--catalog",
+        help="Results catalog to read the summaries from (defaults to indexing results-dir in memory)"
+    )
     args = parser.parse_args()
 
     results_dir = args.results_dir
@@ -409,7 +410,7 @@ if __name__ == "__main__":
         logger.error(f"Results directory does not exist: {results_dir}")
         exit(1)
 
-    report_path = generate_overall_report(results_dir, args.model_name, output_dir, args.language)
+    report_path = generate_overall_report(results_dir, args.model_name, output_dir, args.language, args.catalog)
     if report_path:
         print(f"\nOverall report generated successfully: {report_path}")
     else:
@@ -1,6 +1,4 @@
 import argparse
-import glob
-import json
 import logging
 import os
 import shutil
@@ -8,7 +6,9 @@ from datetime import datetime
 
 import pandas as pd
 import yaml
-from PIL import Image
+
+from generate_charts import OVERVIEW_CHART, PANELS, charts_rendered, generate_charts
+from llmperf.catalog import open_catalog
 
 logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
 logger = logging.getLogger(__name__)
@@ -143,43 +143,21 @@ TRANSLATIONS = {
 }
 
 
-def split_performance_chart(results_dir, output_dir):
-    """Split the 2x2 performance chart into individual charts."""
-    chart_path = os.path.join(results_dir, "performance_chart.png")
-    if not os.path.exists(chart_path):
-        logger.warning(f"Performance chart not found: {chart_path}")
-        return False
-
-    img = Image.open(chart_path)
-    width, height = img.size
-
-    mapping = [
-        "inter_token_latency",
-        "end_to_end_latency",
-        "time_to_first_token",
-        "output_throughput",
-    ]
-
-    half_width = width // 2
-    half_height = height // 2
-
-    boxes = [
-        (0, 0, half_width, half_height),  # Top-left
-        (half_width, 0, width, half_height),  # Top-right
-        (0, half_height, half_width, height),  # Bottom-left
-        (half_width, half_height, width, height),  # Bottom-right
-    ]
+def copy_charts(results_dir, output_dir, catalog_path=None):
+    """Copy the per-metric charts and the full performance chart to output_dir, rendering any that are missing."""
+    charts = list(PANELS) + [OVERVIEW_CHART]
+    if not charts_rendered(results_dir, overview=True):
+        generate_charts(results_dir, catalog_path, overview=True)
 
     os.makedirs(output_dir, exist_ok=True)
 
-    for i, box in enumerate(boxes):
-        part = img.crop(box)
-        output_path = os.path.join(output_dir, mapping[i] + ".png")
-        part.save(output_path)
-        logger.info(f"Saved: {output_path}")
-
-    # Copy the full chart as well
-    shutil.copy(chart_path, os.path.join(output_dir, "performance_chart.png"))
+    for chart in charts:
+        for extension in ["png", "svg"]:
+            chart_path = os.path.join(results_dir, f"{chart}.{extension}")
+            if os.path.exists(chart_path):
+                output_path = os.path.join(output_dir, f"{chart}.{extension}")
+                shutil.copy(chart_path, output_path)
+                logger.info(f"Saved: {output_path}")
     return True
 
 
@@ -234,22 +212,26 @@ def copy_inference_diagram(output_dir):
         return False
 
 
-def read_fixed_tokens_from_summary(results_dir):
-    """Read the actual fixed input/output tokens from a summary JSON in results_dir."""
-    for summary_file in glob.glob(os.path.join(results_dir, "*", "*_summary.json")):
-        try:
-            with open(summary_file, "r") as f:
-                data = json.load(f)
-            return (
-                data.get("results_number_input_tokens_mean", data.get("mean_input_tokens", 0)),
-                data.get("results_number_output_tokens_mean", data.get("mean_output_tokens", 0)),
-            )
-        except (json.JSONDecodeError, KeyError):
-            continue
-    return None, None
+def read_fixed_tokens_from_summary(results_dir, catalog_path=None):
+    """Read the actual fixed input/output tokens of the runs in results_dir from the results catalog."""
+    metrics = [
+        "results_number_input_tokens_mean",
+        "mean_input_tokens",
+        "results_number_output_tokens_mean",
+        "mean_output_tokens",
+    ]
+    with open_catalog(results_dir, catalog_path) as catalog:
+        runs = catalog.query(metrics, results_dir=results_dir)
+    if runs.empty:
+        return None, None
+    run = runs.iloc[0].fillna(0)
+    return (
+        run["results_number_input_tokens_mean"] or run["mean_input_tokens"],
+        run["results_number_output_tokens_mean"] or run["mean_output_tokens"],
+    )
 
 
-def generate_test_config_section(use_case, preset_config, results_dir, t):
+def generate_test_config_section(use_case, preset_config, results_dir, t, catalog_path=None):
     """Generate the test configuration section content."""
     if not use_case or not preset_config:
         return ""
@@ -269,7 +251,7 @@ def generate_test_config_section(use_case, preset_config, results_dir, t):
     max_out = preset_config.get("max_output_tokens", 0)
 
     # Read actual fixed tokens used from summary JSON
-    fixed_in, fixed_out = read_fixed_tokens_from_summary(results_dir)
+    fixed_in, fixed_out = read_fixed_tokens_from_summary(results_dir, catalog_path)
 
     section = f"""## {t.get("section0_title", "Test Configuration")}
 
@@ -290,7 +272,7 @@ def generate_test_config_section(use_case, preset_config, results_dir, t):
     return section
 
 
-def generate_report(results_dir, model_name, output_dir, lang="en", use_case=None):
+def generate_report(results_dir, model_name, output_dir, lang="en", use_case=None, catalog_path=None):
     """Generate performance report."""
     os.makedirs(output_dir, exist_ok=True)
 
@@ -304,9 +286,9 @@ def generate_report(results_dir, model_name, output_dir, lang="en", use_case=Non
         if preset_config:
             logger.info(f"Loaded preset config for use case: {use_case}")
 
-    # Split performance chart
-    logger.info("Splitting performance chart...")
-    split_performance_chart(results_dir, output_dir)
+    # Copy the charts
+    logger.info("Copying performance charts...")
+    copy_charts(results_dir, output_dir, catalog_path)
 
     # Copy inference diagram
     logger.info("Copying inference diagram...")
@@ -320,7 +302,7 @@ def generate_report(results_dir, model_name, output_dir, lang="en", use_case=Non
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     # Generate test configuration section
-    config_section = generate_test_config_section(use_case, preset_config, results_dir, t)
+    config_section = generate_test_config_section(use_case, preset_config, results_dir, t, catalog_path)
 
     report_content = f"""# {t["title"]}: {model_name}
 
@@ -400,6 +382,10 @@ if __name__ == "__main__":
         "--use-case", choices=["rag", "generate", "normal"],
         help="Use case preset name to include configuration details in the report"
     )
+    parser.add_argument(
+        "--catalog",
+        help="Results catalog to read the summaries from (defaults to indexing results-dir in memory)"
+    )
     args = parser.parse_args()
 
     results_dir = args.results_dir
@@ -417,7 +403,7 @@ if __name__ == "__main__":
         logger.error(f"Results directory does not exist: {results_dir}")
         exit(1)
 
-    report_path = generate_report(results_dir, args.model_name, output_dir, args.language, args.use_case)
+    report_path = generate_report(results_dir, args.model_name, output_dir, args.language, args.use_case, args.catalog)
     if report_path:
         print(f"\nReport generated successfully: {report_path}")
     else:
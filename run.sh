@@ -41,6 +41,7 @@ bench = config.get('benchmark', {})
 print(f'MODEL_NAME=\"{bench.get(\"model_name\", \"gpt-4.1-nano\")}\"')
 print(f'ROUNDS={bench.get(\"rounds\", 5)}')
 print(f'REQUEST_TIMEOUT={bench.get(\"request_timeout_seconds\", 600)}')
+print(f'COOLDOWN={bench.get(\"cooldown_seconds\", 0)}')
 
 # Concurrent requests as bash array
 concurrent = bench.get('concurrent_requests', [1, 10, 20, 30, 40, 50])
@@ -62,6 +63,7 @@ echo "Model: $MODEL_NAME"
 echo "Rounds: $ROUNDS"
 echo "Concurrent requests: ${CONCURRENT_REQUESTS[*]}"
 echo "Request timeout: ${REQUEST_TIMEOUT}s"
+echo "Cool-down between levels: ${COOLDOWN}s"
 echo "Presets to run: $PRESETS"
 echo ""
 
@@ -89,6 +91,8 @@ echo ""
 
 TIMESTAMP=$(date +"%Y%m%d_%H%M%S")
 BASE_RESULTS_DIR="result_outputs/${MODEL_NAME}_${TIMESTAMP}"
+# Every run's summary is registered here, for charts, reports and cross-run queries
+CATALOG="result_outputs/catalog.sqlite"
 
 info "Starting performance evaluation for model: ${MODEL_NAME}"
 info "Running benchmarks for all presets: $PRESETS"
@@ -136,38 +140,46 @@ print(f'TOKEN_MODE={mode}')
         SAMPLING_PARAMS="{}"
     fi
 
-    # Run benchmarks for all concurrent request levels
-    for NUM in "${CONCURRENT_REQUESTS[@]}"
-    do
-        MAX_COMPLETED_REQUESTS=$((NUM * ROUNDS))
-        info "[$USE_CASE] Running benchmark with num-concurrent-requests=$NUM, max-completed-requests=$MAX_COMPLETED_REQUESTS ($ROUNDS rounds)"
-        python token_benchmark_ray.py \
-            --model "$MODEL_NAME" \
-            $TOKEN_ARGS \
-            --max-num-completed-requests "$MAX_COMPLETED_REQUESTS" \
-            --timeout "$REQUEST_TIMEOUT" \
-            --num-concurrent-requests "$NUM" \
-            --results-dir "$RESULTS_DIR/raw_data/performance/${NUM}" \
-            --llm-api openai \
-            --additional-sampling-params "$SAMPLING_PARAMS" || error "Benchmark failed for $USE_CASE with num-concurrent-requests=$NUM."
-
-        info "[$USE_CASE] Benchmark completed. Results saved to $RESULTS_DIR/raw_data/performance/${NUM}"
-    done
-
-    info "[$USE_CASE] Generating charts from the results..."
-    python generate_charts.py \
-        --results-dir "$RESULTS_DIR/raw_data/performance" || error "Chart generation failed for $USE_CASE."
-
-    info "[$USE_CASE] Charts generated successfully."
+    # Run benchmarks for all concurrent request levels in a single process
+    CONCURRENCY_LEVELS=$(IFS=,; echo "${CONCURRENT_REQUESTS[*]}")
+    info "[$USE_CASE] Running benchmark sweep with num-concurrent-requests=$CONCURRENCY_LEVELS ($ROUNDS rounds)"
+    python token_benchmark_ray.py \
+        --model "$MODEL_NAME" \
+        $TOKEN_ARGS \
+        --rounds "$ROUNDS" \
+        --cooldown "$COOLDOWN" \
+        --timeout "$REQUEST_TIMEOUT" \
+        --num-concurrent-requests "$CONCURRENCY_LEVELS" \
+        --results-dir "$RESULTS_DIR/raw_data/performance" \
+        --metadata "use_case=$USE_CASE" \
+        --catalog "$CATALOG" \
+        --llm-api openai \
+        --additional-sampling-params "$SAMPLING_PARAMS" || error "Benchmark failed for $USE_CASE."
+
+    info "[$USE_CASE] Benchmark completed. Results saved to $RESULTS_DIR/raw_data/performance"
     echo ""
 done
 
+# Render the charts of every preset together, each panel to its own file
+info "Generating charts from the results..."
+CHART_DIRS=()
+for USE_CASE in $PRESETS
+do
+    CHART_DIRS+=("$BASE_RESULTS_DIR/$USE_CASE/raw_data/performance")
+done
+python generate_charts.py \
+    --results-dir "${CHART_DIRS[@]}" \
+    --catalog "$CATALOG" \
+    --overview || error "Chart generation failed."
+info "Charts generated successfully."
+
 # Generate overall report combining all use cases
 info "Generating overall performance report..."
 python generate_overall_report.py \
     --results-dir "$BASE_RESULTS_DIR" \
     --model-name "$MODEL_NAME" \
-    --output-dir "$BASE_RESULTS_DIR/report" || error "Overall report generation failed."
+    --output-dir "$BASE_RESULTS_DIR/report" \
+    --catalog "$CATALOG" || error "Overall report generation failed."
 
 info "Overall performance report generated successfully."
 
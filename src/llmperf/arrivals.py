@@ -0,0 +1,57 @@
+"""Arrival schedules for open-loop load generation."""
+
+import math
+import random
+from typing import List, Optional
+
+ARRIVAL_DISTRIBUTIONS = ["poisson", "constant", "gamma"]
+
+
+def generate_arrival_times(
+    num_requests: int,
+    request_rate: float,
+    distribution: str = "poisson",
+    burstiness: float = 1.0,
+    rng: Optional[random.Random] = None,
+) -> List[float]:
+    """Generate the send offsets of an open-loop load test.
+
+    Args:
+        num_requests: The number of arrivals to generate.
+        request_rate: The mean number of requests per second. If inf, every request
+            is sent at offset 0.
+        distribution: The distribution of the gaps between arrivals. "poisson" draws
+            exponential gaps, "constant" spaces arrivals evenly and "gamma" draws gamma
+            distributed gaps whose shape is set by burstiness.
+        burstiness: The shape of the gamma distribution. 1.0 is equivalent to poisson,
+            values below 1 produce burstier traffic and values above 1 smoother traffic.
+            Only used with the gamma distribution.
+        rng: The random number generator to draw from. Defaults to the global one.
+
+    Returns:
+        The offsets in seconds from the start of the test at which each request
+        should be sent, in increasing order.
+    """
+    if distribution not in ARRIVAL_DISTRIBUTIONS:
+        raise ValueError(
+            f"distribution must be one of {ARRIVAL_DISTRIBUTIONS}, got {distribution}"
+        )
+    if request_rate <= 0:
+        raise ValueError(f"request_rate must be positive, got {request_rate}")
+    if burstiness <= 0:
+        raise ValueError(f"burstiness must be positive, got {burstiness}")
+    if math.isinf(request_rate):
+        return [0.0] * num_requests
+
+    rng = rng or random
+    arrival_times = []
+    offset = 0.0
+    for _ in range(num_requests):
+        arrival_times.append(offset)
+        if distribution == "poisson":
+            offset += rng.expovariate(request_rate)
+        elif distribution == "constant":
+            offset += 1.0 / request_rate
+        else:
+            offset += rng.gammavariate(burstiness, 1.0 / (request_rate * burstiness))
+    return arrival_times
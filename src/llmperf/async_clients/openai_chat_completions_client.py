@@ -0,0 +1,188 @@
+import os
+import time
+from array import array
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Optional
+
+import aiohttp
+
+from llmperf.async_llm_client import AsyncLLMClient
+from llmperf.models import RequestConfig
+from llmperf import common_metrics
+from llmperf.endpoints import chat_completions_url
+from llmperf.sse import SSEParser, loads
+
+
+class AsyncOpenAIChatCompletionsClient(AsyncLLMClient):
+    """Client for OpenAI Chat Completions API driven from an asyncio event loop."""
+
+    def __init__(self, max_connections: int = 0, num_endpoints: int = 0):
+        """
+        Args:
+            max_connections: The maximum number of simultaneous connections to open to
+                the API. 0 means no limit.
+            num_endpoints: The number of endpoints requests name in their
+                RequestConfig.endpoint. 0 means every request goes to OPENAI_API_BASE.
+        """
+        address = os.environ.get("OPENAI_API_BASE")
+        if not address and not num_endpoints:
+            raise ValueError("the environment variable OPENAI_API_BASE must be set.")
+        self._address = chat_completions_url(address) if address else None
+        key = os.environ.get("OPENAI_API_KEY", "")
+        self._headers = {"Authorization": f"Bearer {key}"} if key else {}
+        self._max_connections = max_connections
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # The session has to be created from within the running event loop.
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._max_connections),
+                timeout=aiohttp.ClientTimeout(
+                    total=None, sock_connect=180, sock_read=180
+                ),
+                trace_configs=[_connection_trace_config()],
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def llm_request(self, request_config: RequestConfig) -> Dict[str, Any]:
+        prompt = request_config.prompt
+        prompt, prompt_len = prompt
+
+        message = [
+            {"role": "system", "content": ""},
+            {"role": "user", "content": prompt},
+        ]
+        model = request_config.model
+        body = {
+            "model": model,
+            "messages": message,
+            "stream": True,
+            # Ask for a final chunk with the server's token counts.
+            "stream_options": {"include_usage": True},
+        }
+        sampling_params = request_config.sampling_params
+        body.update(sampling_params or {})
+        token_arrival_times = array("d")
+        tokens_received = 0
+        ttft = 0
+        error_response_code = -1
+        generated_text = []
+        error_msg = ""
+        server_output_tokens = None
+        output_throughput = 0
+        total_request_time = 0
+        processing_time = 0
+        connection_trace = SimpleNamespace(reused=False, connect_time=0)
+
+        metrics = {}
+
+        metrics[common_metrics.ERROR_CODE] = None
+        metrics[common_metrics.ERROR_MSG] = ""
+
+        address = self._address
+        if request_config.endpoint:
+            address = chat_completions_url(request_config.endpoint)
+
+        session = self._get_session()
+        start_time = time.monotonic()
+        try:
+            async with session.post(
+                address,
+                json=body,
+                headers=self._headers,
+                trace_request_ctx=connection_trace,
+            ) as response:
+                if response.status != 200:
+                    error_msg = await response.text()
+                    error_response_code = response.status
+                    response.raise_for_status()
+                parser = SSEParser()
+                async for chunk in _iter_stream(response.content):
+                    read_time = time.monotonic()
+                    arrival_time = read_time - start_time
+                    for payload in parser.feed(chunk):
+                        if payload == b"[DONE]":
+                            continue
+                        data = loads(payload)
+
+                        if "error" in data:
+                            error_msg = data["error"]["message"]
+                            error_response_code = data["error"]["code"]
+                            raise RuntimeError(data["error"]["message"])
+
+                        if data.get("usage"):
+                            server_output_tokens = data["usage"].get(
+                                "completion_tokens"
+                            )
+                        if not data.get("choices"):
+                            # The usage chunk comes last and has no choices.
+                            continue
+                        tokens_received += 1
+                        content = data["choices"][0]["delta"].get("content")
+                        if content:
+                            token_arrival_times.append(arrival_time)
+                            if not ttft:
+                                ttft = arrival_time
+                            generated_text.append(content)
+                    processing_time += time.monotonic() - read_time
+
+            total_request_time = time.monotonic() - start_time
+            output_throughput = tokens_received / total_request_time
+
+        except Exception as e:
+            metrics[common_metrics.ERROR_MSG] = error_msg
+            metrics[common_metrics.ERROR_CODE] = error_response_code
+            print(f"Warning Or Error: {e}")
+            print(error_response_code)
+
+        metrics[common_metrics.INTER_TOKEN_LAT] = (
+            token_arrival_times[-1] if token_arrival_times else 0
+        )
+        metrics[common_metrics.TTFT] = ttft
+        metrics[common_metrics.E2E_LAT] = total_request_time
+        metrics[common_metrics.REQ_OUTPUT_THROUGHPUT] = output_throughput
+        metrics[common_metrics.NUM_TOTAL_TOKENS] = tokens_received + prompt_len
+        metrics[common_metrics.NUM_OUTPUT_TOKENS] = tokens_received
+        metrics[common_metrics.NUM_INPUT_TOKENS] = prompt_len
+        metrics[common_metrics.TOKEN_ARRIVAL_TIMES] = token_arrival_times
+        metrics[common_metrics.CLIENT_PROCESSING_TIME] = processing_time
+        metrics[common_metrics.SERVER_OUTPUT_TOKENS] = server_output_tokens
+        metrics[common_metrics.CONNECTION_REUSED] = connection_trace.reused
+        metrics[common_metrics.CONNECT_TIME] = connection_trace.connect_time
+
+        return metrics, "".join(generated_text), request_config
+
+
+async def _iter_stream(content: aiohttp.StreamReader) -> AsyncIterator[bytes]:
+    """Yield the bytes of a response body as they arrive."""
+    async for chunk in content.iter_any():
+        yield chunk
+    # The final newline completes a last line that had no line ending.
+    yield b"\n"
+
+
+def _connection_trace_config() -> aiohttp.TraceConfig:
+    """Record on each request's trace context whether its connection was reused and
+    how long opening a new one took."""
+
+    async def on_connection_create_start(session, context, params):
+        context.trace_request_ctx.connect_start_time = time.monotonic()
+
+    async def on_connection_create_end(session, context, params):
+        trace = context.trace_request_ctx
+        trace.connect_time = time.monotonic() - trace.connect_start_time
+
+    async def on_connection_reuseconn(session, context, params):
+        context.trace_request_ctx.reused = True
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    return trace_config
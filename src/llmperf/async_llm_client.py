@@ -0,0 +1,30 @@
+import abc
+from typing import Any, Dict, Tuple
+
+from llmperf.models import RequestConfig
+
+
+class AsyncLLMClient:
+    """A client for making requests to a LLM API from a single asyncio event loop.
+
+    Unlike LLMClient, instances are not ray actors. One instance is shared by every
+    in-flight request of a run, so implementations must be safe to await concurrently.
+    """
+
+    @abc.abstractmethod
+    async def llm_request(
+        self, request_config: RequestConfig
+    ) -> Tuple[Dict[str, Any], str, RequestConfig]:
+        """Make a single completion request to a LLM API
+
+        Returns:
+            Metrics about the performance charateristics of the request.
+            The text generated by the request to the LLM API.
+            The request_config used to make the request. This is mainly for logging purposes.
+
+        """
+        ...
+
+    async def close(self) -> None:
+        """Release any connections held by the client."""
+        ...
@@ -0,0 +1,254 @@
+"""An indexed SQLite catalog of the summaries of load tests.
+
+Each summary is registered when it is written, with the model, use case, concurrency
+and timestamp of its run in indexed columns and every numeric value of the flattened
+summary in a metrics table. Charts, reports and cross-run questions such as the p99
+TTFT at concurrency 30 over the last month are then answered by a query, instead of
+walking the results directories and parsing every summary file.
+"""
+
+import json
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+# The directory results are saved under by default, and the catalog's file name.
+RESULTS_ROOT = "result_outputs"
+CATALOG_FILENAME = "catalog.sqlite"
+
+DEFAULT_CATALOG_PATH = os.path.join(RESULTS_ROOT, CATALOG_FILENAME)
+
+SUMMARY_SUFFIX = "_summary.json"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    summary_path TEXT NOT NULL UNIQUE,
+    summary_mtime REAL,
+    model TEXT,
+    use_case TEXT,
+    concurrency INTEGER,
+    timestamp INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_model_concurrency_timestamp
+    ON runs (model, concurrency, timestamp);
+CREATE INDEX IF NOT EXISTS runs_concurrency_timestamp ON runs (concurrency, timestamp);
+CREATE INDEX IF NOT EXISTS runs_use_case_timestamp ON runs (use_case, timestamp);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (run_id, name)
+) WITHOUT ROWID;
+"""
+
+RUN_COLUMNS = ["summary_path", "model", "use_case", "concurrency", "timestamp"]
+
+
+def default_catalog_path(results_dir: str) -> str:
+    """Return the catalog the summaries saved to results_dir are registered in by default.
+
+    That is the catalog of the closest result_outputs directory containing
+    results_dir, the one run.sh uses, or else a catalog in results_dir itself. Runs
+    started from any working directory then register next to their results.
+    """
+    path = os.path.abspath(results_dir)
+    while True:
+        if os.path.basename(path) == RESULTS_ROOT:
+            return os.path.join(path, CATALOG_FILENAME)
+        parent = os.path.dirname(path)
+        if parent == path:
+            return os.path.join(results_dir, CATALOG_FILENAME)
+        path = parent
+
+
+class ResultsCatalog:
+    """The catalog of the summaries of load tests, in one SQLite file.
+
+    Summaries are keyed by the absolute path of their file, so registering a summary
+    again replaces its entry.
+    """
+
+    def __init__(self, path: str = DEFAULT_CATALOG_PATH):
+        """
+        Args:
+            path: The catalog file, created if it does not exist. ":memory:" keeps the
+                catalog in memory for the lifetime of this object.
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "ResultsCatalog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def register(
+        self, summary_path: str, summary: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Add the summary of a run to the catalog, replacing any previous entry.
+
+        Args:
+            summary_path: The summary file.
+            summary: The flattened summary in the file. It is read from the file if
+                not given.
+        """
+        summary_path = os.path.abspath(summary_path)
+        if summary is None:
+            with open(summary_path, "r") as f:
+                summary = json.load(f)
+        concurrency = summary.get("num_concurrent_requests")
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM runs WHERE summary_path = ?", (summary_path,)
+            )
+            run_id = self._conn.execute(
+                "INSERT INTO runs "
+                "(summary_path, summary_mtime, model, use_case, concurrency, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    summary_path,
+                    os.path.getmtime(summary_path),
+                    summary.get("model"),
+                    summary.get("use_case"),
+                    None if concurrency is None else int(concurrency),
+                    summary.get("timestamp"),
+                ),
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT INTO metrics (run_id, name, value) VALUES (?, ?, ?)",
+                [
+                    (run_id, name, float(value))
+                    for name, value in summary.items()
+                    if isinstance(value, (int, float))
+                ],
+            )
+
+    def index_directory(self, results_dir: str) -> int:
+        """Register the summaries under results_dir that are new or changed.
+
+        This backfills runs written before the catalog existed or without one.
+
+        Args:
+            results_dir: The directory to search for summary files.
+
+        Returns:
+            The number of summaries registered.
+        """
+        registered = dict(
+            self._conn.execute(
+                "SELECT summary_path, summary_mtime FROM runs "
+                "WHERE substr(summary_path, 1, ?) = ?",
+                _prefix_params(results_dir),
+            ).fetchall()
+        )
+        num_registered = 0
+        for root, _, files in os.walk(os.path.abspath(results_dir)):
+            for file_name in sorted(files):
+                if not file_name.endswith(SUMMARY_SUFFIX):
+                    continue
+                summary_path = os.path.join(root, file_name)
+                if registered.get(summary_path) == os.path.getmtime(summary_path):
+                    continue
+                try:
+                    self.register(summary_path)
+                except (json.JSONDecodeError, OSError):
+                    continue
+                num_registered += 1
+        return num_registered
+
+    def query(
+        self,
+        metrics: List[str],
+        model: Optional[str] = None,
+        use_case: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        results_dir: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Select metrics of the runs matching every filter that is set.
+
+        Args:
+            metrics: The flattened summary keys to select, such as
+                "results_ttft_s_quantiles_p99".
+            model: Only select runs of this model.
+            use_case: Only select runs of this use case.
+            concurrency: Only select runs at this number of concurrent requests.
+            since: Only select runs from this Unix time on.
+            until: Only select runs before this Unix time.
+            results_dir: Only select runs whose summary is under this directory.
+
+        Returns:
+            One row per run, oldest first, with the RUN_COLUMNS and a column for each
+            of metrics. Metrics missing from a summary are NaN.
+        """
+        columns = [f"runs.{column}" for column in RUN_COLUMNS]
+        joins = []
+        params: List[Any] = []
+        for i, name in enumerate(metrics):
+            columns.append(f"m{i}.value")
+            joins.append(
+                f"LEFT JOIN metrics AS m{i} ON m{i}.run_id = runs.id AND m{i}.name = ?"
+            )
+            params.append(name)
+
+        conditions = []
+        for column, value in [
+            ("model", model),
+            ("use_case", use_case),
+            ("concurrency", concurrency),
+        ]:
+            if value is not None:
+                conditions.append(f"runs.{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("runs.timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("runs.timestamp < ?")
+            params.append(until)
+        if results_dir is not None:
+            conditions.append("substr(runs.summary_path, 1, ?) = ?")
+            params.extend(_prefix_params(results_dir))
+
+        sql = f"SELECT {', '.join(columns)} FROM runs {' '.join(joins)}"
+        if conditions:
+            sql += f" WHERE {' AND '.join(conditions)}"
+        sql += " ORDER BY runs.timestamp, runs.id"
+        rows = self._conn.execute(sql, params).fetchall()
+        df = pd.DataFrame(rows, columns=RUN_COLUMNS + list(metrics))
+        return df.astype({name: float for name in metrics})
+
+
+def _prefix_params(results_dir: str) -> List[Any]:
+    prefix = os.path.join(os.path.abspath(results_dir), "")
+    return [len(prefix), prefix]
+
+
+def open_catalog(results_dir: str, path: Optional[str] = None) -> ResultsCatalog:
+    """Open a catalog that has the runs under results_dir registered.
+
+    Args:
+        results_dir: The directory whose runs are about to be queried.
+        path: The catalog file. If not set, an in-memory catalog is built from
+            results_dir.
+
+    Returns:
+        The catalog. The directory is only indexed when the catalog has no run under
+        it, so runs registered as they were written are not read again.
+    """
+    catalog = ResultsCatalog(path or ":memory:")
+    if catalog.query([], results_dir=results_dir).empty:
+        catalog.index_directory(results_dir)
+    return catalog
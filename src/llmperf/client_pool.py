@@ -0,0 +1,89 @@
+import queue
+import threading
+from typing import Any, Dict, List
+
+import ray
+
+from llmperf.models import RequestConfig
+from llmperf.ray_llm_client import LLMClient
+
+
+class ClientPool:
+    """A fixed set of LLMClient actors shared by every request worker of a run.
+
+    Unlike RequestsLauncher, the pool is safe to use from many threads at once and is
+    meant to be created and warmed up once, before the measured part of a run starts.
+    """
+
+    def __init__(self, llm_clients: List[LLMClient]):
+        self._llm_clients = llm_clients
+        self._idle_clients = queue.Queue()
+        for client in llm_clients:
+            self._idle_clients.put(client)
+        self._in_flight: Dict[ray.ObjectRef, LLMClient] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._llm_clients)
+
+    def warm_up(self) -> None:
+        """Block until every client actor has been constructed."""
+        ray.get([client.ready.remote() for client in self._llm_clients])
+
+    def cpu_time(self) -> float:
+        """Return the CPU time all client actors have used so far, in seconds.
+
+        Answered while the clients are busy with requests, so it can be sampled during
+        a run.
+        """
+        return sum(ray.get([client.cpu_time.remote() for client in self._llm_clients]))
+
+    def submit(self, request_config: RequestConfig) -> ray.ObjectRef:
+        """Send a request on the next idle client, waiting for one if all are busy.
+
+        Args:
+            request_config: The configuration for the request.
+
+        Returns:
+            A reference to pass to get() to retrieve the result.
+        """
+        client = self._idle_clients.get()
+        result_ref = client.llm_request.remote(request_config)
+        with self._lock:
+            self._in_flight[result_ref] = client
+        return result_ref
+
+    def get(self, result_ref: ray.ObjectRef) -> Any:
+        """Wait for the result of a submitted request and free its client.
+
+        Returns:
+            The result of the request, or None if it was already collected by drain().
+        """
+        try:
+            result = ray.get(result_ref)
+        finally:
+            with self._lock:
+                client = self._in_flight.pop(result_ref, None)
+        if client is None:
+            return None
+        self._idle_clients.put(client)
+        return result
+
+    def request(self, request_config: RequestConfig) -> Any:
+        """Send a request and wait for its result."""
+        return self.get(self.submit(request_config))
+
+    def drain(self) -> List[Any]:
+        """Wait for every request that is still in flight.
+
+        Returns:
+            The results of the requests that were submitted but not yet collected.
+        """
+        with self._lock:
+            in_flight = dict(self._in_flight)
+        results = []
+        for result_ref in in_flight:
+            result = self.get(result_ref)
+            if result is not None:
+                results.append(result)
+        return results
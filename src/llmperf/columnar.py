@@ -0,0 +1,171 @@
+"""Columnar individual responses, for analysis across many runs.
+
+Responses are written with typed columns, and the token arrival times of each request
+as a list column, to Parquet or to the uncompressed Arrow IPC file format. Loaders
+read only the columns they are asked for from a memory map, so a quantile of one
+metric over thousands of runs touches a fraction of the bytes the JSON files hold.
+Requires pyarrow.
+"""
+
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from llmperf import common_metrics
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+COLUMNAR_FORMATS = ["parquet", "arrow"]
+
+RESPONSES_SUFFIX = "_individual_responses"
+
+
+def _schema() -> "pa.Schema":
+    float_columns = [
+        common_metrics.INTER_TOKEN_LAT,
+        common_metrics.TTFT,
+        common_metrics.E2E_LAT,
+        common_metrics.REQ_OUTPUT_THROUGHPUT,
+        common_metrics.SCHEDULE_LAG,
+        common_metrics.CONNECT_TIME,
+        common_metrics.CLIENT_PROCESSING_TIME,
+        common_metrics.CLIENT_CPU_TIME,
+        common_metrics.REQUEST_START_TIME,
+        common_metrics.REQUEST_END_TIME,
+    ]
+    int_columns = [
+        common_metrics.NUM_INPUT_TOKENS,
+        common_metrics.NUM_OUTPUT_TOKENS,
+        common_metrics.NUM_TOTAL_TOKENS,
+        common_metrics.SERVER_OUTPUT_TOKENS,
+    ]
+    return pa.schema(
+        [
+            # Error codes are HTTP statuses or whatever code the API put in the error.
+            (common_metrics.ERROR_CODE, pa.string()),
+            (common_metrics.ERROR_MSG, pa.string()),
+            # The base URL of the replica that served the request, when routed.
+            (common_metrics.ENDPOINT, pa.string()),
+            *[(column, pa.float64()) for column in float_columns],
+            *[(column, pa.int64()) for column in int_columns],
+            (common_metrics.CONNECTION_REUSED, pa.bool_()),
+            (common_metrics.TOKEN_ARRIVAL_TIMES, pa.list_(pa.float64())),
+        ]
+    )
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError(
+            "columnar responses require pyarrow, install it with `pip install pyarrow`"
+        )
+
+
+def validate_columnar_format(columnar_format: str) -> None:
+    """Raise if columnar_format is unknown or pyarrow is not installed."""
+    if columnar_format not in COLUMNAR_FORMATS:
+        raise ValueError(
+            f"columnar_format must be one of {COLUMNAR_FORMATS}, got {columnar_format}"
+        )
+    _require_pyarrow()
+
+
+def _to_record_batch(
+    records: List[Dict[str, Any]], schema: "pa.Schema"
+) -> "pa.RecordBatch":
+    columns = {}
+    for field in schema:
+        values = [record.get(field.name) for record in records]
+        if field.name == common_metrics.ERROR_CODE:
+            values = [None if value is None else str(value) for value in values]
+        elif field.name == common_metrics.TOKEN_ARRIVAL_TIMES:
+            values = [None if value is None else list(value) for value in values]
+        columns[field.name] = pa.array(values, type=field.type)
+    return pa.RecordBatch.from_pydict(columns, schema=schema)
+
+
+def write_columnar_responses(
+    path: str,
+    chunks: Iterable[List[Dict[str, Any]]],
+    columnar_format: str = "parquet",
+) -> None:
+    """Write the individual responses of a run to a columnar file.
+
+    Args:
+        path: The file to write.
+        chunks: The individual metrics of the requests, in chunks. Each chunk is
+            written as one record batch, so the responses never all need to be in
+            memory at once.
+        columnar_format: One of COLUMNAR_FORMATS. Arrow files are uncompressed so
+            they can be memory mapped without copying.
+    """
+    validate_columnar_format(columnar_format)
+    schema = _schema()
+    if columnar_format == "parquet":
+        writer = pq.ParquetWriter(path, schema)
+    else:
+        writer = pa.ipc.new_file(path, schema)
+    with writer:
+        for chunk in chunks:
+            if chunk:
+                writer.write_batch(_to_record_batch(chunk, schema))
+
+
+def load_columnar_responses(
+    path: str, columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """Load the individual responses of a run from a columnar file.
+
+    Args:
+        path: A file written by write_columnar_responses.
+        columns: The columns to read. Others are never read from disk.
+
+    Returns:
+        One row per request.
+    """
+    _require_pyarrow()
+    if path.endswith(".parquet"):
+        table = pq.read_table(path, columns=columns, memory_map=True)
+    else:
+        # Zero copy: the table's buffers point into the map and keep it open.
+        table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        if columns is not None:
+            table = table.select(columns)
+    return table.to_pandas()
+
+
+def load_columnar_runs(
+    results_dir: str, columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """Load the individual responses of every run under results_dir.
+
+    Args:
+        results_dir: The directory to search for columnar responses files.
+        columns: The columns to read from each file.
+
+    Returns:
+        One row per request, with the directory of its run relative to results_dir in
+        a "run" column, and its concurrency level in a "concurrency" column when the
+        directory is named after one.
+    """
+    frames = []
+    for root, _, files in os.walk(results_dir):
+        for file_name in sorted(files):
+            if not re.search(rf"{RESPONSES_SUFFIX}\.(parquet|arrow)$", file_name):
+                continue
+            df = load_columnar_responses(os.path.join(root, file_name), columns)
+            run = os.path.relpath(root, results_dir)
+            df["run"] = run
+            level = os.path.basename(root)
+            df["concurrency"] = int(level) if level.isdigit() else None
+            frames.append(df)
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
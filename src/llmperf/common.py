@@ -1,34 +1,57 @@
 from typing import List
-from llmperf.ray_clients.litellm_client import LiteLLMClient
-from llmperf.ray_clients.openai_chat_completions_client import (
-    OpenAIChatCompletionsClient,
-)
-from llmperf.ray_clients.sagemaker_client import SageMakerClient
-from llmperf.ray_clients.vertexai_client import VertexAIClient
+from llmperf.async_llm_client import AsyncLLMClient
 from llmperf.ray_llm_client import LLMClient
 
-
 SUPPORTED_APIS = ["openai", "anthropic", "litellm"]
+ASYNC_SUPPORTED_APIS = ["openai"]
+# The APIs whose clients send each request to the endpoint in its RequestConfig.
+ENDPOINT_SUPPORTED_APIS = ["openai"]
 
 
-def construct_clients(llm_api: str, num_clients: int) -> List[LLMClient]:
+def construct_clients(
+    llm_api: str,
+    num_clients: int,
+    connection_pool_size: int = 1,
+    num_endpoints: int = 0,
+) -> List[LLMClient]:
     """Construct LLMClients that will be used to make requests to the LLM API.
 
     Args:
         llm_api: The name of the LLM API to use.
         num_clients: The number of concurrent requests to make.
+        connection_pool_size: The number of keep-alive connections each client holds.
+            Only used by the openai client.
+        num_endpoints: The number of endpoints requests are routed across, 0 if they
+            all go to the client's default. Only used by the openai client.
 
     Returns:
         The constructed LLMCLients
 
     """
+    # Client modules are imported only when selected, since some of them pull in
+    # heavy dependencies (boto3, transformers) that other backends don't need.
     if llm_api == "openai":
-        clients = [OpenAIChatCompletionsClient.remote() for _ in range(num_clients)]
+        from llmperf.ray_clients.openai_chat_completions_client import (
+            OpenAIChatCompletionsClient,
+        )
+
+        clients = [
+            OpenAIChatCompletionsClient.remote(
+                pool_size=connection_pool_size, num_endpoints=num_endpoints
+            )
+            for _ in range(num_clients)
+        ]
     elif llm_api == "sagemaker":
+        from llmperf.ray_clients.sagemaker_client import SageMakerClient
+
         clients = [SageMakerClient.remote() for _ in range(num_clients)]
     elif llm_api == "vertexai":
+        from llmperf.ray_clients.vertexai_client import VertexAIClient
+
         clients = [VertexAIClient.remote() for _ in range(num_clients)]
     elif llm_api in SUPPORTED_APIS:
+        from llmperf.ray_clients.litellm_client import LiteLLMClient
+
         clients = [LiteLLMClient.remote() for _ in range(num_clients)]
     else:
         raise ValueError(
@@ -36,3 +59,34 @@ def construct_clients(llm_api: str, num_clients: int) -> List[LLMClient]:
         )
 
     return clients
+
+
+def construct_async_client(
+    llm_api: str, max_connections: int = 0, num_endpoints: int = 0
+) -> AsyncLLMClient:
+    """Construct the AsyncLLMClient shared by all requests of an asyncio run.
+
+    Args:
+        llm_api: The name of the LLM API to use.
+        max_connections: The maximum number of simultaneous connections. 0 means no limit.
+        num_endpoints: The number of endpoints requests are routed across, 0 if they
+            all go to the client's default.
+
+    Returns:
+        The constructed AsyncLLMClient
+
+    """
+    if llm_api == "openai":
+        from llmperf.async_clients.openai_chat_completions_client import (
+            AsyncOpenAIChatCompletionsClient,
+        )
+
+        client = AsyncOpenAIChatCompletionsClient(
+            max_connections=max_connections, num_endpoints=num_endpoints
+        )
+    else:
+        raise ValueError(
+            f"llm_api must be one of the asyncio supported LLM APIs: {ASYNC_SUPPORTED_APIS}"
+        )
+
+    return client
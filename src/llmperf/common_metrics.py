@@ -15,3 +15,38 @@ NUM_COMPLETED_REQUESTS = "num_completed_requests"
 COMPLETED_REQUESTS_PER_MIN = "num_completed_requests_per_min"
 ERROR_RATE = "error_rate"
 NUM_REQ_STARTED = "num_requests_started"
+SCHEDULE_LAG = "schedule_lag_s"
+OFFERED_REQUEST_RATE = "offered_request_rate_per_s"
+ACHIEVED_REQUEST_RATE = "achieved_request_rate_per_s"
+CONNECTION_REUSED = "connection_reused"
+CONNECT_TIME = "connect_time_s"
+CONNECTION_REUSE_RATE = "connection_reuse_rate"
+SERVER_OUTPUT_TOKENS = "server_reported_output_tokens"
+TOKEN_ARRIVAL_TIMES = "token_arrival_times_s"
+ITL_P50 = "inter_token_latency_p50_s"
+ITL_P99 = "inter_token_latency_p99_s"
+POOLED_ITL = "pooled_inter_token_latency_s"
+CLIENT_PROCESSING_TIME = "client_processing_time_s"
+CLIENT_CPU_TIME = "client_cpu_time_s"
+CLIENT_OVERHEAD = "client_overhead"
+CLIENT_PROCESSING_FRACTION = "processing_fraction"
+CLIENT_PROCESSING_TIME_PER_TOKEN = "processing_time_per_token_s"
+DRIVER_CPU_MEAN = "driver_cpu_utilization_mean"
+DRIVER_CPU_MAX = "driver_cpu_utilization_max"
+CLIENT_CPU_CORES = "client_cpu_cores"
+CLIENT_CPU_CORES_MAX = "client_cpu_cores_max"
+CLIENT_OVERHEAD_WARNINGS = "warnings"
+QUANTILE_RELATIVE_ACCURACY = "quantile_relative_accuracy"
+REQUEST_START_TIME = "request_start_time_s"
+REQUEST_END_TIME = "request_end_time_s"
+STEADY_STATE = "steady_state"
+STEADY_STATE_START = "window_start_s"
+STEADY_STATE_END = "window_end_s"
+REQUEST_SLOS = "request_slos"
+GOODPUT = "goodput_token_per_s"
+SLO_ATTAINMENT = "slo_attainment"
+SLO_MISSES = "slo_misses"
+ENDPOINT = "endpoint"
+ENDPOINTS = "endpoints"
+TRACE_DURATION = "trace_duration_s"
+REPLAY_DURATION = "replay_duration_s"
@@ -0,0 +1,121 @@
+"""Token-indexed text corpus for building prompts of an exact token length."""
+
+import hashlib
+import pathlib
+import random
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, List, Optional
+
+SONNET_PATH = pathlib.Path(__file__).parent.resolve() / "sonnet.txt"
+
+
+def read_lines(path: pathlib.Path) -> List[str]:
+    """Read the lines of a corpus file, with their line endings."""
+    with open(path, "r") as f:
+        return f.readlines()
+
+
+def text_digest(lines: List[str]) -> str:
+    """Return the digest of the text of a corpus."""
+    return hashlib.sha256("".join(lines).encode("utf-8")).hexdigest()
+
+
+class TokenizedCorpus:
+    """A corpus of lines tokenized once up front.
+
+    The token ids of every line are stored back to back in one flat array, with
+    line_offsets holding the prefix sums of the per-line token counts, so the ids of
+    line i are token_ids[line_offsets[i]:line_offsets[i + 1]].
+    """
+
+    def __init__(self, lines: List[str], tokenizer):
+        self.lines = lines
+        self.tokenizer = tokenizer
+        # Identifies the text of the corpus, independently of the tokenizer.
+        self.digest = text_digest(lines)
+        self.token_ids = array("l")
+        self.line_offsets = array("l", [0])
+        for ids in tokenizer(lines, add_special_tokens=False)["input_ids"]:
+            self.token_ids.extend(ids)
+            self.line_offsets.append(len(self.token_ids))
+        self.line_num_tokens = [
+            self.line_offsets[i + 1] - self.line_offsets[i] for i in range(len(lines))
+        ]
+        self.num_tokens = len(self.token_ids)
+
+    @classmethod
+    def from_file(cls, path: pathlib.Path, tokenizer) -> "TokenizedCorpus":
+        return cls(read_lines(path), tokenizer)
+
+    def line_token_ids(self, line_index: int) -> array:
+        return self.token_ids[
+            self.line_offsets[line_index] : self.line_offsets[line_index + 1]
+        ]
+
+    def sample(self, num_tokens: int, rng: Optional[random.Random] = None) -> str:
+        """Build text of exactly num_tokens tokens out of shuffled lines.
+
+        Lines are shuffled and appended until the target is reached, reshuffling for
+        every pass over the corpus. The line that crosses the target is cut at a token
+        boundary instead of a character one.
+
+        Args:
+            num_tokens: The number of tokens the text should have, as counted by
+                summing the token counts of the lines it is made of.
+            rng: The random number generator to shuffle with. Defaults to the global one.
+
+        Returns:
+            The sampled text.
+        """
+        rng = rng or random
+        order = list(range(len(self.lines)))
+        pieces = []
+        remaining = num_tokens
+        while remaining > 0:
+            rng.shuffle(order)
+            if remaining >= self.num_tokens:
+                pieces.extend(self.lines[i] for i in order)
+                remaining -= self.num_tokens
+                continue
+            # Find the first line whose cumulative token count reaches the target.
+            cumulative = list(accumulate(self.line_num_tokens[i] for i in order))
+            cut = bisect_left(cumulative, remaining)
+            pieces.extend(self.lines[i] for i in order[:cut])
+            remaining -= cumulative[cut - 1] if cut else 0
+            last_line = order[cut]
+            if remaining == self.line_num_tokens[last_line]:
+                pieces.append(self.lines[last_line])
+            else:
+                # This will cut off a line in the middle of a word, but that's ok since
+                # an llm should be able to handle that.
+                pieces.append(
+                    self.tokenizer.decode(self.line_token_ids(last_line)[:remaining])
+                )
+            remaining = 0
+        return "".join(pieces)
+
+
+_sonnet_corpora: Dict[int, TokenizedCorpus] = {}
+_sonnet_digest: Optional[str] = None
+
+
+def sonnet_digest() -> str:
+    """Return the digest of the sonnet text without tokenizing it.
+
+    Equal to the digest of the TokenizedCorpus of the sonnet, with any tokenizer.
+    """
+    global _sonnet_digest
+    if _sonnet_digest is None:
+        _sonnet_digest = text_digest(read_lines(SONNET_PATH))
+    return _sonnet_digest
+
+
+def get_sonnet_corpus(tokenizer) -> TokenizedCorpus:
+    """Return the sonnet corpus tokenized with tokenizer, indexing it on first use."""
+    corpus = _sonnet_corpora.get(id(tokenizer))
+    if corpus is None or corpus.tokenizer is not tokenizer:
+        corpus = TokenizedCorpus.from_file(SONNET_PATH, tokenizer)
+        _sonnet_corpora[id(tokenizer)] = corpus
+    return corpus
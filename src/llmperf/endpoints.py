@@ -0,0 +1,120 @@
+"""Routing the requests of a load test across several replicas of an API."""
+
+import random
+import threading
+from typing import List, Optional, Tuple
+
+ROUTING_POLICIES = ["round-robin", "least-outstanding", "random"]
+
+
+def parse_endpoints(spec: str) -> List[Tuple[str, float]]:
+    """Parse a comma separated list of endpoints, each optionally weighted.
+
+    Args:
+        spec: Base URLs such as "http://a:8000/v1=2,http://b:8000/v1". An endpoint
+            without a weight has weight 1.
+
+    Returns:
+        The (base URL, weight) of each endpoint, in the order given.
+    """
+    endpoints = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        url, _, weight = item.rpartition("=")
+        try:
+            weight = float(weight)
+        except ValueError:
+            # The last "=" belongs to the URL's query string.
+            url, weight = item, 1.0
+        if not url:
+            raise ValueError(f"invalid endpoint {item!r}, expected url or url=weight")
+        if weight <= 0:
+            raise ValueError(f"the weight of {url} must be positive, got {weight}")
+        endpoints.append((url, weight))
+    if not endpoints:
+        raise ValueError(f"no endpoints in {spec!r}")
+    urls = [url for url, _ in endpoints]
+    if len(set(urls)) != len(urls):
+        raise ValueError(f"endpoints must be distinct, got {urls}")
+    return endpoints
+
+
+def chat_completions_url(base_url: str) -> str:
+    """The chat completions URL of an OpenAI compatible API's base URL."""
+    if not base_url.endswith("/"):
+        base_url = base_url + "/"
+    return base_url + "chat/completions"
+
+
+class EndpointRouter:
+    """Picks the endpoint of each request and tracks the requests in flight to each.
+
+    Safe to use from many threads at once. Every acquire() must be followed by a
+    release() of the same endpoint once the request finishes.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[Tuple[str, float]],
+        policy: str = "round-robin",
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            endpoints: The (base URL, weight) of each endpoint, e.g. from
+                parse_endpoints.
+            policy: How to pick an endpoint. "round-robin" interleaves the endpoints in
+                proportion to their weights, "least-outstanding" picks the endpoint with
+                the fewest requests in flight relative to its weight and "random" draws
+                an endpoint with probability proportional to its weight.
+            seed: The seed of the "random" policy.
+        """
+        if policy not in ROUTING_POLICIES:
+            raise ValueError(f"policy must be one of {ROUTING_POLICIES}, got {policy}")
+        if not endpoints:
+            raise ValueError("at least one endpoint is required")
+        self.policy = policy
+        self.urls = [url for url, _ in endpoints]
+        self._weights = [weight for _, weight in endpoints]
+        self._total_weight = sum(self._weights)
+        self._outstanding = [0] * len(endpoints)
+        self._num_sent = [0] * len(endpoints)
+        # The running scores of smooth weighted round-robin.
+        self._current = [0.0] * len(endpoints)
+        self._index = {url: i for i, url in enumerate(self.urls)}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _pick(self) -> int:
+        if self.policy == "round-robin":
+            for i, weight in enumerate(self._weights):
+                self._current[i] += weight
+            best = max(range(len(self._current)), key=self._current.__getitem__)
+            self._current[best] -= self._total_weight
+            return best
+        if self.policy == "least-outstanding":
+            # Ties, such as every endpoint being idle, go to the endpoint that has
+            # served the fewest requests for its weight.
+            return min(
+                range(len(self._weights)),
+                key=lambda i: (
+                    (self._outstanding[i] + 1) / self._weights[i],
+                    (self._num_sent[i] + 1) / self._weights[i],
+                ),
+            )
+        return self._rng.choices(range(len(self._weights)), self._weights)[0]
+
+    def acquire(self) -> str:
+        """Pick the endpoint of the next request and count it as in flight."""
+        with self._lock:
+            i = self._pick()
+            self._outstanding[i] += 1
+            self._num_sent[i] += 1
+            return self.urls[i]
+
+    def release(self, endpoint: str) -> None:
+        """Count a request to endpoint as finished."""
+        with self._lock:
+            self._outstanding[self._index[endpoint]] -= 1
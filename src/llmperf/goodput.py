@@ -0,0 +1,102 @@
+"""Goodput: the output throughput of the requests that met their latency SLOs."""
+
+from collections import Counter
+from typing import Any, Dict, List
+
+from llmperf import common_metrics
+
+# The per-request metrics an SLO can be set on.
+REQUEST_SLO_METRICS = [
+    common_metrics.TTFT,
+    common_metrics.INTER_TOKEN_LAT,
+    common_metrics.E2E_LAT,
+]
+
+# The miss reason of requests that errored.
+ERROR_MISS = "error"
+
+
+def validate_request_slos(request_slos: Dict[str, float]) -> None:
+    """Raise a ValueError if request_slos sets an unknown metric or a bad threshold."""
+    for key, threshold in request_slos.items():
+        if key not in REQUEST_SLO_METRICS:
+            raise ValueError(
+                f"request SLOs can only be set on {REQUEST_SLO_METRICS}, got {key}"
+            )
+        if not threshold > 0:
+            raise ValueError(f"the SLO on {key} must be positive, got {threshold}")
+
+
+class GoodputCounter:
+    """Count which requests met every per-request SLO and the tokens they produced.
+
+    A request meets an SLO if its metric is at most the threshold. Requests that
+    errored miss every SLO and are counted under ERROR_MISS.
+    """
+
+    def __init__(self, request_slos: Dict[str, float]):
+        """
+        Args:
+            request_slos: The threshold of each metric in REQUEST_SLO_METRICS to check,
+                in seconds. The mean inter-token latency of each request is checked
+                against the SLO on common_metrics.INTER_TOKEN_LAT.
+        """
+        validate_request_slos(request_slos)
+        self.request_slos = dict(request_slos)
+        self.num_requests = 0
+        self.num_met = 0
+        self.goodput_tokens = 0
+        self.misses: Counter = Counter()
+
+    def add(self, request_metrics: Dict[str, Any]) -> List[str]:
+        """Check the metrics of a finished request against the SLOs.
+
+        Returns:
+            The SLOs the request missed, or [ERROR_MISS] if it errored.
+        """
+        self.num_requests += 1
+        if request_metrics.get(common_metrics.ERROR_CODE) is not None:
+            self.misses[ERROR_MISS] += 1
+            return [ERROR_MISS]
+        missed = [
+            key
+            for key, threshold in self.request_slos.items()
+            if not request_metrics.get(key, float("inf")) <= threshold
+        ]
+        self.misses.update(missed)
+        if not missed:
+            self.num_met += 1
+            self.goodput_tokens += request_metrics[common_metrics.NUM_OUTPUT_TOKENS]
+        return missed
+
+    def merge(self, other: "GoodputCounter") -> None:
+        if other.request_slos != self.request_slos:
+            raise ValueError("can only merge counters with the same SLOs")
+        self.num_requests += other.num_requests
+        self.num_met += other.num_met
+        self.goodput_tokens += other.goodput_tokens
+        self.misses.update(other.misses)
+
+    def summary(self, duration_s: float) -> Dict[str, Any]:
+        """Summarize the goodput of a run.
+
+        Args:
+            duration_s: The duration of the run.
+
+        Returns:
+            The SLOs, the goodput in tokens per second, the share of requests that met
+            every SLO, and the number of requests that missed each SLO. A request
+            that missed several SLOs is counted under each of them.
+        """
+        return {
+            common_metrics.REQUEST_SLOS: dict(self.request_slos),
+            common_metrics.GOODPUT: (
+                self.goodput_tokens / duration_s if duration_s > 0 else 0
+            ),
+            common_metrics.SLO_ATTAINMENT: (
+                self.num_met / self.num_requests if self.num_requests else 0
+            ),
+            common_metrics.SLO_MISSES: {
+                key: self.misses[key] for key in [*self.request_slos, ERROR_MISS]
+            },
+        }
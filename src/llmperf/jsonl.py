@@ -0,0 +1,128 @@
+"""Write request results to a JSON lines file as they complete, and read them back."""
+
+import json
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from llmperf.sse import loads
+
+try:
+    import orjson
+
+    def dumps(record: Dict[str, Any]) -> bytes:
+        # Token arrival times are arrays, written out as lists.
+        return orjson.dumps(record, default=list, option=orjson.OPT_SERIALIZE_NUMPY)
+
+except ImportError:
+
+    def dumps(record: Dict[str, Any]) -> bytes:
+        return json.dumps(record, default=list).encode()
+
+
+DEFAULT_FLUSH_INTERVAL_S = 1.0
+
+
+class JsonlWriter:
+    """Append records to a JSON lines file from a background thread.
+
+    write() only enqueues the record, so the request workers never wait on
+    serialization or disk. The thread writes what has queued up and flushes it to the
+    file at least every flush_interval_s, so an interrupted run loses at most the
+    records of the last interval.
+    """
+
+    def __init__(self, path: str, flush_interval_s: float = DEFAULT_FLUSH_INTERVAL_S):
+        """
+        Args:
+            path: The file to write. It is truncated if it exists.
+            flush_interval_s: The longest a written record waits before it is
+                flushed to the file.
+        """
+        self.path = path
+        self._flush_interval_s = flush_interval_s
+        self._file = open(path, "wb")
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._queue.put(record)
+
+    def close(self) -> None:
+        """Write every queued record and close the file."""
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        closed = False
+        while not closed:
+            lines = []
+            deadline = time.monotonic() + self._flush_interval_s
+            while True:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    record = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if record is None:
+                    closed = True
+                    break
+                lines.append(dumps(record) + b"\n")
+            if lines:
+                self._file.writelines(lines)
+                self._file.flush()
+
+
+def read_jsonl(
+    path: str,
+    chunk_size: int = 10000,
+    keys: Optional[List[str]] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Read the records of a JSON lines file in chunks.
+
+    A last line cut short, as left by a run that was killed while writing, is
+    skipped.
+
+    Args:
+        path: The file to read.
+        chunk_size: The number of records per chunk.
+        keys: If set, only keep these keys of each record.
+
+    Yields:
+        Lists of up to chunk_size records.
+    """
+    select: Callable[[Dict[str, Any]], Dict[str, Any]] = (
+        (lambda record: {key: record[key] for key in keys if key in record})
+        if keys is not None
+        else (lambda record: record)
+    )
+    chunk = []
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            if not line.strip():
+                continue
+            chunk.append(select(loads(line)))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_jsonl(path: str, keys: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Iterate over the records of a JSON lines file, only keeping keys if set."""
+    for chunk in read_jsonl(path, keys=keys):
+        yield from chunk
@@ -0,0 +1,150 @@
+"""Detect when the load generator, rather than the server, limits a load test."""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from llmperf import common_metrics
+
+# Above this share of request time spent parsing and processing responses on the
+# client, measured latencies include a noticeable amount of client overhead.
+CLIENT_OVERHEAD_WARNING_THRESHOLD = 0.05
+
+# Above this utilization, as a share of one core for the driver and of all local
+# cores for the driver and clients together, the load generator is likely CPU bound.
+CPU_WARNING_THRESHOLD = 0.8
+
+
+class CpuSampler:
+    """Sample CPU utilization from a background thread.
+
+    By default the current process is sampled. Pass the cpu_time of a ClientPool to
+    sample its client actors instead.
+    """
+
+    def __init__(
+        self,
+        interval_s: float = 1.0,
+        cpu_time: Callable[[], float] = time.process_time,
+    ):
+        """
+        Args:
+            interval_s: The time between samples.
+            cpu_time: Returns the CPU time used so far by what is sampled, in seconds.
+        """
+        self._interval_s = interval_s
+        self._cpu_time = cpu_time
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.samples: List[float] = []
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> List[float]:
+        """Stop sampling.
+
+        Returns:
+            The utilization of each interval, in cores.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.samples
+
+    def _run(self) -> None:
+        last_wall_time = time.monotonic()
+        last_cpu_time = self._cpu_time()
+        stopped = False
+        while not stopped:
+            # The last, partial interval is sampled too, so short runs get a sample.
+            stopped = self._stopped.wait(self._interval_s)
+            wall_time = time.monotonic()
+            cpu_time = self._cpu_time()
+            if wall_time > last_wall_time:
+                self.samples.append(
+                    (cpu_time - last_cpu_time) / (wall_time - last_wall_time)
+                )
+            last_wall_time, last_cpu_time = wall_time, cpu_time
+
+
+def client_overhead_summary(
+    df: pd.DataFrame,
+    duration_s: float,
+    driver_cpu_samples: Optional[List[float]] = None,
+    client_cpu_samples: Optional[List[float]] = None,
+) -> Dict[str, Any]:
+    """Summarize how much of a run's time and CPU the load generator itself used.
+
+    Args:
+        df: The metrics of the requests that didn't error.
+        duration_s: The duration of the run.
+        driver_cpu_samples: The CPU utilization of the driver process sampled during
+            the run, as a share of one core.
+        client_cpu_samples: The CPU utilization of the client actors sampled during
+            the run, in cores. Without them, the client CPU is the average over the
+            whole run of the CPU time each request reported, which cannot show the
+            clients saturating for only part of the run.
+
+    Returns:
+        The client overhead metrics, and a list of warnings for the metrics that
+        crossed their threshold.
+    """
+    ret = {}
+    warnings = []
+    if common_metrics.CLIENT_PROCESSING_TIME in df.columns and len(df):
+        processing_time = df[common_metrics.CLIENT_PROCESSING_TIME].sum()
+        processing_fraction = processing_time / df[common_metrics.E2E_LAT].sum()
+        ret[common_metrics.CLIENT_PROCESSING_FRACTION] = processing_fraction
+        num_output_tokens = df[common_metrics.NUM_OUTPUT_TOKENS].sum()
+        ret[common_metrics.CLIENT_PROCESSING_TIME_PER_TOKEN] = (
+            processing_time / num_output_tokens if num_output_tokens else 0
+        )
+        if processing_fraction > CLIENT_OVERHEAD_WARNING_THRESHOLD:
+            warnings.append(
+                f"clients spent {processing_fraction:.1%} of request time processing "
+                "responses instead of waiting on the server"
+            )
+
+    driver_cpu = [0.0]
+    if driver_cpu_samples:
+        driver_cpu = driver_cpu_samples
+        driver_cpu_max = max(driver_cpu_samples)
+        ret[common_metrics.DRIVER_CPU_MEAN] = sum(driver_cpu_samples) / len(
+            driver_cpu_samples
+        )
+        ret[common_metrics.DRIVER_CPU_MAX] = driver_cpu_max
+        if driver_cpu_max > CPU_WARNING_THRESHOLD:
+            warnings.append(
+                f"the driver process peaked at {driver_cpu_max:.0%} of a core"
+            )
+    client_cpu = [0.0]
+    if client_cpu_samples:
+        client_cpu = client_cpu_samples
+        ret[common_metrics.CLIENT_CPU_CORES] = sum(client_cpu_samples) / len(
+            client_cpu_samples
+        )
+        ret[common_metrics.CLIENT_CPU_CORES_MAX] = max(client_cpu_samples)
+    elif common_metrics.CLIENT_CPU_TIME in df.columns and duration_s > 0:
+        client_cpu = [df[common_metrics.CLIENT_CPU_TIME].sum() / duration_s]
+        ret[common_metrics.CLIENT_CPU_CORES] = client_cpu[0]
+    # The peak of the driver and clients together. Both are sampled over the same
+    # intervals, and a single value is the same for every interval.
+    num_intervals = max(len(driver_cpu), len(client_cpu))
+    cpu_cores_used = max(
+        driver_cpu[min(i, len(driver_cpu) - 1)]
+        + client_cpu[min(i, len(client_cpu) - 1)]
+        for i in range(num_intervals)
+    )
+    num_cpus = os.cpu_count() or 1
+    if cpu_cores_used > CPU_WARNING_THRESHOLD * num_cpus:
+        warnings.append(
+            f"the load generator peaked at {cpu_cores_used:.1f} of {num_cpus} local cores"
+        )
+
+    ret[common_metrics.CLIENT_OVERHEAD_WARNINGS] = warnings
+    return ret
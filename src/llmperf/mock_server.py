@@ -0,0 +1,409 @@
+"""A local OpenAI compatible chat completions server with configurable timings.
+
+The server streams /v1/chat/completions responses without running a model, so the
+benchmark, charts and reports can run offline, and the overhead of the load generator
+can be measured against timings the server knows exactly. The time to first token
+grows linearly with the prompt length, the gaps between tokens are drawn from a
+configurable distribution, and the number of generated tokens honors max_tokens and
+min_tokens.
+
+    python -m llmperf.mock_server --port 8000 --ttft-base-s 0.05 --itl-mean-s 0.01
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+from llmperf.jsonl import JsonlWriter
+
+ITL_DISTRIBUTIONS = ["constant", "uniform", "normal", "exponential", "lognormal"]
+
+# Each is one token of the benchmark's tokenizer, so client side token counts of the
+# generated text match the completion tokens the server reports.
+_WORDS = [" the", " of", " and", " to", " in", " is", " that", " for", " it", " as"]
+
+# Prompt tokens are estimated from the length of the prompt when they are not counted
+# with the tokenizer. Typical for English prose; the benchmark's sonnet prompts have
+# shorter tokens.
+CHARS_PER_TOKEN = 4
+
+
+class MockServerConfig:
+    """The timings and lengths of the responses of the mock server."""
+
+    def __init__(
+        self,
+        ttft_base_s: float = 0.05,
+        ttft_per_prompt_token_s: float = 0.0,
+        itl_distribution: str = "constant",
+        itl_mean_s: float = 0.01,
+        itl_stddev_s: float = 0.0,
+        default_max_tokens: int = 256,
+        natural_output_tokens: Optional[int] = None,
+        exact_prompt_tokens: bool = True,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            ttft_base_s: The time to first token of an empty prompt.
+            ttft_per_prompt_token_s: The time to first token added per prompt token,
+                the prefill cost.
+            itl_distribution: The distribution of the gaps between tokens, one of
+                ITL_DISTRIBUTIONS.
+            itl_mean_s: The mean gap between tokens.
+            itl_stddev_s: The standard deviation of the gaps between tokens. Unused by
+                "constant" and "exponential", whose standard deviation is the mean.
+            default_max_tokens: The number of tokens generated when a request sets no
+                max_tokens.
+            natural_output_tokens: If set, the mean number of tokens generated before
+                the model would stop on its own, drawn per request from an exponential
+                distribution. The length is then clamped to min_tokens and
+                max_tokens. If not set, every response is max_tokens long.
+            exact_prompt_tokens: If True, count prompt tokens with the benchmark's
+                tokenizer, so the TTFT follows the prompt lengths the benchmark
+                reports. If False, estimate them from the length of the prompt, which
+                does not load the tokenizer.
+            seed: The seed of the random timings and lengths.
+        """
+        if itl_distribution not in ITL_DISTRIBUTIONS:
+            raise ValueError(
+                f"itl_distribution must be one of {ITL_DISTRIBUTIONS}, "
+                f"got {itl_distribution}"
+            )
+        if ttft_base_s < 0 or ttft_per_prompt_token_s < 0:
+            raise ValueError("the time to first token must not be negative")
+        if itl_mean_s < 0 or itl_stddev_s < 0:
+            raise ValueError("the inter-token latency must not be negative")
+        if default_max_tokens < 1:
+            raise ValueError(
+                f"default_max_tokens must be positive, got {default_max_tokens}"
+            )
+        self.ttft_base_s = ttft_base_s
+        self.ttft_per_prompt_token_s = ttft_per_prompt_token_s
+        self.itl_distribution = itl_distribution
+        self.itl_mean_s = itl_mean_s
+        self.itl_stddev_s = itl_stddev_s
+        self.default_max_tokens = default_max_tokens
+        self.natural_output_tokens = natural_output_tokens
+        self.exact_prompt_tokens = exact_prompt_tokens
+        self.rng = random.Random(seed)
+
+    def ttft(self, prompt_tokens: int) -> float:
+        return self.ttft_base_s + self.ttft_per_prompt_token_s * prompt_tokens
+
+    def inter_token_latency(self) -> float:
+        mean, stddev = self.itl_mean_s, self.itl_stddev_s
+        if self.itl_distribution == "constant" or mean == 0:
+            return mean
+        if self.itl_distribution == "uniform":
+            # A uniform distribution on mean +- sqrt(3) * stddev has that stddev.
+            half_width = min(3**0.5 * stddev, mean)
+            return self.rng.uniform(mean - half_width, mean + half_width)
+        if self.itl_distribution == "normal":
+            return max(self.rng.gauss(mean, stddev), 0.0)
+        if self.itl_distribution == "exponential":
+            return self.rng.expovariate(1 / mean)
+        # The lognormal with this mean and standard deviation.
+        sigma2 = math.log1p((stddev / mean) ** 2)
+        return self.rng.lognormvariate(math.log(mean) - sigma2 / 2, sigma2**0.5)
+
+    def output_tokens(self, max_tokens: int, min_tokens: int) -> int:
+        if self.natural_output_tokens is None:
+            return max_tokens
+        natural = int(self.rng.expovariate(1 / self.natural_output_tokens)) + 1
+        return max(min(natural, max_tokens), min(min_tokens, max_tokens))
+
+
+def count_prompt_tokens(messages: List[Dict[str, Any]], exact: bool) -> int:
+    """The number of tokens of the text of the messages."""
+    text = "".join(
+        message.get("content") or ""
+        for message in messages
+        if isinstance(message.get("content"), str)
+    )
+    if exact:
+        from llmperf.utils import count_tokens
+
+        return count_tokens([text])[0]
+    return max(len(text) // CHARS_PER_TOKEN, 1) if text else 0
+
+
+def _chunk(
+    request_id: str, created: int, model: str, delta: Dict[str, Any], finish_reason=None
+) -> bytes:
+    data = {
+        "id": request_id,
+        "object": "chat.completion.chunk",
+        "created": created,
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return b"data: " + json.dumps(data).encode() + b"\n\n"
+
+
+async def _sleep_until(deadline: float) -> None:
+    delay = deadline - time.monotonic()
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+
+def create_app(
+    config: MockServerConfig, timings_path: Optional[str] = None
+) -> web.Application:
+    """Create the mock server application.
+
+    Args:
+        config: The timings and lengths of the responses.
+        timings_path: If set, write the server side timings of each request to this
+            JSON lines file: the prompt and completion tokens, and the seconds from
+            receiving the request to sending its first and last tokens.
+
+    Returns:
+        The application, serving POST /v1/chat/completions and GET /v1/models.
+    """
+    if config.exact_prompt_tokens:
+        from llmperf.utils import get_tokenizer
+
+        # Load it now, not within the TTFT of the first requests.
+        get_tokenizer()
+    app = web.Application()
+    timings_writer = JsonlWriter(timings_path) if timings_path else None
+
+    async def chat_completions(request: web.Request) -> web.StreamResponse:
+        received_time = time.monotonic()
+        body = await request.json()
+        model = body.get("model", "mock")
+        max_tokens = body.get("max_tokens") or body.get("max_completion_tokens")
+        max_tokens = int(max_tokens or config.default_max_tokens)
+        min_tokens = int(body.get("min_tokens") or 0)
+        messages = body.get("messages", [])
+        if config.exact_prompt_tokens:
+            # Tokenizing in the event loop would hold up every other stream. The
+            # time it takes is absorbed by the TTFT, which counts from receipt.
+            prompt_tokens = await asyncio.get_running_loop().run_in_executor(
+                None, count_prompt_tokens, messages, True
+            )
+        else:
+            prompt_tokens = count_prompt_tokens(messages, False)
+        completion_tokens = config.output_tokens(max_tokens, min_tokens)
+        finish_reason = "length" if completion_tokens >= max_tokens else "stop"
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        request_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        words = [_WORDS[i % len(_WORDS)] for i in range(completion_tokens)]
+
+        # Tokens are due at offsets from when the request was received, so time
+        # spent writing does not accumulate into the gaps.
+        deadline = received_time + config.ttft(prompt_tokens)
+        if not body.get("stream"):
+            for _ in range(completion_tokens - 1):
+                deadline += config.inter_token_latency()
+            await _sleep_until(deadline)
+            return web.json_response(
+                {
+                    "id": request_id,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "".join(words)},
+                            "finish_reason": finish_reason,
+                        }
+                    ],
+                    "usage": usage,
+                }
+            )
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        first_token_time = None
+        for i, word in enumerate(words):
+            if i:
+                deadline += config.inter_token_latency()
+            await _sleep_until(deadline)
+            last = i == len(words) - 1
+            await response.write(
+                _chunk(
+                    request_id,
+                    created,
+                    model,
+                    (
+                        {"role": "assistant", "content": word}
+                        if i == 0
+                        else {"content": word}
+                    ),
+                    finish_reason if last else None,
+                )
+            )
+            if first_token_time is None:
+                first_token_time = time.monotonic()
+        last_token_time = time.monotonic()
+        if (body.get("stream_options") or {}).get("include_usage"):
+            data = {
+                "id": request_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [],
+                "usage": usage,
+            }
+            await response.write(b"data: " + json.dumps(data).encode() + b"\n\n")
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+
+        if timings_writer is not None:
+            timings_writer.write(
+                {
+                    "id": request_id,
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "ttft_s": (first_token_time or last_token_time) - received_time,
+                    "end_to_end_latency_s": last_token_time - received_time,
+                }
+            )
+        return response
+
+    async def models(request: web.Request) -> web.Response:
+        return web.json_response(
+            {"object": "list", "data": [{"id": "mock", "object": "model"}]}
+        )
+
+    async def close_timings(app: web.Application) -> None:
+        if timings_writer is not None:
+            timings_writer.close()
+
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_get("/v1/models", models)
+    app.on_cleanup.append(close_timings)
+    return app
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument(
+        "--host",
+        type=str,
+        default="127.0.0.1",
+        help="The address to listen on. (default: %(default)s)",
+    )
+    args.add_argument(
+        "--port",
+        type=int,
+        default=8000,
+        help="The port to listen on. (default: %(default)s)",
+    )
+    args.add_argument(
+        "--ttft-base-s",
+        type=float,
+        default=0.05,
+        help="The time to first token of an empty prompt. (default: %(default)s)",
+    )
+    args.add_argument(
+        "--ttft-per-prompt-token-s",
+        type=float,
+        default=0.0,
+        help=(
+            "The time to first token added per prompt token, the prefill cost. "
+            "(default: %(default)s)"
+        ),
+    )
+    args.add_argument(
+        "--itl-distribution",
+        type=str,
+        default="constant",
+        choices=ITL_DISTRIBUTIONS,
+        help="The distribution of the gaps between tokens. (default: %(default)s)",
+    )
+    args.add_argument(
+        "--itl-mean-s",
+        type=float,
+        default=0.01,
+        help="The mean gap between tokens. (default: %(default)s)",
+    )
+    args.add_argument(
+        "--itl-stddev-s",
+        type=float,
+        default=0.0,
+        help=(
+            "The standard deviation of the gaps between tokens, for the uniform, "
+            "normal and lognormal distributions. (default: %(default)s)"
+        ),
+    )
+    args.add_argument(
+        "--default-max-tokens",
+        type=int,
+        default=256,
+        help=(
+            "The number of tokens generated when a request sets no max_tokens. "
+            "(default: %(default)s)"
+        ),
+    )
+    args.add_argument(
+        "--natural-output-tokens",
+        type=int,
+        default=None,
+        help=(
+            "If set, the mean number of tokens generated before stopping on its own, "
+            "clamped to each request's min_tokens and max_tokens. By default every "
+            "response is max_tokens long. (default: %(default)s)"
+        ),
+    )
+    args.add_argument(
+        "--estimate-prompt-tokens",
+        action="store_true",
+        default=False,
+        help=(
+            f"Estimate prompt tokens as {CHARS_PER_TOKEN} characters per token instead "
+            "of counting them with the benchmark's tokenizer. Counting runs in a "
+            "thread pool and delays the first token if it takes longer than the TTFT. "
+            "(default: %(default)s)"
+        ),
+    )
+    args.add_argument(
+        "--timings-path",
+        type=str,
+        default=None,
+        help=(
+            "Write the server side TTFT and end to end latency of each request to "
+            "this JSON lines file. (default: %(default)s)"
+        ),
+    )
+    args.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="The seed of the random timings and lengths. (default: %(default)s)",
+    )
+    args = args.parse_args()
+
+    config = MockServerConfig(
+        ttft_base_s=args.ttft_base_s,
+        ttft_per_prompt_token_s=args.ttft_per_prompt_token_s,
+        itl_distribution=args.itl_distribution,
+        itl_mean_s=args.itl_mean_s,
+        itl_stddev_s=args.itl_stddev_s,
+        default_max_tokens=args.default_max_tokens,
+        natural_output_tokens=args.natural_output_tokens,
+        exact_prompt_tokens=not args.estimate_prompt_tokens,
+        seed=args.seed,
+    )
+    print(f"Serving mock chat completions on http://{args.host}:{args.port}/v1")
+    web.run_app(
+        create_app(config, args.timings_path),
+        host=args.host,
+        port=args.port,
+        print=None,
+    )
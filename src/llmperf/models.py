@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 from pydantic import BaseModel
 
 
@@ -12,6 +12,8 @@ class RequestConfig(BaseModel):
             For more information see the Router app's documentation for the completions
         llm_api: The name of the LLM API to send the request to.
         metadata: Additional metadata to attach to the request for logging or validation purposes.
+        endpoint: The base URL of the replica to send the request to. If not set, the
+            client's default is used, such as OPENAI_API_BASE.
     """
 
     model: str
@@ -19,3 +21,4 @@ class RequestConfig(BaseModel):
     sampling_params: Optional[Dict[str, Any]] = None
     llm_api: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
+    endpoint: Optional[str] = None
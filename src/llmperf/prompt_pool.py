@@ -0,0 +1,146 @@
+"""Batched generation of the sonnet prompts of a load test."""
+
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from llmperf.corpus import TokenizedCorpus, get_sonnet_corpus
+from llmperf.utils import sonnet_base_prompt
+
+# Pools with fewer corpus tokens than this are assembled in-process, where they take
+# less time than starting the worker processes would.
+PARALLEL_MIN_TOKENS = 20_000_000
+
+# Candidate lengths drawn per prompt in one go. A prompt whose candidates are all
+# rejected falls back to drawing from its own generator until one is accepted.
+_NUM_CANDIDATES = 8
+
+_worker_corpus: Optional[TokenizedCorpus] = None
+
+
+def generate_sonnet_prompt_pool(
+    num_prompts: int,
+    mean_input_tokens: int,
+    stddev_input_tokens: int,
+    mean_output_tokens: int,
+    stddev_output_tokens: int,
+    tokenizer,
+    seed: int,
+    request_ids: Optional[Sequence[str]] = None,
+    num_workers: Optional[int] = None,
+) -> Tuple[List[Tuple[str, int]], List[int]]:
+    """Generate the prompts and max output tokens of a load test in one batch.
+
+    Every random draw comes from generators derived from seed, one stream per kind of
+    draw, and each prompt's lines are shuffled with its own seed. The pool is therefore
+    the same for a given seed however it is split across workers, and a smaller pool
+    is a prefix of a larger one generated with the same seed.
+
+    Args:
+        num_prompts: The number of prompts to generate.
+        mean_input_tokens: The mean number of tokens in a prompt.
+        stddev_input_tokens: The standard deviation of the number of tokens in a prompt.
+        mean_output_tokens: The mean number of tokens to generate per request.
+        stddev_output_tokens: The standard deviation of the number of tokens to
+            generate per request.
+        tokenizer: The tokenizer to count prompt tokens with.
+        seed: The seed of the pool.
+        request_ids: If set, the unique id to prefix each prompt with, to prevent
+            prefix caching.
+        num_workers: The number of processes to assemble large pools with. Defaults to
+            the number of CPUs. Pools below PARALLEL_MIN_TOKENS are always assembled
+            in-process.
+
+    Returns:
+        The prompts, as (prompt, prompt length) tuples.
+        The number of output tokens to request for each prompt.
+    """
+    if request_ids is not None and len(request_ids) != num_prompts:
+        raise ValueError(f"expected {num_prompts} request_ids, got {len(request_ids)}")
+    output_seed, input_seed, shuffle_seed = np.random.SeedSequence(seed).spawn(3)
+
+    num_output_tokens = _sample_lengths(
+        output_seed, mean_output_tokens, stddev_output_tokens, np.ones(num_prompts)
+    )
+    base_prompts = [
+        sonnet_base_prompt(
+            int(num_output_tokens[i]), request_ids[i] if request_ids else None
+        )
+        for i in range(num_prompts)
+    ]
+    base_prompt_tokens = np.array(
+        [len(ids) for ids in tokenizer(base_prompts)["input_ids"]], dtype=np.int64
+    )
+    # get prompt lengths that are at least as long as their base
+    num_prompt_tokens = _sample_lengths(
+        input_seed, mean_input_tokens, stddev_input_tokens, base_prompt_tokens
+    )
+    shuffle_seeds = np.random.default_rng(shuffle_seed).integers(
+        2**63, size=num_prompts
+    )
+
+    jobs = list(
+        zip(
+            (num_prompt_tokens - base_prompt_tokens).tolist(),
+            shuffle_seeds.tolist(),
+        )
+    )
+    num_workers = num_workers or os.cpu_count() or 1
+    total_tokens = int(num_prompt_tokens.sum())
+    if num_workers > 1 and total_tokens >= PARALLEL_MIN_TOKENS:
+        chunk_size = -(-len(jobs) // (num_workers * 4))
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            initializer=_init_worker,
+            initargs=(tokenizer,),
+        ) as executor:
+            texts = list(executor.map(_sample_texts, jobs, chunksize=chunk_size))
+    else:
+        corpus = get_sonnet_corpus(tokenizer)
+        texts = [
+            corpus.sample(num_tokens, random.Random(job_seed))
+            for num_tokens, job_seed in jobs
+        ]
+
+    prompts = [
+        (base + text, int(length))
+        for base, text, length in zip(base_prompts, texts, num_prompt_tokens)
+    ]
+    return prompts, num_output_tokens.tolist()
+
+
+def _sample_lengths(
+    seed: np.random.SeedSequence,
+    mean: int,
+    stddev: int,
+    minimums: np.ndarray,
+) -> np.ndarray:
+    """Sample one integer per minimum from a gaussian, rejecting values below it."""
+    num = len(minimums)
+    candidates = (
+        np.random.default_rng(seed)
+        .normal(mean, stddev, size=(num, _NUM_CANDIDATES))
+        .astype(np.int64)
+    )
+    accepted = candidates >= np.asarray(minimums)[:, None]
+    lengths = candidates[np.arange(num), accepted.argmax(axis=1)]
+    for i in np.flatnonzero(~accepted.any(axis=1)):
+        rng = np.random.default_rng(
+            np.random.SeedSequence(seed.entropy, spawn_key=(*seed.spawn_key, int(i)))
+        )
+        while lengths[i] < minimums[i]:
+            lengths[i] = int(rng.normal(mean, stddev))
+    return lengths
+
+
+def _init_worker(tokenizer) -> None:
+    global _worker_corpus
+    _worker_corpus = get_sonnet_corpus(tokenizer)
+
+
+def _sample_texts(job: Tuple[int, int]) -> str:
+    num_tokens, job_seed = job
+    return _worker_corpus.sample(num_tokens, random.Random(job_seed))
@@ -1,13 +1,14 @@
 import time
+from array import array
 from typing import Any, Dict
 import ray
 
-from llmperf.ray_llm_client import LLMClient
+from llmperf.ray_llm_client import CLIENT_CONCURRENCY_GROUPS, LLMClient
 from llmperf.models import RequestConfig
 from llmperf import common_metrics
 
 
-@ray.remote
+@ray.remote(concurrency_groups=CLIENT_CONCURRENCY_GROUPS)
 class LiteLLMClient(LLMClient):
     """Client for LiteLLM Completions API."""
 
@@ -44,7 +45,7 @@ class LiteLLMClient(LLMClient):
         sampling_params = request_config.sampling_params
         body.update(sampling_params or {})
 
-        time_to_next_token = []
+        token_arrival_times = array("d")
         tokens_received = 0
         ttft = 0
         error_response_code = -1
@@ -52,32 +53,31 @@ class LiteLLMClient(LLMClient):
         error_msg = ""
         output_throughput = 0
         total_request_time = 0
+        # The time spent handling chunks rather than waiting for the next one.
+        processing_time = 0.0
 
         metrics = {}
+        start_cpu_time = time.process_time()
 
         metrics[common_metrics.ERROR_CODE] = None
         metrics[common_metrics.ERROR_MSG] = ""
 
         try:
             start_time = time.monotonic()
-            most_recent_received_token_time = time.monotonic()
 
             response = completion(**body)
             ttft = 0
             for tok in response:
+                read_time = time.monotonic()
                 if tok.choices[0].delta:
                     delta = tok.choices[0].delta
                     if delta.get("content", None):
-                        if ttft == 0:
-                            ttft = time.monotonic() - start_time
-                            time_to_next_token.append(ttft)
-                        else:
-                            time_to_next_token.append(
-                                time.monotonic() - most_recent_received_token_time
-                            )
+                        token_arrival_times.append(read_time - start_time)
+                        if not ttft:
+                            ttft = token_arrival_times[0]
                         generated_text += delta["content"]
-                        most_recent_received_token_time = time.monotonic()
                         tokens_received += 1
+                processing_time += time.monotonic() - read_time
 
             total_request_time = time.monotonic() - start_time
 
@@ -90,11 +90,16 @@ class LiteLLMClient(LLMClient):
             print(f"Warning Or Error: {e}")
             print(error_response_code)
 
-        metrics[common_metrics.INTER_TOKEN_LAT] = sum(time_to_next_token)
+        metrics[common_metrics.INTER_TOKEN_LAT] = (
+            token_arrival_times[-1] if token_arrival_times else 0
+        )
         metrics[common_metrics.TTFT] = ttft
         metrics[common_metrics.E2E_LAT] = total_request_time
         metrics[common_metrics.REQ_OUTPUT_THROUGHPUT] = output_throughput
         metrics[common_metrics.NUM_TOTAL_TOKENS] = tokens_received + prompt_len
         metrics[common_metrics.NUM_OUTPUT_TOKENS] = tokens_received
         metrics[common_metrics.NUM_INPUT_TOKENS] = prompt_len
+        metrics[common_metrics.TOKEN_ARRIVAL_TIMES] = token_arrival_times
+        metrics[common_metrics.CLIENT_PROCESSING_TIME] = processing_time
+        metrics[common_metrics.CLIENT_CPU_TIME] = time.process_time() - start_cpu_time
         return metrics, generated_text, request_config
@@ -1,20 +1,83 @@
-import json
+import itertools
 import os
 import time
+from array import array
 from typing import Any, Dict
 
 import ray
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 
-from llmperf.ray_llm_client import LLMClient
+from llmperf.ray_llm_client import CLIENT_CONCURRENCY_GROUPS, LLMClient
 from llmperf.models import RequestConfig
 from llmperf import common_metrics
+from llmperf.endpoints import chat_completions_url
+from llmperf.sse import SSEParser, loads
 
 
-@ray.remote
+class _TimedConnectionMixin:
+    """Records how long the TCP (and TLS) handshake of a connection took."""
+
+    def connect(self):
+        connect_start_time = time.monotonic()
+        super().connect()
+        self.llmperf_connect_time = time.monotonic() - connect_start_time
+        # Cleared by the client once a request has been served on this connection.
+        self.llmperf_fresh = True
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+@ray.remote(concurrency_groups=CLIENT_CONCURRENCY_GROUPS)
 class OpenAIChatCompletionsClient(LLMClient):
     """Client for OpenAI Chat Completions API."""
 
+    def __init__(self, pool_size: int = 1, num_endpoints: int = 0):
+        """
+        Args:
+            pool_size: The number of keep-alive connections to hold open to the API.
+            num_endpoints: The number of endpoints requests name in their
+                RequestConfig.endpoint, each of which gets its own connections. 0 means
+                every request goes to OPENAI_API_BASE.
+        """
+        address = os.environ.get("OPENAI_API_BASE")
+        if not address and not num_endpoints:
+            raise ValueError("the environment variable OPENAI_API_BASE must be set.")
+        self._address = chat_completions_url(address) if address else None
+        key = os.environ.get("OPENAI_API_KEY", "")
+        self._headers = {"Authorization": f"Bearer {key}"} if key else {}
+        self._session = requests.Session()
+        adapter = _TimedHTTPAdapter(
+            pool_connections=max(1, num_endpoints), pool_maxsize=pool_size
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
     def llm_request(self, request_config: RequestConfig) -> Dict[str, Any]:
         prompt = request_config.prompt
         prompt, prompt_len = prompt
@@ -28,75 +91,85 @@ class OpenAIChatCompletionsClient(LLMClient):
             "model": model,
             "messages": message,
             "stream": True,
+            # Ask for a final chunk with the server's token counts.
+            "stream_options": {"include_usage": True},
         }
         sampling_params = request_config.sampling_params
         body.update(sampling_params or {})
-        time_to_next_token = []
+        token_arrival_times = array("d")
         tokens_received = 0
         ttft = 0
         error_response_code = -1
-        generated_text = ""
+        generated_text = []
         error_msg = ""
+        server_output_tokens = None
         output_throughput = 0
         total_request_time = 0
+        processing_time = 0
+        connection_reused = False
+        connect_time = 0
 
         metrics = {}
 
         metrics[common_metrics.ERROR_CODE] = None
         metrics[common_metrics.ERROR_MSG] = ""
 
+        address = self._address
+        if request_config.endpoint:
+            address = chat_completions_url(request_config.endpoint)
+
         start_time = time.monotonic()
-        most_recent_received_token_time = time.monotonic()
-        address = os.environ.get("OPENAI_API_BASE")
-        if not address:
-            raise ValueError("the environment variable OPENAI_API_BASE must be set.")
-        key = os.environ.get("OPENAI_API_KEY", "")
-        headers = {"Authorization": f"Bearer {key}"} if key else {}
-        if not address:
-            raise ValueError("No host provided.")
-        if not address.endswith("/"):
-            address = address + "/"
-        address += "chat/completions"
+        start_cpu_time = time.process_time()
         try:
-            with requests.post(
+            with self._session.post(
                 address,
                 json=body,
                 stream=True,
                 timeout=180,
-                headers=headers,
+                headers=self._headers,
             ) as response:
+                connection = response.raw.connection
+                if connection is not None:
+                    connection_reused = not getattr(connection, "llmperf_fresh", False)
+                    if not connection_reused:
+                        connect_time = connection.llmperf_connect_time
+                        connection.llmperf_fresh = False
                 if response.status_code != 200:
                     error_msg = response.text
                     error_response_code = response.status_code
                     response.raise_for_status()
-                for chunk in response.iter_lines(chunk_size=None):
-                    chunk = chunk.strip()
-
-                    if not chunk:
-                        continue
-                    stem = "data: "
-                    chunk = chunk[len(stem) :]
-                    if chunk == b"[DONE]":
-                        continue
-                    tokens_received += 1
-                    data = json.loads(chunk)
-
-                    if "error" in data:
-                        error_msg = data["error"]["message"]
-                        error_response_code = data["error"]["code"]
-                        raise RuntimeError(data["error"]["message"])
-                        
-                    delta = data["choices"][0]["delta"]
-                    if delta.get("content", None):
-                        if not ttft:
-                            ttft = time.monotonic() - start_time
-                            time_to_next_token.append(ttft)
-                        else:
-                            time_to_next_token.append(
-                                time.monotonic() - most_recent_received_token_time
+                parser = SSEParser()
+                # The final newline completes a last line that had no line ending.
+                for chunk in itertools.chain(
+                    response.iter_content(chunk_size=None), [b"\n"]
+                ):
+                    read_time = time.monotonic()
+                    arrival_time = read_time - start_time
+                    for payload in parser.feed(chunk):
+                        if payload == b"[DONE]":
+                            continue
+                        data = loads(payload)
+
+                        if "error" in data:
+                            error_msg = data["error"]["message"]
+                            error_response_code = data["error"]["code"]
+                            raise RuntimeError(data["error"]["message"])
+
+                        if data.get("usage"):
+                            server_output_tokens = data["usage"].get(
+                                "completion_tokens"
                             )
-                        most_recent_received_token_time = time.monotonic()
-                        generated_text += delta["content"]
+                        if not data.get("choices"):
+                            # The usage chunk comes last and has no choices.
+                            continue
+                        tokens_received += 1
+                        content = data["choices"][0]["delta"].get("content")
+                        if content:
+                            token_arrival_times.append(arrival_time)
+                            if not ttft:
+                                ttft = arrival_time
+                            generated_text.append(content)
+                    processing_time += time.monotonic() - read_time
 
             total_request_time = time.monotonic() - start_time
             output_throughput = tokens_received / total_request_time
@@ -107,12 +180,20 @@ class OpenAIChatCompletionsClient(LLMClient):
             print(f"Warning Or Error: {e}")
             print(error_response_code)
 
-        metrics[common_metrics.INTER_TOKEN_LAT] = sum(time_to_next_token) #This should be same as metrics[common_metrics.E2E_LAT]. Leave it here for now
+        metrics[common_metrics.INTER_TOKEN_LAT] = (
+            token_arrival_times[-1] if token_arrival_times else 0
+        )
         metrics[common_metrics.TTFT] = ttft
         metrics[common_metrics.E2E_LAT] = total_request_time
         metrics[common_metrics.REQ_OUTPUT_THROUGHPUT] = output_throughput
         metrics[common_metrics.NUM_TOTAL_TOKENS] = tokens_received + prompt_len
         metrics[common_metrics.NUM_OUTPUT_TOKENS] = tokens_received
         metrics[common_metrics.NUM_INPUT_TOKENS] = prompt_len
+        metrics[common_metrics.TOKEN_ARRIVAL_TIMES] = token_arrival_times
+        metrics[common_metrics.CLIENT_PROCESSING_TIME] = processing_time
+        metrics[common_metrics.CLIENT_CPU_TIME] = time.process_time() - start_cpu_time
+        metrics[common_metrics.SERVER_OUTPUT_TOKENS] = server_output_tokens
+        metrics[common_metrics.CONNECTION_REUSED] = connection_reused
+        metrics[common_metrics.CONNECT_TIME] = connect_time
 
-        return metrics, generated_text, request_config
+        return metrics, "".join(generated_text), request_config
@@ -2,13 +2,14 @@ import io
 import json
 import os
 import time
+from array import array
 from typing import Any, Dict
 
 import boto3
 import ray
 from transformers import LlamaTokenizerFast
 
-from llmperf.ray_llm_client import LLMClient
+from llmperf.ray_llm_client import CLIENT_CONCURRENCY_GROUPS, LLMClient
 from llmperf.models import RequestConfig
 from llmperf import common_metrics
 
@@ -16,7 +17,7 @@ from llmperf import common_metrics
 _TOKENIZER_PATH = os.environ.get("LLMPERF_TOKENIZER_PATH", "hf-internal-testing/llama-tokenizer")
 
 
-@ray.remote
+@ray.remote(concurrency_groups=CLIENT_CONCURRENCY_GROUPS)
 class SageMakerClient(LLMClient):
     """Client for OpenAI Chat Completions API."""
 
@@ -63,7 +64,7 @@ class SageMakerClient(LLMClient):
             },
         }
 
-        time_to_next_token = []
+        token_arrival_times = array("d")
         tokens_received = 0
         ttft = 0
         error_response_code = None
@@ -71,10 +72,12 @@ class SageMakerClient(LLMClient):
         error_msg = ""
         output_throughput = 0
         total_request_time = 0
+        # The time spent handling the stream rather than waiting for it.
+        processing_time = 0.0
         metrics = {}
+        start_cpu_time = time.process_time()
 
         start_time = time.monotonic()
-        most_recent_received_token_time = time.monotonic()
 
         try:
             response = sm_runtime.invoke_endpoint_with_response_stream(
@@ -86,18 +89,18 @@ class SageMakerClient(LLMClient):
 
             event_stream = response["Body"]
             json_byte = b""
-            for line, ttft, _ in LineIterator(event_stream):
+            for line, ttft, read_time in LineIterator(event_stream):
                 json_byte += line
-                time_to_next_token.append(
-                    time.monotonic() - most_recent_received_token_time
-                )
-                most_recent_received_token_time = time.monotonic()
+                token_arrival_times.append(read_time - start_time)
+                processing_time += time.monotonic() - read_time
             ttft = ttft - start_time
+            parse_start_time = time.monotonic()
             resp = json.loads(json_byte)
             total_request_time = time.monotonic() - start_time
             generated_text = resp[0]["generation"]["content"]
             tokens_received = len(self.tokenizer.encode(generated_text))
             output_throughput = tokens_received / total_request_time
+            processing_time += time.monotonic() - parse_start_time
 
         except Exception as e:
             print(f"Warning Or Error: {e}")
@@ -107,13 +110,18 @@ class SageMakerClient(LLMClient):
 
         metrics[common_metrics.ERROR_MSG] = error_msg
         metrics[common_metrics.ERROR_CODE] = error_response_code
-        metrics[common_metrics.INTER_TOKEN_LAT] = time_to_next_token
+        metrics[common_metrics.INTER_TOKEN_LAT] = (
+            token_arrival_times[-1] if token_arrival_times else 0
+        )
         metrics[common_metrics.TTFT] = ttft
         metrics[common_metrics.E2E_LAT] = total_request_time
         metrics[common_metrics.REQ_OUTPUT_THROUGHPUT] = output_throughput
         metrics[common_metrics.NUM_TOTAL_TOKENS] = tokens_received + prompt_len
         metrics[common_metrics.NUM_OUTPUT_TOKENS] = tokens_received
         metrics[common_metrics.NUM_INPUT_TOKENS] = prompt_len
+        metrics[common_metrics.TOKEN_ARRIVAL_TIMES] = token_arrival_times
+        metrics[common_metrics.CLIENT_PROCESSING_TIME] = processing_time
+        metrics[common_metrics.CLIENT_CPU_TIME] = time.process_time() - start_cpu_time
 
         return metrics, generated_text, request_config
 
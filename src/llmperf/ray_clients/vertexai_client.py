@@ -1,13 +1,14 @@
 import json
 import os
 import time
+from array import array
 from typing import Any, Dict
 
 import ray
 import requests
 from transformers import LlamaTokenizerFast
 
-from llmperf.ray_llm_client import LLMClient
+from llmperf.ray_llm_client import CLIENT_CONCURRENCY_GROUPS, LLMClient
 from llmperf.models import RequestConfig
 from llmperf import common_metrics
 
@@ -15,7 +16,7 @@ from llmperf import common_metrics
 _TOKENIZER_PATH = os.environ.get("LLMPERF_TOKENIZER_PATH", "hf-internal-testing/llama-tokenizer")
 
 
-@ray.remote
+@ray.remote(concurrency_groups=CLIENT_CONCURRENCY_GROUPS)
 class VertexAIClient(LLMClient):
     """Client for VertexAI API."""
 
@@ -44,14 +45,17 @@ class VertexAIClient(LLMClient):
         prompt = request_config.prompt
         prompt, prompt_len = prompt
 
-        time_to_next_token = []
+        token_arrival_times = array("d")
         tokens_received = 0
         ttft = 0
         generated_text = ""
         output_throughput = 0
         total_request_time = 0
+        # The time spent handling the response rather than waiting for it.
+        processing_time = 0.0
 
         metrics = {}
+        start_cpu_time = time.process_time()
 
         metrics[common_metrics.ERROR_CODE] = None
         metrics[common_metrics.ERROR_MSG] = ""
@@ -82,17 +86,18 @@ class VertexAIClient(LLMClient):
             start_time = time.monotonic()
             response = requests.post(url, headers=headers, data=json.dumps(data))
             total_request_time = time.monotonic() - start_time
+            parse_start_time = time.monotonic()
             response_code = response.status_code
             response.raise_for_status()
             # output from the endpoint is in the form:
             # {"predictions": ["Input: ... \nOutput:\n ..."]}
             generated_text = response.json()["predictions"][0].split("\nOutput:\n")[1]
             tokens_received = len(self.tokenizer.encode(generated_text))
+            processing_time = time.monotonic() - parse_start_time
             ttft = -1
             output_throughput = tokens_received / total_request_time
-            time_to_next_token = [
-                total_request_time / tokens_received for _ in range(tokens_received)
-            ]
+            # The endpoint doesn't stream, so all tokens arrive with the response.
+            token_arrival_times.append(total_request_time)
 
         except Exception as e:
             metrics[common_metrics.ERROR_MSG] = str(e)
@@ -101,13 +106,18 @@ class VertexAIClient(LLMClient):
             print(response_code)
             print(response_code)
 
-        metrics[common_metrics.INTER_TOKEN_LAT] = time_to_next_token
+        metrics[common_metrics.INTER_TOKEN_LAT] = (
+            token_arrival_times[-1] if token_arrival_times else 0
+        )
         metrics[common_metrics.TTFT] = ttft
         metrics[common_metrics.E2E_LAT] = total_request_time
         metrics[common_metrics.REQ_OUTPUT_THROUGHPUT] = output_throughput
         metrics[common_metrics.NUM_TOTAL_TOKENS] = tokens_received + prompt_len
         metrics[common_metrics.NUM_OUTPUT_TOKENS] = tokens_received
         metrics[common_metrics.NUM_INPUT_TOKENS] = prompt_len
+        metrics[common_metrics.TOKEN_ARRIVAL_TIMES] = token_arrival_times
+        metrics[common_metrics.CLIENT_PROCESSING_TIME] = processing_time
+        metrics[common_metrics.CLIENT_CPU_TIME] = time.process_time() - start_cpu_time
 
         return metrics, generated_text, request_config
 
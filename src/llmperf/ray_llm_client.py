@@ -1,8 +1,18 @@
 import abc
+import time
 from typing import Any, Dict, Tuple
 
+import ray
+
 from llmperf.models import RequestConfig
 
+# The concurrency group of the methods that answer while a request is in flight.
+MONITOR_CONCURRENCY_GROUP = "monitor"
+
+# The concurrency groups every client actor is declared with. Requests still run one
+# at a time in the default group.
+CLIENT_CONCURRENCY_GROUPS = {MONITOR_CONCURRENCY_GROUP: 1}
+
 
 class LLMClient:
     """A client for making requests to a LLM API e.g Anyscale Endpoints."""
@@ -20,3 +30,15 @@ class LLMClient:
 
         """
         ...
+
+    def ready(self) -> bool:
+        """Return once the client has been constructed. Used to start clients ahead of a run."""
+        return True
+
+    @ray.method(concurrency_group=MONITOR_CONCURRENCY_GROUP)
+    def cpu_time(self) -> float:
+        """Return the CPU time the client's process has used so far, in seconds.
+
+        Runs in its own concurrency group, so it answers while a request is in flight.
+        """
+        return time.process_time()
@@ -0,0 +1,195 @@
+"""Search for the highest load a deployment serves within its latency SLOs."""
+
+import math
+import operator
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+from llmperf import common_metrics
+
+SEARCH_MODES = ["bisect", "step"]
+
+# Shorthands accepted for the metric of an SLO.
+SLO_METRIC_ALIASES = {
+    "ttft": common_metrics.TTFT,
+    "itl": common_metrics.INTER_TOKEN_LAT,
+    "e2e": common_metrics.E2E_LAT,
+}
+
+_SLO_PATTERN = re.compile(
+    r"^\s*(?P<metric>[\w.]+?)(?::(?P<statistic>\w+))?\s*(?P<op><=|<)\s*"
+    r"(?P<threshold>[-+.\deE]+)\s*$"
+)
+_OPERATORS = {"<": operator.lt, "<=": operator.le}
+
+
+class SLO:
+    """An upper bound on a statistic of a run summary, such as TTFT p99 < 2s."""
+
+    def __init__(
+        self, metric: str, statistic: Optional[str], op: str, threshold: float
+    ):
+        """
+        Args:
+            metric: The summary key of the metric, e.g. "ttft_s" or "error_rate".
+            statistic: The statistic of a distribution metric, e.g. "p99" or "mean".
+                None for scalar metrics.
+            op: Either "<" or "<=".
+            threshold: The bound the statistic must stay under.
+        """
+        self.metric = metric
+        self.statistic = statistic
+        self.op = op
+        self.threshold = threshold
+
+    def value(self, results: Dict[str, Any]) -> float:
+        """Look up the statistic in the results of a run, NaN if it is missing."""
+        value = results.get(self.metric)
+        if self.statistic is not None:
+            if not isinstance(value, dict):
+                return math.nan
+            value = value.get("quantiles", {}).get(
+                self.statistic, value.get(self.statistic)
+            )
+        if value is None:
+            return math.nan
+        return float(value)
+
+    def is_met(self, results: Dict[str, Any]) -> bool:
+        # NaN, e.g. when every request errored, never meets an SLO.
+        return _OPERATORS[self.op](self.value(results), self.threshold)
+
+    def __str__(self) -> str:
+        statistic = f":{self.statistic}" if self.statistic else ""
+        return f"{self.metric}{statistic}{self.op}{self.threshold}"
+
+
+def parse_slo(spec: str) -> SLO:
+    """Parse an SLO written as <metric>[:<statistic>]<threshold.
+
+    The metric is a summary key, or one of the shorthands "ttft", "itl" and "e2e".
+    The statistic is a reported quantile such as "p95", or "mean", "min", "max" or
+    "stddev". Latencies are in seconds, e.g. "ttft:p99<2" or "itl:p95<0.05". Scalar
+    metrics take no statistic, e.g. "error_rate<=0.01".
+
+    Raises:
+        ValueError: If the spec can't be parsed.
+    """
+    match = _SLO_PATTERN.match(spec)
+    if not match:
+        raise ValueError(
+            f"invalid SLO {spec!r}, expected <metric>[:<statistic>]<threshold, "
+            "e.g. ttft:p99<2"
+        )
+    metric = SLO_METRIC_ALIASES.get(match["metric"], match["metric"])
+    try:
+        threshold = float(match["threshold"])
+    except ValueError:
+        raise ValueError(f"invalid threshold in SLO {spec!r}") from None
+    return SLO(metric, match["statistic"], match["op"], threshold)
+
+
+def search_saturation(
+    probe: Callable[[float], Dict[str, Any]],
+    slos: List[SLO],
+    min_load: float,
+    max_load: float,
+    mode: str = "bisect",
+    step: Optional[float] = None,
+    tolerance: float = 0.1,
+    granularity: float = 0,
+) -> Dict[str, Any]:
+    """Find the highest load at which a run meets every SLO.
+
+    In "bisect" mode the load starts at min_load and doubles until a probe misses an
+    SLO or max_load is reached, then the bracket between the last load that met the
+    SLOs and the first that missed is bisected. The search stops once the bracket is
+    narrower than tolerance times its lower end, or than granularity. In "step" mode
+    the load grows by step from min_load and the search stops at the first miss.
+
+    Args:
+        probe: Runs a test at the given load and returns its results.
+        slos: The SLOs every probe is checked against.
+        min_load: The lowest load to probe.
+        max_load: The highest load to probe.
+        mode: One of SEARCH_MODES.
+        step: The load increment in "step" mode.
+        tolerance: The relative width of the bracket at which bisection stops.
+        granularity: The smallest load increment, e.g. 1 for concurrency. Loads are
+            rounded down to a multiple of it.
+
+    Returns:
+        The highest load that met every SLO, None if even min_load missed one, and
+        the load, results and SLO outcomes of every probe in the order they ran.
+    """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"mode must be one of {SEARCH_MODES}, got {mode}")
+    if not slos:
+        raise ValueError("at least one SLO is required")
+    if not 0 < min_load <= max_load:
+        raise ValueError(
+            f"expected 0 < min_load <= max_load, got {min_load} and {max_load}"
+        )
+    if mode == "step" and not (step and step > 0):
+        raise ValueError("step mode requires a positive step")
+
+    def quantize(load: float) -> float:
+        if granularity:
+            load = max(math.floor(load / granularity) * granularity, granularity)
+            return int(load) if float(granularity).is_integer() else load
+        return load
+
+    probes = []
+
+    def run_probe(load: float) -> bool:
+        print(f"Probing load {load}.")
+        results = probe(load)
+        values = {str(slo): slo.value(results) for slo in slos}
+        met = all(slo.is_met(results) for slo in slos)
+        missed = [str(slo) for slo in slos if not slo.is_met(results)]
+        print(f"Load {load}: " + ("met every SLO" if met else f"missed {missed}"))
+        probes.append(
+            {
+                "load": load,
+                "slos_met": met,
+                "slo_values": values,
+                common_metrics.OUTPUT_THROUGHPUT: results.get(
+                    common_metrics.OUTPUT_THROUGHPUT
+                ),
+                common_metrics.ERROR_RATE: results.get(common_metrics.ERROR_RATE),
+            }
+        )
+        return met
+
+    highest_met = None
+    lowest_missed = None
+    load = quantize(min_load)
+    max_load = quantize(max_load)
+    while True:
+        if run_probe(load):
+            highest_met = load
+        else:
+            lowest_missed = load
+            break
+        if load >= max_load:
+            break
+        load = quantize(min(load + step if mode == "step" else load * 2, max_load))
+        if load <= highest_met:
+            break
+
+    if mode == "bisect" and highest_met is not None and lowest_missed is not None:
+        while lowest_missed - highest_met > max(tolerance * highest_met, granularity):
+            load = quantize((highest_met + lowest_missed) / 2)
+            if load <= highest_met:
+                break
+            if run_probe(load):
+                highest_met = load
+            else:
+                lowest_missed = load
+
+    return {
+        "slos": [str(slo) for slo in slos],
+        "max_load_meeting_slos": highest_met,
+        "min_load_missing_slos": lowest_missed,
+        "probes": probes,
+    }
@@ -0,0 +1,286 @@
+"""Mergeable streaming summaries of request metrics.
+
+QuantileSketch is a log-bucketed histogram in the style of DDSketch: values are
+counted in buckets whose bounds grow geometrically, so any quantile can be estimated
+within a fixed relative error using memory logarithmic in the range of the values,
+regardless of how many values were added. Two sketches with the same accuracy merge by
+adding their bucket counts, so sketches filled by different workers or nodes can be
+combined into one.
+"""
+
+import math
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from llmperf import common_metrics
+from llmperf.goodput import GoodputCounter
+
+# Magnitudes below this are counted as zero.
+_MIN_INDEXABLE_VALUE = 1e-9
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+
+class QuantileSketch:
+    """A quantile sketch with a bounded relative error.
+
+    For any quantile q, quantile(q) is within relative_accuracy of the value the
+    exact computation, linear interpolation between the two closest ranks as pandas
+    does, returns for the same values. Count, mean, min, max and stddev are exact.
+    """
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        """
+        Args:
+            relative_accuracy: The relative error bound of the quantiles, in (0, 1).
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(
+                f"relative_accuracy must be in (0, 1), got {relative_accuracy}"
+            )
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._positive: Counter = Counter()
+        self._negative: Counter = Counter()
+        self._zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float) -> None:
+        """Add a value. NaN is ignored."""
+        if value is None or math.isnan(value):
+            return
+        if value > _MIN_INDEXABLE_VALUE:
+            self._positive[math.ceil(math.log(value) / self._log_gamma)] += 1
+        elif value < -_MIN_INDEXABLE_VALUE:
+            self._negative[math.ceil(math.log(-value) / self._log_gamma)] += 1
+        else:
+            self._zero_count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        # Welford's online update of the mean and sum of squared deviations.
+        self.count += 1
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+
+    def add_many(self, values: np.ndarray) -> None:
+        """Add an array of values at once. NaNs are ignored."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        for store, magnitudes in [
+            (self._positive, values[values > _MIN_INDEXABLE_VALUE]),
+            (self._negative, -values[values < -_MIN_INDEXABLE_VALUE]),
+        ]:
+            if len(magnitudes):
+                keys, counts = np.unique(
+                    np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64),
+                    return_counts=True,
+                )
+                store.update(dict(zip(keys.tolist(), counts.tolist())))
+        self._zero_count += int(np.sum(np.abs(values) <= _MIN_INDEXABLE_VALUE))
+        self._merge_moments(
+            len(values),
+            float(values.mean()),
+            float(((values - values.mean()) ** 2).sum()),
+        )
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Add the values of another sketch with the same relative accuracy."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError(
+                "can only merge sketches with the same relative accuracy, got "
+                f"{self.relative_accuracy} and {other.relative_accuracy}"
+            )
+        self._positive.update(other._positive)
+        self._negative.update(other._negative)
+        self._zero_count += other._zero_count
+        self._merge_moments(other.count, other._mean, other._m2)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def _merge_moments(self, count: int, mean: float, m2: float) -> None:
+        # Chan et al.'s parallel combination of means and squared deviations.
+        if not count:
+            return
+        total = self.count + count
+        delta = mean - self._mean
+        self._m2 += m2 + delta * delta * self.count * count / total
+        self._mean += delta * count / total
+        self.count = total
+
+    @property
+    def mean(self) -> float:
+        return self._mean if self.count else math.nan
+
+    @property
+    def stddev(self) -> float:
+        """The sample standard deviation, like pandas' Series.std()."""
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else math.nan
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-th quantile, for q in [0, 1]."""
+        if not self.count:
+            return math.nan
+        rank = q * (self.count - 1)
+        lower = self._value_at_rank(math.floor(rank))
+        if rank == math.floor(rank):
+            return lower
+        upper = self._value_at_rank(math.ceil(rank))
+        return lower + (upper - lower) * (rank - math.floor(rank))
+
+    def quantiles(self, qs: Iterable[float]) -> Dict[float, float]:
+        return {q: self.quantile(q) for q in qs}
+
+    def _value_at_rank(self, rank: int) -> float:
+        seen = 0
+        for key in sorted(self._negative, reverse=True):
+            seen += self._negative[key]
+            if seen > rank:
+                return self._clamp(-self._bucket_value(key))
+        seen += self._zero_count
+        if seen > rank:
+            return self._clamp(0.0)
+        for key in sorted(self._positive):
+            seen += self._positive[key]
+            if seen > rank:
+                return self._clamp(self._bucket_value(key))
+        return self.max
+
+    def _bucket_value(self, key: int) -> float:
+        # The point of (gamma^(key-1), gamma^key] with the lowest worst-case
+        # relative error to the values in the bucket.
+        return 2 * self._gamma**key / (self._gamma + 1)
+
+    def _clamp(self, value: float) -> float:
+        return min(max(value, self.min), self.max)
+
+
+class StreamingSummary:
+    """Running aggregates of request metrics, updated as each result arrives.
+
+    Holds a QuantileSketch per distribution metric and counters for everything else
+    metrics_summary reports, so memory does not grow with the number of requests.
+    Summaries of the same run filled by different workers merge with merge().
+    """
+
+    def __init__(
+        self,
+        keys: List[str],
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+        request_slos: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Args:
+            keys: The metrics to keep a quantile sketch of. Metrics missing from every
+                result are left out of the summary.
+            relative_accuracy: The relative error bound of the quantiles.
+            request_slos: If set, also count the goodput of the requests against
+                these per-request SLOs.
+        """
+        self.relative_accuracy = relative_accuracy
+        self._keys = keys
+        self.sketches: Dict[str, QuantileSketch] = {
+            key: QuantileSketch(relative_accuracy)
+            for key in keys
+            + [
+                common_metrics.ITL_P50,
+                common_metrics.ITL_P99,
+                common_metrics.POOLED_ITL,
+            ]
+        }
+        self.num_started = 0
+        self.error_codes: Counter = Counter()
+        self.num_connection_reused = 0
+        self.num_connection_reported = 0
+        # Sums over the requests that didn't error, for the throughput and client
+        # overhead metrics.
+        self.totals: Counter = Counter()
+        self.goodput = GoodputCounter(request_slos) if request_slos else None
+        # The summary of the requests to each endpoint, when requests are routed.
+        self.endpoints: Dict[str, "StreamingSummary"] = {}
+
+    def _endpoint_summary(self, endpoint: str) -> "StreamingSummary":
+        if endpoint not in self.endpoints:
+            self.endpoints[endpoint] = StreamingSummary(
+                self._keys, self.relative_accuracy
+            )
+        return self.endpoints[endpoint]
+
+    def add(self, request_metrics: Dict[str, Any]) -> None:
+        """Add the final metrics of a finished request."""
+        endpoint = request_metrics.get(common_metrics.ENDPOINT)
+        if endpoint is not None:
+            self._endpoint_summary(endpoint)._add(request_metrics)
+        self._add(request_metrics)
+
+    def _add(self, request_metrics: Dict[str, Any]) -> None:
+        self.num_started += 1
+        reused = request_metrics.get(common_metrics.CONNECTION_REUSED)
+        if reused is not None:
+            self.num_connection_reused += bool(reused)
+            self.num_connection_reported += 1
+        if self.goodput is not None:
+            self.goodput.add(request_metrics)
+        error_code = request_metrics.get(common_metrics.ERROR_CODE)
+        if error_code is not None:
+            self.error_codes[error_code] += 1
+            return
+
+        for key, sketch in self.sketches.items():
+            value = request_metrics.get(key)
+            if value is not None:
+                sketch.add(value)
+        for key in [
+            common_metrics.NUM_OUTPUT_TOKENS,
+            common_metrics.E2E_LAT,
+            common_metrics.CLIENT_PROCESSING_TIME,
+            common_metrics.CLIENT_CPU_TIME,
+        ]:
+            if request_metrics.get(key) is not None:
+                self.totals[key] += request_metrics[key]
+        self.totals["num_completed"] += 1
+
+        arrivals = request_metrics.get(common_metrics.TOKEN_ARRIVAL_TIMES)
+        if arrivals is not None and len(arrivals) > 1:
+            gaps = np.diff(np.asarray(arrivals, dtype=np.float64))
+            p50, p99 = np.quantile(gaps, [0.5, 0.99])
+            self.sketches[common_metrics.ITL_P50].add(float(p50))
+            self.sketches[common_metrics.ITL_P99].add(float(p99))
+            self.sketches[common_metrics.POOLED_ITL].add_many(gaps)
+
+    def merge(self, other: "StreamingSummary") -> None:
+        """Add the results aggregated by another summary."""
+        for key, sketch in other.sketches.items():
+            if key in self.sketches:
+                self.sketches[key].merge(sketch)
+            else:
+                self.sketches[key] = sketch
+        self.num_started += other.num_started
+        self.error_codes.update(other.error_codes)
+        self.num_connection_reused += other.num_connection_reused
+        self.num_connection_reported += other.num_connection_reported
+        self.totals.update(other.totals)
+        if self.goodput is not None and other.goodput is not None:
+            self.goodput.merge(other.goodput)
+        for endpoint, endpoint_summary in other.endpoints.items():
+            self._endpoint_summary(endpoint).merge(endpoint_summary)
+
+    @property
+    def num_completed(self) -> int:
+        return self.totals["num_completed"]
+
+    def connection_reuse_rate(self) -> Optional[float]:
+        if not self.num_connection_reported:
+            return None
+        return self.num_connection_reused / self.num_connection_reported
@@ -0,0 +1,46 @@
+"""Incremental parsing of server-sent event streams."""
+
+import json
+from typing import Any, Callable, List
+
+try:
+    import orjson
+
+    loads: Callable[[bytes], Any] = orjson.loads
+except ImportError:
+    loads = json.loads
+
+
+class SSEParser:
+    """Split the raw bytes of an event stream into the payloads of its data lines.
+
+    Bytes can be fed as they come off the socket, in chunks of any size. Each data
+    line is returned as soon as its line ending arrives. OpenAI compatible servers send
+    one JSON object per data line, so data lines are not joined into multi-line events.
+    Comments and other fields are skipped. Feed b"\n" once the stream ends to complete
+    a last line that had no line ending.
+    """
+
+    def __init__(self):
+        self._buffer = b""
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        """Parse the next chunk of the stream.
+
+        Args:
+            chunk: The bytes read from the stream.
+
+        Returns:
+            The payloads of the data lines completed by this chunk, without the
+            "data:" prefix.
+        """
+        lines = (self._buffer + chunk if self._buffer else chunk).split(b"\n")
+        self._buffer = lines.pop()
+        payloads = []
+        for line in lines:
+            if not line.startswith(b"data:"):
+                continue
+            if line.endswith(b"\r"):
+                line = line[:-1]
+            payloads.append(line[6:] if line[5:6] == b" " else line[5:])
+        return payloads
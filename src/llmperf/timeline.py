@@ -0,0 +1,343 @@
+"""Per-second time series of a run and detection of its steady-state window.
+
+Whole-run throughput divides by the full duration of the run, which includes the
+ramp-up before the first requests complete and the tail while the last ones drain.
+The timeline shows how load and latency evolved second by second, and the steady
+state window is the part of the run where the target load was sustained.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from llmperf import common_metrics
+from llmperf.sketches import QuantileSketch
+
+TIMELINE_BUCKET_S = 1.0
+
+# Rolling quantiles are computed over the requests and tokens of this many seconds.
+ROLLING_WINDOW_S = 10.0
+
+# A second belongs to the steady state while at least this share of the typical
+# number of requests is in flight.
+STEADY_STATE_LOAD_FRACTION = 0.9
+
+# Windows shorter than this many buckets are not reported as a steady state.
+MIN_STEADY_STATE_BUCKETS = 3
+
+# The per-request metrics the steady state detection and summary use.
+REQUEST_KEYS = [
+    common_metrics.REQUEST_START_TIME,
+    common_metrics.REQUEST_END_TIME,
+    common_metrics.ERROR_CODE,
+    common_metrics.NUM_OUTPUT_TOKENS,
+    common_metrics.TTFT,
+    common_metrics.INTER_TOKEN_LAT,
+    common_metrics.E2E_LAT,
+]
+
+# The request metrics the timeline and steady state summary use.
+TIMELINE_KEYS = REQUEST_KEYS + [common_metrics.TOKEN_ARRIVAL_TIMES]
+
+
+def _request_times(metrics: List[Dict[str, Any]]) -> pd.DataFrame:
+    df = pd.DataFrame(metrics)
+    if df.empty or common_metrics.REQUEST_START_TIME not in df.columns:
+        return pd.DataFrame()
+    df = df[df[common_metrics.REQUEST_START_TIME].notna()]
+    return df.reset_index(drop=True)
+
+
+def _in_flight_integral(
+    starts: np.ndarray, ends: np.ndarray, times: np.ndarray
+) -> np.ndarray:
+    """The total time requests spent in flight up to each of times."""
+    starts = np.sort(starts)
+    ends = np.sort(ends)
+    start_prefix = np.concatenate([[0.0], np.cumsum(starts)])
+    end_prefix = np.concatenate([[0.0], np.cumsum(ends)])
+    num_started = np.searchsorted(starts, times)
+    num_ended = np.searchsorted(ends, times)
+    return (num_started * times - start_prefix[num_started]) - (
+        num_ended * times - end_prefix[num_ended]
+    )
+
+
+def _rolling_quantiles(
+    times: np.ndarray,
+    values: np.ndarray,
+    bucket_ends: np.ndarray,
+    window_s: float,
+    quantiles: List[float],
+) -> np.ndarray:
+    """Quantiles of the values whose time is within window_s before each bucket end."""
+    order = np.argsort(times)
+    times, values = times[order], values[order]
+    lower = np.searchsorted(times, bucket_ends - window_s, side="right")
+    upper = np.searchsorted(times, bucket_ends, side="right")
+    ret = np.full((len(bucket_ends), len(quantiles)), np.nan)
+    for i, (lo, hi) in enumerate(zip(lower, upper)):
+        if hi > lo:
+            ret[i] = np.quantile(values[lo:hi], quantiles)
+    return ret
+
+
+class TimelineBuilder:
+    """Build the timeline of a run from its requests, one request at a time.
+
+    The token arrivals of each request are counted into per-bucket totals and
+    sketches of the gaps between tokens as the request is added, and only the values
+    in REQUEST_KEYS are kept. Memory therefore grows with the number of requests and
+    buckets rather than with the number of tokens, so runs streamed to a JSON lines
+    file can be read back one record at a time.
+    """
+
+    def __init__(
+        self,
+        bucket_s: float = TIMELINE_BUCKET_S,
+        window_s: float = ROLLING_WINDOW_S,
+    ):
+        """
+        Args:
+            bucket_s: The length of each bucket.
+            window_s: The length of the trailing window of the rolling quantiles.
+        """
+        self.bucket_s = bucket_s
+        self.window_s = window_s
+        # The requests added, without their token arrival times.
+        self.requests: List[Dict[str, Any]] = []
+        self._tokens = np.zeros(0)
+        self._gaps: Dict[int, QuantileSketch] = {}
+
+    def add(self, request_metrics: Dict[str, Any]) -> None:
+        """Add the metrics of a request, timed relative to the start of the run."""
+        if request_metrics.get(common_metrics.REQUEST_START_TIME) is None:
+            return
+        self.requests.append(
+            {
+                key: request_metrics[key]
+                for key in REQUEST_KEYS
+                if key in request_metrics
+            }
+        )
+        arrivals = request_metrics.get(common_metrics.TOKEN_ARRIVAL_TIMES)
+        if (
+            request_metrics.get(common_metrics.ERROR_CODE) is not None
+            or arrivals is None
+            or not len(arrivals)
+        ):
+            return
+        arrivals = np.asarray(arrivals, dtype=np.float64)
+        buckets = np.floor(
+            (request_metrics[common_metrics.REQUEST_START_TIME] + arrivals)
+            / self.bucket_s
+        ).astype(np.int64)
+        # Weights scale the arrivals to the request's number of output tokens, so
+        # tokens per second agree with the output throughput when a chunk holds
+        # several tokens.
+        weight = request_metrics[common_metrics.NUM_OUTPUT_TOKENS] / len(arrivals)
+        tokens = np.bincount(buckets) * weight
+        if len(tokens) > len(self._tokens):
+            self._tokens = np.pad(self._tokens, (0, len(tokens) - len(self._tokens)))
+        self._tokens[: len(tokens)] += tokens
+
+        # The gap before each token is counted in the bucket the token arrived in.
+        gaps, gap_buckets = np.diff(arrivals), buckets[1:]
+        for bucket in np.unique(gap_buckets):
+            self._gaps.setdefault(int(bucket), QuantileSketch()).add_many(
+                gaps[gap_buckets == bucket]
+            )
+
+    def build(self) -> pd.DataFrame:
+        """Bucket the requests added into a per-second time series.
+
+        Returns:
+            One row per bucket with the time its bucket starts, the mean number of
+            requests in flight, the output tokens received per second, the number of
+            requests completed and errored, and the rolling p50 and p99 of the TTFT
+            of requests whose first token arrived in the window and of the gaps
+            between tokens received in the window. The gap quantiles are estimated
+            to within the relative accuracy of a QuantileSketch.
+        """
+        bucket_s = self.bucket_s
+        df = _request_times(self.requests)
+        if df.empty:
+            return pd.DataFrame()
+        starts = df[common_metrics.REQUEST_START_TIME].to_numpy(dtype=np.float64)
+        ends = df[common_metrics.REQUEST_END_TIME].to_numpy(dtype=np.float64)
+        num_buckets = max(int(np.ceil(ends.max() / bucket_s)), 1)
+        edges = np.arange(num_buckets + 1) * bucket_s
+        errored = df[common_metrics.ERROR_CODE].notna().to_numpy()
+        completed = df[~errored]
+
+        in_flight = np.diff(_in_flight_integral(starts, ends, edges)) / bucket_s
+        tokens = np.zeros(num_buckets)
+        tokens[: min(len(self._tokens), num_buckets)] = self._tokens[:num_buckets]
+        # A token arriving exactly at the end of the run belongs to the last bucket.
+        tokens[-1] += self._tokens[num_buckets:].sum()
+        num_completed, _ = np.histogram(ends[~errored], bins=edges)
+        num_errored, _ = np.histogram(ends[errored], bins=edges)
+
+        has_first_token = completed[common_metrics.TTFT] > 0
+        first_token_times = (
+            completed[common_metrics.REQUEST_START_TIME]
+            + completed[common_metrics.TTFT]
+        )[has_first_token].to_numpy(dtype=np.float64)
+        ttft = _rolling_quantiles(
+            first_token_times,
+            completed[common_metrics.TTFT][has_first_token].to_numpy(dtype=np.float64),
+            edges[1:],
+            self.window_s,
+            [0.5, 0.99],
+        )
+        itl = np.full((num_buckets, 2), np.nan)
+        window_buckets = max(int(round(self.window_s / bucket_s)), 1)
+        for i in range(num_buckets):
+            window = QuantileSketch()
+            for bucket in range(i - window_buckets + 1, i + 1):
+                if bucket in self._gaps:
+                    window.merge(self._gaps[bucket])
+            if i == num_buckets - 1:
+                for bucket, sketch in self._gaps.items():
+                    if bucket >= num_buckets:
+                        window.merge(sketch)
+            if window.count:
+                itl[i] = window.quantile(0.5), window.quantile(0.99)
+
+        return pd.DataFrame(
+            {
+                "time_s": edges[:-1],
+                "in_flight": in_flight,
+                "tokens_per_s": tokens / bucket_s,
+                "completed_requests": num_completed,
+                "errored_requests": num_errored,
+                "ttft_p50_s": ttft[:, 0],
+                "ttft_p99_s": ttft[:, 1],
+                "itl_p50_s": itl[:, 0],
+                "itl_p99_s": itl[:, 1],
+            }
+        )
+
+
+def build_timeline(
+    metrics: Iterable[Dict[str, Any]],
+    bucket_s: float = TIMELINE_BUCKET_S,
+    window_s: float = ROLLING_WINDOW_S,
+) -> pd.DataFrame:
+    """Bucket the requests of a run into a per-second time series.
+
+    Args:
+        metrics: The metrics of every request of the run, with their start and end
+            times relative to the start of the run. Read one at a time, so they can
+            be streamed from a file.
+        bucket_s: The length of each bucket.
+        window_s: The length of the trailing window of the rolling quantiles.
+
+    Returns:
+        The timeline, as described in TimelineBuilder.build.
+    """
+    builder = TimelineBuilder(bucket_s, window_s)
+    for request_metrics in metrics:
+        builder.add(request_metrics)
+    return builder.build()
+
+
+def detect_steady_state(
+    timeline: pd.DataFrame,
+    metrics: List[Dict[str, Any]],
+    bucket_s: float = TIMELINE_BUCKET_S,
+) -> Optional[Tuple[float, float]]:
+    """Find the window of a run in which the load was sustained.
+
+    The typical load is the median number of requests in flight over the buckets with
+    any request in flight. The window starts once the load first reaches
+    STEADY_STATE_LOAD_FRACTION of it and the first request has completed, which skips
+    the ramp-up where clients only wait on their first responses. It ends with the
+    last bucket at that load, before the tail where the last requests drain.
+
+    Args:
+        timeline: The timeline of the run, from build_timeline.
+        metrics: The metrics of every request of the run.
+        bucket_s: The bucket length the timeline was built with.
+
+    Returns:
+        The start and end of the window relative to the start of the run, or None if
+        the run has no window of at least MIN_STEADY_STATE_BUCKETS buckets.
+    """
+    if timeline.empty:
+        return None
+    in_flight = timeline["in_flight"].to_numpy()
+    busy = in_flight[in_flight > 0]
+    if not len(busy):
+        return None
+    loaded = np.flatnonzero(in_flight >= STEADY_STATE_LOAD_FRACTION * np.median(busy))
+
+    df = _request_times(metrics)
+    ends = df[df[common_metrics.ERROR_CODE].isna()][common_metrics.REQUEST_END_TIME]
+    if ends.empty:
+        return None
+    first_completion_bucket = int(np.ceil(ends.min() / bucket_s))
+    start_bucket = max(loaded[0], first_completion_bucket)
+    end_bucket = loaded[-1] + 1
+    if end_bucket - start_bucket < MIN_STEADY_STATE_BUCKETS:
+        return None
+    return start_bucket * bucket_s, end_bucket * bucket_s
+
+
+def steady_state_summary(
+    timeline: pd.DataFrame,
+    metrics: List[Dict[str, Any]],
+    window: Tuple[float, float],
+) -> Dict[str, Any]:
+    """Summarize the throughput and latencies of a run within its steady state window.
+
+    Throughput counts the tokens and completions inside the window. Latencies are
+    taken over the requests that both started and finished inside it.
+
+    Args:
+        timeline: The timeline of the run, from build_timeline.
+        metrics: The metrics of every request of the run.
+        window: The start and end of the window, from detect_steady_state.
+
+    Returns:
+        The window, its throughput and the distribution of its latencies.
+    """
+    window_start, window_end = window
+    duration = window_end - window_start
+    in_window = timeline[
+        (timeline["time_s"] >= window_start) & (timeline["time_s"] < window_end)
+    ]
+    ret = {
+        common_metrics.STEADY_STATE_START: window_start,
+        common_metrics.STEADY_STATE_END: window_end,
+        common_metrics.OUTPUT_THROUGHPUT: in_window["tokens_per_s"].mean(),
+        common_metrics.NUM_COMPLETED_REQUESTS: int(
+            in_window["completed_requests"].sum()
+        ),
+    }
+    ret[common_metrics.COMPLETED_REQUESTS_PER_MIN] = (
+        ret[common_metrics.NUM_COMPLETED_REQUESTS] / duration * 60
+    )
+
+    df = _request_times(metrics)
+    df = df[
+        df[common_metrics.ERROR_CODE].isna()
+        & (df[common_metrics.REQUEST_START_TIME] >= window_start)
+        & (df[common_metrics.REQUEST_END_TIME] <= window_end)
+    ]
+    for key in [
+        common_metrics.TTFT,
+        common_metrics.INTER_TOKEN_LAT,
+        common_metrics.E2E_LAT,
+    ]:
+        series = df[key].dropna() if key in df.columns else pd.Series(dtype=float)
+        quantiles = series.quantile([0.5, 0.9, 0.99])
+        ret[key] = {
+            "quantiles": {
+                f"p{int(quantile * 100)}": value
+                for quantile, value in quantiles.items()
+            },
+            "mean": series.mean(),
+        }
+    return ret
@@ -0,0 +1,179 @@
+"""Replay of recorded request traces.
+
+A trace is a JSON lines file with one request per line, in order of arrival:
+
+    {"offset_s": 0.0, "input_tokens": 512, "output_tokens": 128}
+    {"offset_s": 0.35, "prompt": "Summarize ...", "sampling_params": {"temperature": 0}}
+
+offset_s is the arrival time of the request, in seconds from any fixed origin. Each
+request either gives its prompt or the number of tokens in it, in which case a sonnet
+prompt of that length is generated. output_tokens sets max_tokens unless the
+sampling_params already do. The trace is read line by line as it is replayed, so it
+can be far larger than memory.
+"""
+
+import queue
+import random
+import threading
+from typing import Any, Dict, Generic, Iterable, Iterator, Optional, Tuple, TypeVar
+
+from llmperf.corpus import get_sonnet_corpus
+from llmperf.sse import loads
+from llmperf.utils import get_tokenizer, sonnet_base_prompt
+
+# The requests read and prepared ahead of the one being sent.
+PREFETCH_SIZE = 1024
+
+TraceRequest = Tuple[float, Tuple[str, int], Dict[str, Any]]
+
+T = TypeVar("T")
+
+
+def read_trace(
+    path: str,
+    speedup: float = 1.0,
+    tokenizer=None,
+    seed: int = 0,
+) -> Iterator[TraceRequest]:
+    """Read the requests of a trace, in order.
+
+    Args:
+        path: The trace file.
+        speedup: The factor to divide the gaps between arrivals by. 2 replays the
+            trace in half the time.
+        tokenizer: The tokenizer to count and generate prompts with. Defaults to the
+            benchmark's tokenizer.
+        seed: The seed of the generated prompts.
+
+    Returns:
+        An iterator over the send offset in seconds from the start of the replay,
+        with the first request at 0, the prompt, as a (prompt, prompt length) tuple,
+        and the sampling params of each request.
+    """
+    if speedup <= 0:
+        raise ValueError(f"speedup must be positive, got {speedup}")
+    # Loaded now rather than when the first request is read, which may be after the
+    # replay started.
+    tokenizer = tokenizer or get_tokenizer()
+    corpus = get_sonnet_corpus(tokenizer)
+    return _read_trace(path, speedup, tokenizer, corpus, random.Random(seed))
+
+
+def _read_trace(
+    path: str, speedup: float, tokenizer, corpus, rng: random.Random
+) -> Iterator[TraceRequest]:
+    base_prompt_tokens: Dict[Optional[int], int] = {}
+    origin = None
+    previous_offset = None
+    with open(path, "rb") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = loads(line)
+            if "offset_s" not in record:
+                raise ValueError(f"{path}:{line_number}: missing offset_s")
+            offset = float(record["offset_s"])
+            if previous_offset is not None and offset < previous_offset:
+                raise ValueError(
+                    f"{path}:{line_number}: offset_s {offset} is before the previous "
+                    f"request's {previous_offset}, the trace must be in arrival order"
+                )
+            previous_offset = offset
+            if origin is None:
+                origin = offset
+
+            sampling_params = dict(record.get("sampling_params") or {})
+            output_tokens = record.get("output_tokens")
+            if output_tokens is not None:
+                sampling_params.setdefault("max_tokens", int(output_tokens))
+
+            if "prompt" in record:
+                prompt = record["prompt"]
+                prompt = (prompt, len(tokenizer.encode(prompt)))
+            elif "input_tokens" in record:
+                num_tokens = int(record["input_tokens"])
+                base_prompt = sonnet_base_prompt(output_tokens or 0)
+                if output_tokens not in base_prompt_tokens:
+                    base_prompt_tokens[output_tokens] = len(
+                        tokenizer.encode(base_prompt)
+                    )
+                num_base_tokens = base_prompt_tokens[output_tokens]
+                if num_tokens < num_base_tokens:
+                    # Too short for the instructions, so the prompt is only sonnet.
+                    base_prompt, num_base_tokens = "", 0
+                prompt = (
+                    base_prompt + corpus.sample(num_tokens - num_base_tokens, rng),
+                    num_tokens,
+                )
+            else:
+                raise ValueError(
+                    f"{path}:{line_number}: expected a prompt or input_tokens"
+                )
+            yield (offset - origin) / speedup, prompt, sampling_params
+
+
+def prefetch(items: Iterable[T], size: int = PREFETCH_SIZE) -> "Prefetcher[T]":
+    """Iterate over items, producing up to size of them ahead in a background thread.
+
+    Reading and tokenizing the trace then overlaps with waiting for the next send
+    instead of delaying it. An exception raised while producing an item is raised
+    when that item would have been returned. The thread starts right away, and stops
+    once the returned iterator is exhausted or closed, e.g. when a replay times out
+    before the end of the trace, even if no item was taken from it.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=size)
+    stopped = threading.Event()
+    done = object()
+
+    def put(entry) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put((item, None)):
+                    return
+        except Exception as e:
+            put((None, e))
+            return
+        put((done, None))
+
+    threading.Thread(target=produce, daemon=True).start()
+    return Prefetcher(buffer, stopped, done)
+
+
+class Prefetcher(Generic[T]):
+    """The iterator over the items produced by prefetch's background thread."""
+
+    def __init__(self, buffer: queue.Queue, stopped: threading.Event, done: object):
+        self._buffer = buffer
+        self._stopped = stopped
+        self._done = done
+
+    def __iter__(self) -> "Prefetcher[T]":
+        return self
+
+    def __next__(self) -> T:
+        if self._stopped.is_set():
+            raise StopIteration
+        item, error = self._buffer.get()
+        if error is not None:
+            self.close()
+            raise error
+        if item is self._done:
+            self.close()
+            raise StopIteration
+        return item
+
+    def close(self) -> None:
+        """Stop the background thread. Items not yet taken are discarded."""
+        self._stopped.set()
+
+    def __del__(self):
+        self.close()
@@ -1,21 +1,92 @@
+import hashlib
 import json
-import math
 import os
-import pathlib
 import random
 import subprocess
 import time
 import uuid
-from typing import Any, Dict, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-from transformers import LlamaTokenizerFast
+from llmperf.corpus import get_sonnet_corpus
+
+if TYPE_CHECKING:
+    from transformers import LlamaTokenizerFast
 
 
 RESULTS_VERSION = "2023-08-31"
 
 # Load tokenizer from local path if available (for offline/Docker use), otherwise from HuggingFace
 _TOKENIZER_PATH = os.environ.get("LLMPERF_TOKENIZER_PATH", "hf-internal-testing/llama-tokenizer")
-_tokenizer = LlamaTokenizerFast.from_pretrained(_TOKENIZER_PATH)
+_tokenizer = None
+
+
+def get_tokenizer() -> "LlamaTokenizerFast":
+    """Return the tokenizer shared by prompt generation and token counting.
+
+    The tokenizer, and transformers with it, is loaded on first use rather than at
+    import, so that code paths which never count tokens don't pay for it.
+    """
+    global _tokenizer
+    if _tokenizer is None:
+        from transformers import LlamaTokenizerFast
+
+        _tokenizer = LlamaTokenizerFast.from_pretrained(_TOKENIZER_PATH)
+    return _tokenizer
+
+
+def count_tokens(texts: List[str], tokenizer=None) -> List[int]:
+    """Count the tokens of many texts with one batch encode.
+
+    Special tokens are not counted, matching the completion token counts servers
+    report.
+    """
+    if not texts:
+        return []
+    tokenizer = tokenizer or get_tokenizer()
+    return [
+        len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]
+    ]
+
+
+# The files that determine how the tokenizer encodes text.
+_TOKENIZER_FILES = [
+    "tokenizer.json",
+    "tokenizer.model",
+    "tokenizer_config.json",
+    "special_tokens_map.json",
+]
+
+
+def _tokenizer_files() -> List[str]:
+    """The tokenizer files stored locally, in the order of _TOKENIZER_FILES."""
+    if os.path.isdir(_TOKENIZER_PATH):
+        paths = [os.path.join(_TOKENIZER_PATH, name) for name in _TOKENIZER_FILES]
+    else:
+        from huggingface_hub import try_to_load_from_cache
+
+        paths = [
+            try_to_load_from_cache(_TOKENIZER_PATH, name) for name in _TOKENIZER_FILES
+        ]
+    return [path for path in paths if isinstance(path, str) and os.path.isfile(path)]
+
+
+def get_tokenizer_id() -> str:
+    """Identify the tokenizer get_tokenizer() returns by the contents of its files.
+
+    A tokenizer downloaded again at another revision, or replaced at the same local
+    path, gets a different id. The files are hashed where they are stored, so the
+    tokenizer is only loaded, to download them, if they are not stored yet.
+    """
+    paths = _tokenizer_files()
+    if not paths:
+        get_tokenizer()
+        paths = _tokenizer_files()
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return f"LlamaTokenizerFast:{_TOKENIZER_PATH}:{digest.hexdigest()}"
 
 
 class LLMPerfResults:
@@ -62,6 +133,27 @@ def upload_to_s3(results_path: str, s3_path: str) -> None:
         print(result.stderr)
 
 
+def sonnet_base_prompt(
+    expect_output_tokens: int, request_id: Optional[str] = None
+) -> str:
+    """Return the instructions that precede the sonnet lines of a prompt.
+
+    Args:
+        expect_output_tokens: The number of output tokens to ask for.
+        request_id: If set, prefix the prompt with this id so that it does not share a
+            cacheable prefix with any other prompt.
+    """
+    # Create base prompt with optional unique prefix to prevent KV caching
+    prompt = (
+        "Randomly stream lines from the following text "
+        f"with {expect_output_tokens} output tokens. "
+        "Don't generate eos tokens:\n\n"
+    )
+    if request_id is not None:
+        prompt = f"[REQ-{request_id}] " + prompt
+    return prompt
+
+
 def randomly_sample_sonnet_lines_prompt(
     prompt_tokens_mean: int = 550,
     prompt_tokens_stddev: int = 250,
@@ -93,57 +185,27 @@ def randomly_sample_sonnet_lines_prompt(
         A tuple of the prompt and the length of the prompt.
     """
     if tokenizer is None:
-        tokenizer = _tokenizer
+        tokenizer = get_tokenizer()
 
-    get_token_length = lambda text: len(tokenizer.encode(text))
-
-    # Create base prompt with optional unique prefix to prevent KV caching
-    if disable_prefix_caching:
-        unique_id = request_id or uuid.uuid4().hex[:8]
-        prompt = (
-            f"[REQ-{unique_id}] "
-            "Randomly stream lines from the following text "
-            f"with {expect_output_tokens} output tokens. "
-            "Don't generate eos tokens:\n\n"
-        )
-    else:
-        prompt = (
-            "Randomly stream lines from the following text "
-            f"with {expect_output_tokens} output tokens. "
-            "Don't generate eos tokens:\n\n"
-        )
+    unique_id = (request_id or uuid.uuid4().hex[:8]) if disable_prefix_caching else None
+    prompt = sonnet_base_prompt(expect_output_tokens, unique_id)
+    base_prompt_tokens = len(tokenizer.encode(prompt))
 
     # get a prompt length that is at least as long as the base
     num_prompt_tokens = sample_random_positive_int(
         prompt_tokens_mean, prompt_tokens_stddev
     )
-    while num_prompt_tokens < get_token_length(prompt):
+    while num_prompt_tokens < base_prompt_tokens:
         num_prompt_tokens = sample_random_positive_int(
             prompt_tokens_mean, prompt_tokens_stddev
         )
-    remaining_prompt_tokens = num_prompt_tokens - get_token_length(prompt)
-    sonnet_path = pathlib.Path(__file__).parent.resolve() / "sonnet.txt"
-    with open(sonnet_path, "r") as f:
-        sonnet_lines = f.readlines()
-
-    # Keep adding shuffled content until we reach the target token count
-    # This allows for large token counts (e.g., 10k tokens for RAG use case)
-    while remaining_prompt_tokens > 0:
-        random.shuffle(sonnet_lines)
-        for line in sonnet_lines:
-            line_to_add = line
-            line_tokens = get_token_length(line_to_add)
-            if remaining_prompt_tokens - line_tokens < 0:
-                # This will cut off a line in the middle of a word, but that's ok since an
-                # llm should be able to handle that.
-                line_to_add = line_to_add[: int(math.ceil(remaining_prompt_tokens))]
-                prompt += line_to_add
-                remaining_prompt_tokens = 0
-                break
-            prompt += line_to_add
-            remaining_prompt_tokens -= line_tokens
-        # If we've gone through all lines and still need more tokens, loop continues
-        # with reshuffled lines
+
+    # Keep adding shuffled content until we reach the target token count. The sonnet is
+    # tokenized once per tokenizer, so this allows for large token counts (e.g., 10k
+    # tokens for RAG use case) without re-tokenizing any lines.
+    prompt += get_sonnet_corpus(tokenizer).sample(
+        num_prompt_tokens - base_prompt_tokens
+    )
 
     return (prompt, num_prompt_tokens)
 
@@ -0,0 +1,125 @@
+"""Content-addressed on-disk cache of generated prompt workloads.
+
+Each workload is stored in its own directory, named after the hash of everything
+that determines its contents:
+
+    prompts.bin        the utf-8 encoded prompts, back to back
+    offsets.npy        the byte offset of each prompt in prompts.bin, plus the end
+    prompt_tokens.npy  the number of tokens of each prompt
+    output_tokens.npy  the number of output tokens to request for each prompt
+    key.json           the parameters the key was computed from
+
+All files are memory-mapped when loading, so only the prompts themselves are copied.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Bump whenever a change to prompt generation changes the prompts a key maps to.
+WORKLOAD_CACHE_VERSION = 1
+
+
+def workload_key(
+    params: Dict[str, Any], corpus_digest: str, tokenizer_id: str
+) -> Dict[str, Any]:
+    """Return everything that determines the contents of a workload.
+
+    Args:
+        params: The generation parameters, including the seed and whether prefix
+            caching is disabled.
+        corpus_digest: The digest of the corpus text the prompts are sampled from.
+        tokenizer_id: Identifies the tokenizer the prompts are counted with.
+    """
+    return {
+        "version": WORKLOAD_CACHE_VERSION,
+        "params": params,
+        "corpus": corpus_digest,
+        "tokenizer": tokenizer_id,
+    }
+
+
+def _key_digest(key: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def load_workload(
+    cache_dir: str, key: Dict[str, Any]
+) -> Optional[Tuple[List[Tuple[str, int]], List[int]]]:
+    """Load a workload from the cache.
+
+    Args:
+        cache_dir: The cache directory.
+        key: The key of the workload, from workload_key().
+
+    Returns:
+        The prompts, as (prompt, prompt length) tuples, and the number of output tokens
+        to request for each prompt, or None if the workload is not cached.
+    """
+    path = Path(cache_dir) / _key_digest(key)
+    if not path.is_dir():
+        return None
+    offsets = np.load(path / "offsets.npy", mmap_mode="r")
+    prompt_tokens = np.load(path / "prompt_tokens.npy", mmap_mode="r")
+    output_tokens = np.load(path / "output_tokens.npy", mmap_mode="r")
+    text = (
+        np.memmap(path / "prompts.bin", dtype=np.uint8, mode="r")
+        if offsets[-1]
+        else np.zeros(0, dtype=np.uint8)
+    )
+    prompts = [
+        (text[offsets[i] : offsets[i + 1]].tobytes().decode("utf-8"), int(num_tokens))
+        for i, num_tokens in enumerate(prompt_tokens)
+    ]
+    return prompts, output_tokens.tolist()
+
+
+def save_workload(
+    cache_dir: str,
+    key: Dict[str, Any],
+    prompts: List[Tuple[str, int]],
+    num_output_tokens: List[int],
+) -> None:
+    """Store a workload in the cache.
+
+    The workload is written to a temporary directory that is then renamed into place,
+    so concurrent runs never see a partially written workload.
+
+    Args:
+        cache_dir: The cache directory. Created if it does not exist.
+        key: The key of the workload, from workload_key().
+        prompts: The prompts, as (prompt, prompt length) tuples.
+        num_output_tokens: The number of output tokens to request for each prompt.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = Path(cache_dir) / _key_digest(key)
+    tmp_path = Path(tempfile.mkdtemp(dir=cache_dir, prefix=".tmp-"))
+    try:
+        encoded = [prompt.encode("utf-8") for prompt, _ in prompts]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        with open(tmp_path / "prompts.bin", "wb") as f:
+            f.write(b"".join(encoded))
+        np.save(tmp_path / "offsets.npy", offsets)
+        np.save(
+            tmp_path / "prompt_tokens.npy",
+            np.array([num_tokens for _, num_tokens in prompts], dtype=np.int64),
+        )
+        np.save(
+            tmp_path / "output_tokens.npy", np.array(num_output_tokens, dtype=np.int64)
+        )
+        with open(tmp_path / "key.json", "w") as f:
+            json.dump(key, f, indent=4)
+        os.rename(tmp_path, path)
+    except OSError:
+        # Another run stored the same workload first.
+        if not path.is_dir():
+            raise
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
@@ -0,0 +1,52 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from llmperf.arrivals import ARRIVAL_DISTRIBUTIONS, generate_arrival_times
+
+NUM_REQUESTS = 20_000
+REQUEST_RATE = 8.0
+
+
+def gaps(distribution, burstiness=1.0):
+    arrival_times = generate_arrival_times(
+        NUM_REQUESTS, REQUEST_RATE, distribution, burstiness, rng=random.Random(0)
+    )
+    assert arrival_times[0] == 0.0
+    return np.diff(arrival_times)
+
+
+@pytest.mark.parametrize(
+    "distribution, burstiness",
+    [("poisson", 1.0), ("constant", 1.0), ("gamma", 0.25), ("gamma", 4.0)],
+)
+def test_mean_rate(distribution, burstiness):
+    request_gaps = gaps(distribution, burstiness)
+    assert (request_gaps >= 0).all()
+    assert 1 / request_gaps.mean() == pytest.approx(REQUEST_RATE, rel=0.05)
+
+
+@pytest.mark.parametrize(
+    "distribution, burstiness, cv",
+    [("poisson", 1.0, 1.0), ("constant", 1.0, 0.0), ("gamma", 0.25, 2.0)],
+)
+def test_burstiness(distribution, burstiness, cv):
+    # The coefficient of variation of gamma gaps is 1 / sqrt(burstiness).
+    request_gaps = gaps(distribution, burstiness)
+    assert request_gaps.std() / request_gaps.mean() == pytest.approx(cv, abs=0.1)
+
+
+def test_infinite_rate_sends_everything_at_once():
+    for distribution in ARRIVAL_DISTRIBUTIONS:
+        assert generate_arrival_times(5, math.inf, distribution) == [0.0] * 5
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        generate_arrival_times(5, REQUEST_RATE, "uniform")
+    with pytest.raises(ValueError):
+        generate_arrival_times(5, 0)
+    with pytest.raises(ValueError):
+        generate_arrival_times(5, REQUEST_RATE, "gamma", burstiness=0)
@@ -0,0 +1,100 @@
+import json
+import os
+
+import pytest
+
+from llmperf.catalog import (
+    CATALOG_FILENAME,
+    ResultsCatalog,
+    default_catalog_path,
+    open_catalog,
+)
+
+TTFT_P99 = "results_ttft_s_quantiles_p99"
+
+
+def write_summary(directory, name, model, concurrency, timestamp, ttft_p99):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}_summary.json")
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "model": model,
+                "num_concurrent_requests": concurrency,
+                "timestamp": timestamp,
+                TTFT_P99: ttft_p99,
+                "results_num_completed_requests": 100,
+            },
+            f,
+        )
+    return path
+
+
+def test_register(tmp_path):
+    path = write_summary(tmp_path, "run", "llama", 8, 1000, 0.5)
+    with ResultsCatalog(":memory:") as catalog:
+        catalog.register(path)
+        # Registering a summary again replaces its entry.
+        catalog.register(path, {"model": "llama", "timestamp": 1000, TTFT_P99: 0.7})
+        df = catalog.query([TTFT_P99, "results_num_completed_requests"])
+    assert len(df) == 1
+    assert df["summary_path"][0] == os.path.abspath(path)
+    assert df[TTFT_P99][0] == 0.7
+    assert df["results_num_completed_requests"].isna()[0]
+
+
+def test_index_directory_skips_unchanged_summaries(tmp_path):
+    path = write_summary(tmp_path / "a", "run", "llama", 8, 1000, 0.5)
+    write_summary(tmp_path / "b", "run", "llama", 16, 2000, 0.9)
+    (tmp_path / "broken_summary.json").write_text("{")
+    (tmp_path / "run_individual_responses.json").write_text("[]")
+    with ResultsCatalog(":memory:") as catalog:
+        assert catalog.index_directory(tmp_path) == 2
+        assert catalog.index_directory(tmp_path) == 0
+
+        write_summary(tmp_path / "a", "run", "llama", 8, 1000, 0.6)
+        os.utime(path, (0, os.path.getmtime(path) + 10))
+        assert catalog.index_directory(tmp_path) == 1
+        assert catalog.query([TTFT_P99], concurrency=8)[TTFT_P99].tolist() == [0.6]
+
+
+def test_query_filters(tmp_path):
+    write_summary(tmp_path / "a", "llama", "llama", 8, 1000, 0.5)
+    write_summary(tmp_path / "a", "llama_16", "llama", 16, 2000, 0.9)
+    write_summary(tmp_path / "b", "mistral", "mistral", 8, 3000, 0.4)
+    with ResultsCatalog(":memory:") as catalog:
+        catalog.index_directory(tmp_path)
+
+        def selected(**filters):
+            return catalog.query([TTFT_P99], **filters)[TTFT_P99].tolist()
+
+        assert selected() == [0.5, 0.9, 0.4]
+        assert selected(model="llama") == [0.5, 0.9]
+        assert selected(concurrency=8) == [0.5, 0.4]
+        assert selected(model="llama", concurrency=8) == [0.5]
+        assert selected(since=2000) == [0.9, 0.4]
+        assert selected(until=2000) == [0.5]
+        assert selected(results_dir=tmp_path / "b") == [0.4]
+        assert selected(model="gpt") == []
+
+
+def test_open_catalog_indexes_once(tmp_path):
+    write_summary(tmp_path, "run", "llama", 8, 1000, 0.5)
+    catalog_path = tmp_path / "catalog" / CATALOG_FILENAME
+    with open_catalog(tmp_path, catalog_path) as catalog:
+        assert len(catalog.query([TTFT_P99])) == 1
+    with open_catalog(tmp_path, catalog_path) as catalog:
+        assert len(catalog.query([TTFT_P99])) == 1
+
+
+@pytest.mark.parametrize(
+    "results_dir, catalog_dir",
+    [
+        ("result_outputs", "result_outputs"),
+        ("result_outputs/llama/8", "result_outputs"),
+        ("runs/llama", "runs/llama"),
+    ],
+)
+def test_default_catalog_path(tmp_path, results_dir, catalog_dir):
+    path = default_catalog_path(str(tmp_path / results_dir))
+    assert path == str(tmp_path / catalog_dir / CATALOG_FILENAME)
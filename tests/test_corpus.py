@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from llmperf.corpus import SONNET_PATH, TokenizedCorpus, read_lines, sonnet_digest
+from llmperf.prompt_pool import generate_sonnet_prompt_pool
+from llmperf.utils import count_tokens, get_tokenizer
+
+
+class WordTokenizer:
+    # One token per whitespace separated word, so token counts add up across lines.
+    def __init__(self):
+        self.vocab = {}
+        self.words = []
+
+    def __call__(self, texts, add_special_tokens=True):
+        return {
+            "input_ids": [[self._id(word) for word in text.split()] for text in texts]
+        }
+
+    def _id(self, word):
+        if word not in self.vocab:
+            self.vocab[word] = len(self.words)
+            self.words.append(word)
+        return self.vocab[word]
+
+    def decode(self, ids):
+        return " ".join(self.words[i] for i in ids)
+
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    return get_tokenizer()
+
+
+def test_digest_matches_sonnet_digest():
+    corpus = TokenizedCorpus.from_file(SONNET_PATH, WordTokenizer())
+    assert corpus.digest == sonnet_digest()
+    edited = TokenizedCorpus(read_lines(SONNET_PATH)[1:], WordTokenizer())
+    assert edited.digest != sonnet_digest()
+
+
+def test_sample_has_requested_word_count():
+    corpus = TokenizedCorpus(
+        ["one two three\n", "four five\n", "six\n"], WordTokenizer()
+    )
+    for num_tokens in range(20):
+        for seed in range(5):
+            text = corpus.sample(num_tokens, random.Random(seed))
+            assert len(text.split()) == num_tokens
+
+
+def test_sample_has_requested_token_count(tokenizer):
+    corpus = TokenizedCorpus.from_file(SONNET_PATH, tokenizer)
+    # Lengths within a line, across lines, and over more than a pass of the corpus.
+    lengths = [1, 5, 37, 550, corpus.num_tokens, corpus.num_tokens + 13]
+    for num_tokens in lengths:
+        texts = [corpus.sample(num_tokens, random.Random(seed)) for seed in range(10)]
+        assert count_tokens(texts, tokenizer) == [num_tokens] * len(texts)
+
+
+@pytest.mark.parametrize("request_ids", [None, [f"req_{i}_1700" for i in range(50)]])
+def test_prompts_have_requested_token_count(tokenizer, request_ids):
+    prompts, _ = generate_sonnet_prompt_pool(
+        num_prompts=50,
+        mean_input_tokens=550,
+        stddev_input_tokens=150,
+        mean_output_tokens=150,
+        stddev_output_tokens=10,
+        tokenizer=tokenizer,
+        seed=3,
+        request_ids=request_ids,
+    )
+    texts = [prompt for prompt, _ in prompts]
+    assert count_tokens(texts, tokenizer) == [length for _, length in prompts]
@@ -0,0 +1,45 @@
+from collections import Counter
+
+import pytest
+
+from llmperf.endpoints import EndpointRouter, parse_endpoints
+
+ENDPOINTS = [("http://a:8000/v1", 3.0), ("http://b:8000/v1", 1.0)]
+
+
+def test_parse_endpoints():
+    assert parse_endpoints("http://a:8000/v1=3, http://b:8000/v1") == ENDPOINTS
+    assert parse_endpoints("http://a/v1?key=x") == [("http://a/v1?key=x", 1.0)]
+    for spec in ["", "http://a/v1=0", "=2", "http://a/v1,http://a/v1"]:
+        with pytest.raises(ValueError):
+            parse_endpoints(spec)
+
+
+def test_round_robin_follows_weights():
+    router = EndpointRouter(ENDPOINTS)
+    picks = [router.acquire() for _ in range(400)]
+    assert Counter(picks) == {"http://a:8000/v1": 300, "http://b:8000/v1": 100}
+    # Smooth: the lighter endpoint is interleaved rather than sent a burst.
+    assert picks[:4].count("http://b:8000/v1") == 1
+
+
+def test_random_follows_weights():
+    router = EndpointRouter(ENDPOINTS, policy="random", seed=0)
+    counts = Counter(router.acquire() for _ in range(10_000))
+    assert counts["http://a:8000/v1"] / 10_000 == pytest.approx(0.75, abs=0.02)
+
+
+def test_least_outstanding_avoids_busy_endpoint():
+    router = EndpointRouter(ENDPOINTS, policy="least-outstanding")
+    picks = [router.acquire() for _ in range(4)]
+    assert Counter(picks) == {"http://a:8000/v1": 3, "http://b:8000/v1": 1}
+    for url in picks:
+        if url == "http://b:8000/v1":
+            router.release(url)
+    # b is idle again while a has 3 requests in flight.
+    assert router.acquire() == "http://b:8000/v1"
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        EndpointRouter(ENDPOINTS, policy="fastest")
@@ -0,0 +1,64 @@
+import pytest
+
+from llmperf import common_metrics
+from llmperf.goodput import ERROR_MISS, GoodputCounter
+
+SLOS = {common_metrics.TTFT: 1.0, common_metrics.INTER_TOKEN_LAT: 0.05}
+
+
+def request(ttft, itl, num_output_tokens=100, error_code=None):
+    return {
+        common_metrics.TTFT: ttft,
+        common_metrics.INTER_TOKEN_LAT: itl,
+        common_metrics.NUM_OUTPUT_TOKENS: num_output_tokens,
+        common_metrics.ERROR_CODE: error_code,
+    }
+
+
+def test_slo_attainment():
+    counter = GoodputCounter(SLOS)
+    assert counter.add(request(0.5, 0.02)) == []
+    # Meeting a threshold exactly counts as meeting it.
+    assert counter.add(request(1.0, 0.05, num_output_tokens=50)) == []
+    assert counter.add(request(2.0, 0.02)) == [common_metrics.TTFT]
+    assert counter.add(request(2.0, 0.1)) == [
+        common_metrics.TTFT,
+        common_metrics.INTER_TOKEN_LAT,
+    ]
+    assert counter.add(request(0, 0, error_code=500)) == [ERROR_MISS]
+
+    summary = counter.summary(duration_s=10)
+    assert summary[common_metrics.GOODPUT] == 15
+    assert summary[common_metrics.SLO_ATTAINMENT] == pytest.approx(2 / 5)
+    assert summary[common_metrics.SLO_MISSES] == {
+        common_metrics.TTFT: 2,
+        common_metrics.INTER_TOKEN_LAT: 1,
+        ERROR_MISS: 1,
+    }
+    assert summary[common_metrics.REQUEST_SLOS] == SLOS
+
+
+def test_missing_metric_misses_slo():
+    counter = GoodputCounter({common_metrics.E2E_LAT: 10})
+    assert counter.add(request(0.5, 0.02)) == [common_metrics.E2E_LAT]
+
+
+def test_merge_matches_single_counter():
+    requests = [request(ttft / 10, 0.02 * (ttft % 4)) for ttft in range(20)]
+    single = GoodputCounter(SLOS)
+    first, second = GoodputCounter(SLOS), GoodputCounter(SLOS)
+    for i, request_metrics in enumerate(requests):
+        single.add(request_metrics)
+        (first if i % 2 else second).add(request_metrics)
+    first.merge(second)
+    assert first.summary(5) == single.summary(5)
+
+    with pytest.raises(ValueError):
+        first.merge(GoodputCounter({common_metrics.TTFT: 2.0}))
+
+
+def test_invalid_slos():
+    with pytest.raises(ValueError):
+        GoodputCounter({"output_throughput": 10})
+    with pytest.raises(ValueError):
+        GoodputCounter({common_metrics.TTFT: 0})
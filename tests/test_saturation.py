@@ -0,0 +1,100 @@
+import pytest
+
+from llmperf import common_metrics
+from llmperf.saturation import parse_slo, search_saturation
+
+
+def fake_probe(probed):
+    # TTFT grows linearly with the load, so the SLO ttft:p99<2 holds below 20.
+    def probe(load):
+        probed.append(load)
+        return {
+            common_metrics.TTFT: {
+                "quantiles": {"p99": load * 0.1},
+                "mean": load * 0.05,
+            },
+            common_metrics.ERROR_RATE: 0.0,
+        }
+
+    return probe
+
+
+def test_parse_slo():
+    slo = parse_slo("ttft:p99<2")
+    assert (slo.metric, slo.statistic, slo.op, slo.threshold) == (
+        common_metrics.TTFT,
+        "p99",
+        "<",
+        2.0,
+    )
+    slo = parse_slo("error_rate<=0.01")
+    assert (slo.metric, slo.statistic, slo.op) == ("error_rate", None, "<=")
+    assert slo.is_met({"error_rate": 0.01})
+    with pytest.raises(ValueError):
+        parse_slo("ttft:p99>2")
+
+
+def test_missing_statistic_never_meets_slo():
+    assert not parse_slo("ttft:p99<2").is_met({})
+
+
+def test_bisect_finds_highest_load_meeting_slos():
+    probed = []
+    result = search_saturation(
+        fake_probe(probed),
+        [parse_slo("ttft:p99<2")],
+        min_load=1,
+        max_load=64,
+        granularity=1,
+    )
+    assert result["max_load_meeting_slos"] == 19
+    assert result["min_load_missing_slos"] == 20
+    # Doubles until the first miss, then bisects the bracket.
+    assert probed == [1, 2, 4, 8, 16, 32, 24, 20, 18, 19]
+    assert [probe["load"] for probe in result["probes"]] == probed
+    assert [probe["slos_met"] for probe in result["probes"]] == [
+        load < 20 for load in probed
+    ]
+
+
+def test_step_stops_at_first_miss():
+    probed = []
+    result = search_saturation(
+        fake_probe(probed),
+        [parse_slo("ttft:mean<1")],
+        min_load=5,
+        max_load=100,
+        mode="step",
+        step=5,
+    )
+    assert probed == [5, 10, 15, 20]
+    assert result["max_load_meeting_slos"] == 15
+    assert result["min_load_missing_slos"] == 20
+
+
+def test_stops_at_max_load():
+    probed = []
+    result = search_saturation(
+        fake_probe(probed), [parse_slo("ttft:p99<2")], min_load=1, max_load=6
+    )
+    assert probed == [1, 2, 4, 6]
+    assert result["max_load_meeting_slos"] == 6
+    assert result["min_load_missing_slos"] is None
+
+
+def test_min_load_missing_slos():
+    result = search_saturation(
+        fake_probe([]), [parse_slo("ttft:p99<2")], min_load=30, max_load=64
+    )
+    assert result["max_load_meeting_slos"] is None
+    assert result["min_load_missing_slos"] == 30
+
+
+def test_invalid_search():
+    slos = [parse_slo("ttft:p99<2")]
+    with pytest.raises(ValueError):
+        search_saturation(fake_probe([]), slos, min_load=0, max_load=10)
+    with pytest.raises(ValueError):
+        search_saturation(fake_probe([]), slos, min_load=1, max_load=10, mode="step")
+    with pytest.raises(ValueError):
+        search_saturation(fake_probe([]), [], min_load=1, max_load=10)
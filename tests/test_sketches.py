@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from llmperf.sketches import QuantileSketch
+
+QUANTILES = [0, 0.01, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 1]
+
+
+@pytest.fixture
+def latencies():
+    # Request latencies are skewed with a long tail.
+    return np.random.default_rng(0).lognormal(mean=0, sigma=1, size=100_000)
+
+
+def assert_quantiles_close(sketch, values):
+    for q in QUANTILES:
+        expected = np.quantile(values, q)
+        assert sketch.quantile(q) == pytest.approx(
+            expected, rel=sketch.relative_accuracy
+        ), f"quantile {q}"
+
+
+def test_quantiles_within_relative_accuracy(latencies):
+    sketch = QuantileSketch()
+    for value in latencies:
+        sketch.add(value)
+    assert_quantiles_close(sketch, latencies)
+    assert sketch.count == len(latencies)
+    assert sketch.min == latencies.min()
+    assert sketch.max == latencies.max()
+    assert sketch.mean == pytest.approx(latencies.mean())
+    assert sketch.stddev == pytest.approx(latencies.std(ddof=1))
+
+
+def test_add_many_matches_add(latencies):
+    one_by_one = QuantileSketch()
+    for value in latencies[:1000]:
+        one_by_one.add(value)
+    batched = QuantileSketch()
+    batched.add_many(np.append(latencies[:1000], np.nan))
+    assert batched.quantiles(QUANTILES) == one_by_one.quantiles(QUANTILES)
+    assert batched.count == one_by_one.count
+
+
+def test_merge_matches_single_sketch(latencies):
+    merged = QuantileSketch()
+    for part in np.array_split(latencies, 4):
+        sketch = QuantileSketch()
+        sketch.add_many(part)
+        merged.merge(sketch)
+    assert_quantiles_close(merged, latencies)
+    assert merged.mean == pytest.approx(latencies.mean())
+    assert merged.stddev == pytest.approx(latencies.std(ddof=1))
+
+
+def test_negative_and_zero_values():
+    values = np.random.default_rng(1).normal(size=10_000)
+    values[::100] = 0
+    sketch = QuantileSketch()
+    sketch.add_many(values)
+    for q in [0.01, 0.1, 0.9, 0.99]:
+        assert sketch.quantile(q) == pytest.approx(
+            np.quantile(values, q), rel=sketch.relative_accuracy
+        )
+
+
+def test_merge_requires_same_accuracy():
+    with pytest.raises(ValueError):
+        QuantileSketch(0.01).merge(QuantileSketch(0.02))
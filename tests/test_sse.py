@@ -0,0 +1,45 @@
+from llmperf.sse import SSEParser, loads
+
+
+def feed_all(parser, chunks):
+    payloads = []
+    for chunk in chunks:
+        payloads.extend(parser.feed(chunk))
+    return payloads
+
+
+def test_data_lines():
+    stream = (
+        b'data: {"id": 1}\n\n'
+        b": keep-alive\n\n"
+        b"event: message\n"
+        b'data:{"id": 2}\r\n\r\n'
+        b"data: [DONE]\n\n"
+    )
+    assert feed_all(SSEParser(), [stream]) == [b'{"id": 1}', b'{"id": 2}', b"[DONE]"]
+
+
+def test_chunks_split_anywhere():
+    stream = (
+        b'data: {"choices": [{"delta": {"content": "hi"}}]}\r\n\r\ndata: [DONE]\r\n\r\n'
+    )
+    expected = feed_all(SSEParser(), [stream])
+    for size in range(1, len(stream)):
+        chunks = [stream[i : i + size] for i in range(0, len(stream), size)]
+        assert feed_all(SSEParser(), chunks) == expected
+    assert loads(expected[0])["choices"][0]["delta"]["content"] == "hi"
+    assert expected[1] == b"[DONE]"
+
+
+def test_consecutive_data_lines_are_separate_payloads():
+    # OpenAI compatible servers send one JSON object per data line, so the lines of
+    # an event are not joined.
+    stream = b'data: {"id": 1}\ndata: {"id": 2}\n\n'
+    assert feed_all(SSEParser(), [stream]) == [b'{"id": 1}', b'{"id": 2}']
+
+
+def test_line_completed_by_later_chunk():
+    parser = SSEParser()
+    assert parser.feed(b"data: [DO") == []
+    assert parser.feed(b"NE]") == []
+    assert parser.feed(b"\n") == [b"[DONE]"]
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from llmperf import common_metrics
+from llmperf.timeline import (
+    TimelineBuilder,
+    build_timeline,
+    detect_steady_state,
+    steady_state_summary,
+)
+
+NUM_OUTPUT_TOKENS = 10
+
+
+def request(start, duration=1.0, error_code=None):
+    arrivals = np.linspace(duration / NUM_OUTPUT_TOKENS, duration, NUM_OUTPUT_TOKENS)
+    if error_code is not None:
+        arrivals = np.empty(0)
+    return {
+        common_metrics.REQUEST_START_TIME: start,
+        common_metrics.REQUEST_END_TIME: start + duration,
+        common_metrics.ERROR_CODE: error_code,
+        common_metrics.TOKEN_ARRIVAL_TIMES: arrivals,
+        common_metrics.NUM_OUTPUT_TOKENS: len(arrivals),
+        common_metrics.TTFT: arrivals[0] if len(arrivals) else 0,
+        common_metrics.INTER_TOKEN_LAT: duration / NUM_OUTPUT_TOKENS,
+        common_metrics.E2E_LAT: duration,
+    }
+
+
+def closed_loop_run(num_slots=4, plateau_end=17):
+    # Slot k starts at k seconds and sends 1 second requests back to back until
+    # plateau_end + k, so the load ramps up over the first seconds, holds at
+    # num_slots, then drains.
+    return [
+        request(float(start))
+        for slot in range(num_slots)
+        for start in range(slot, plateau_end + slot)
+    ]
+
+
+def test_ramp_up_plateau_drain():
+    metrics = closed_loop_run()
+    timeline = build_timeline(metrics)
+    assert len(timeline) == 20
+    assert timeline["in_flight"].tolist() == [1, 2, 3] + [4] * 14 + [3, 2, 1]
+
+    window = detect_steady_state(timeline, metrics)
+    assert window == (3.0, 17.0)
+
+    summary = steady_state_summary(timeline, metrics, window)
+    # Each slot receives NUM_OUTPUT_TOKENS tokens a second, except the slot starting
+    # at 3s, whose first token only arrives at 3.1s.
+    assert summary[common_metrics.OUTPUT_THROUGHPUT] == pytest.approx(
+        (39 + 40 * 13) / 14
+    )
+    # 3 requests end as the window opens at 3s, then 4 every second until 16s.
+    assert summary[common_metrics.NUM_COMPLETED_REQUESTS] == 3 + 4 * 13
+    assert summary[common_metrics.COMPLETED_REQUESTS_PER_MIN] == pytest.approx(
+        55 / 14 * 60
+    )
+    assert summary[common_metrics.E2E_LAT]["quantiles"]["p50"] == pytest.approx(1.0)
+    assert summary[common_metrics.TTFT]["mean"] == pytest.approx(0.1)
+
+
+def test_rolling_quantiles():
+    timeline = build_timeline(closed_loop_run())
+    assert timeline["ttft_p50_s"].to_numpy() == pytest.approx(0.1)
+    assert timeline["itl_p99_s"].to_numpy() == pytest.approx(0.1, rel=0.01)
+
+
+def test_builder_keeps_no_token_arrivals():
+    builder = TimelineBuilder()
+    for request_metrics in closed_loop_run():
+        builder.add(request_metrics)
+    assert all(
+        common_metrics.TOKEN_ARRIVAL_TIMES not in request_metrics
+        for request_metrics in builder.requests
+    )
+    assert builder.build().equals(build_timeline(closed_loop_run()))
+
+
+def test_run_too_short_for_a_window():
+    metrics = [request(0.0) for _ in range(4)] + [request(1.0) for _ in range(4)]
+    timeline = build_timeline(metrics)
+    assert len(timeline) == 2
+    assert detect_steady_state(timeline, metrics) is None
+
+
+def test_all_errored_run():
+    metrics = [
+        request(float(start), error_code=500) for start in range(10) for _ in range(4)
+    ]
+    timeline = build_timeline(metrics)
+    assert timeline["errored_requests"].sum() == 40
+    assert timeline["completed_requests"].sum() == 0
+    assert timeline["tokens_per_s"].sum() == 0
+    assert detect_steady_state(timeline, metrics) is None
+
+
+def test_empty_run():
+    timeline = build_timeline([])
+    assert timeline.empty
+    assert detect_steady_state(timeline, []) is None
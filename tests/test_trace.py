@@ -0,0 +1,37 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+from llmperf.trace import prefetch
+
+
+def wait_for_threads(count, timeout_s=2.0):
+    deadline = time.monotonic() + timeout_s
+    while threading.active_count() > count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return threading.active_count()
+
+
+def test_prefetch_yields_items_in_order():
+    assert list(prefetch(range(100), size=8)) == list(range(100))
+
+
+def test_prefetch_raises_producer_errors():
+    def items():
+        yield 1
+        raise ValueError("bad line")
+
+    prefetched = prefetch(items())
+    assert next(prefetched) == 1
+    with pytest.raises(ValueError):
+        next(prefetched)
+
+
+def test_close_before_first_item_stops_thread():
+    num_threads = threading.active_count()
+    prefetched = prefetch(itertools.count(), size=8)
+    prefetched.close()
+    assert wait_for_threads(num_threads) == num_threads
+    assert list(prefetched) == []
@@ -0,0 +1,114 @@
+import pytest
+
+import token_benchmark_ray
+from llmperf.workload_cache import load_workload, save_workload, workload_key
+
+PARAMS = {"num_prompts": 3, "mean_input_tokens": 550, "seed": 7}
+PROMPTS = [("first prompt", 2), ("", 0), ("sonnets — unicode", 3)]
+OUTPUT_TOKENS = [150, 120, 180]
+
+
+def test_matching_key_hits(tmp_path):
+    key = workload_key(PARAMS, corpus_digest="corpus", tokenizer_id="tokenizer")
+    assert load_workload(tmp_path, key) is None
+    save_workload(tmp_path, key, PROMPTS, OUTPUT_TOKENS)
+    same_key = workload_key(
+        dict(PARAMS), corpus_digest="corpus", tokenizer_id="tokenizer"
+    )
+    assert load_workload(tmp_path, same_key) == (PROMPTS, OUTPUT_TOKENS)
+
+
+def test_empty_workload(tmp_path):
+    key = workload_key(PARAMS, corpus_digest="corpus", tokenizer_id="tokenizer")
+    save_workload(tmp_path, key, [], [])
+    assert load_workload(tmp_path, key) == ([], [])
+
+
+@pytest.mark.parametrize(
+    "changed",
+    [
+        {"corpus_digest": "edited corpus"},
+        {"tokenizer_id": "retrained tokenizer"},
+        {"params": {**PARAMS, "seed": 8}},
+    ],
+)
+def test_changed_inputs_miss(tmp_path, changed):
+    key_args = {"params": PARAMS, "corpus_digest": "corpus", "tokenizer_id": "tok"}
+    save_workload(tmp_path, workload_key(**key_args), PROMPTS, OUTPUT_TOKENS)
+    assert load_workload(tmp_path, workload_key(**{**key_args, **changed})) is None
+
+
+def fake_generation(monkeypatch, generated):
+    def generate_sonnet_prompt_pool(num_prompts, **kwargs):
+        generated.append(num_prompts)
+        return PROMPTS[:num_prompts], OUTPUT_TOKENS[:num_prompts]
+
+    monkeypatch.setattr(
+        token_benchmark_ray, "generate_sonnet_prompt_pool", generate_sonnet_prompt_pool
+    )
+    monkeypatch.setattr(token_benchmark_ray, "get_tokenizer", lambda: None)
+    monkeypatch.setattr(token_benchmark_ray, "get_tokenizer_id", lambda: "tokenizer")
+
+
+def generate(cache_dir, seed=11):
+    return token_benchmark_ray.generate_prompt_pool(
+        num_prompts=3,
+        mean_input_tokens=550,
+        stddev_input_tokens=150,
+        mean_output_tokens=150,
+        stddev_output_tokens=10,
+        seed=seed,
+        cache_dir=cache_dir,
+    )
+
+
+def test_prompt_pool_generated_once(tmp_path, monkeypatch):
+    generated = []
+    fake_generation(monkeypatch, generated)
+    assert generate(tmp_path) == (PROMPTS, OUTPUT_TOKENS)
+    assert generate(tmp_path) == (PROMPTS, OUTPUT_TOKENS)
+    assert generated == [3]
+
+    monkeypatch.setattr(token_benchmark_ray, "get_tokenizer_id", lambda: "other")
+    generate(tmp_path)
+    generate(tmp_path, seed=12)
+    assert generated == [3, 3, 3]
+
+
+@pytest.mark.parametrize(
+    "unique",
+    [{"unique_prompts": True}, {"disable_prefix_caching": True}, {}],
+)
+def test_unique_prompts_bypass_cache(tmp_path, monkeypatch, unique):
+    cache_dirs = []
+
+    def generate_prompt_pool(num_prompts, cache_dir=None, **kwargs):
+        cache_dirs.append(cache_dir)
+        return PROMPTS, OUTPUT_TOKENS
+
+    monkeypatch.setattr(
+        token_benchmark_ray, "generate_prompt_pool", generate_prompt_pool
+    )
+    monkeypatch.setattr(
+        token_benchmark_ray,
+        "get_token_throughput_latencies",
+        lambda **kwargs: ({}, []),
+    )
+    token_benchmark_ray.run_token_benchmark(
+        llm_api="openai",
+        model="model",
+        test_timeout_s=60,
+        max_num_completed_requests=3,
+        num_concurrent_requests=1,
+        mean_input_tokens=550,
+        stddev_input_tokens=150,
+        mean_output_tokens=150,
+        stddev_output_tokens=10,
+        additional_sampling_params="{}",
+        results_dir="",
+        user_metadata={},
+        engine="asyncio",
+        workload_cache_dir=str(tmp_path),
+        **unique,
+    )
+    assert cache_dirs == [None if unique else str(tmp_path)]
@@ -1,3 +1,5 @@
+import asyncio
+import itertools
 import logging
 import threading
 import argparse
@@ -5,27 +7,122 @@ from collections.abc import Iterable
 import json
 import os
 from pathlib import Path
+import queue
 import re
 import time
 import random
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 import ray
 
 from llmperf import common_metrics
-from llmperf.common import SUPPORTED_APIS, construct_clients
+from llmperf.common import (
+    ASYNC_SUPPORTED_APIS,
+    ENDPOINT_SUPPORTED_APIS,
+    SUPPORTED_APIS,
+    construct_async_client,
+    construct_clients,
+)
 
+from llmperf.arrivals import ARRIVAL_DISTRIBUTIONS, generate_arrival_times
+from llmperf.catalog import ResultsCatalog, default_catalog_path
+from llmperf.client_pool import ClientPool
+from llmperf.columnar import (
+    COLUMNAR_FORMATS,
+    validate_columnar_format,
+    write_columnar_responses,
+)
+from llmperf.jsonl import JsonlWriter, iter_jsonl, read_jsonl
+from llmperf.goodput import GoodputCounter, validate_request_slos
+from llmperf.load_monitor import CpuSampler, client_overhead_summary
+from llmperf.corpus import sonnet_digest
+from llmperf.endpoints import ROUTING_POLICIES, EndpointRouter, parse_endpoints
 from llmperf.models import RequestConfig
-from llmperf.requests_launcher import RequestsLauncher
-from llmperf.utils import (
-    randomly_sample_sonnet_lines_prompt,
-    LLMPerfResults,
-    sample_random_positive_int,
+from llmperf.prompt_pool import generate_sonnet_prompt_pool
+from llmperf.saturation import SEARCH_MODES, parse_slo, search_saturation
+from llmperf.sketches import StreamingSummary
+from llmperf.trace import prefetch, read_trace
+from llmperf.timeline import (
+    TIMELINE_KEYS,
+    TimelineBuilder,
+    build_timeline,
+    detect_steady_state,
+    steady_state_summary,
 )
+from llmperf.utils import count_tokens, get_tokenizer, get_tokenizer_id, LLMPerfResults
+from llmperf.workload_cache import load_workload, save_workload, workload_key
 from tqdm import tqdm
 
-from transformers import LlamaTokenizerFast
+
+def generate_prompt_pool(
+    num_prompts: int,
+    mean_input_tokens: int,
+    stddev_input_tokens: int,
+    mean_output_tokens: int,
+    stddev_output_tokens: int,
+    disable_prefix_caching: bool = False,
+    seed: Optional[int] = None,
+    cache_dir: Optional[str] = None,
+) -> Tuple[List[Tuple[str, int]], List[int]]:
+    """Generate the prompts and max output tokens of a load test ahead of time.
+
+    Args:
+        num_prompts: The number of prompts to generate.
+        mean_input_tokens: The mean number of tokens to send in the prompt for the request.
+        stddev_input_tokens: The standard deviation of the number of tokens to send in the prompt for the request.
+        mean_output_tokens: The mean number of tokens to generate per request.
+        stddev_output_tokens: The standard deviation of the number of tokens to generate per request.
+        disable_prefix_caching: If True, add unique prefix to each prompt to prevent VLLM KV caching.
+        seed: The seed of the pool. Defaults to one drawn from the global random
+            generator, so that seeding it makes the pool reproducible.
+        cache_dir: If set, load the pool from this workload cache directory when an
+            identical one was generated before, and store it there otherwise.
+
+    Returns:
+        The prompts, as (prompt, prompt length) tuples.
+        The number of output tokens to request for each prompt.
+    """
+    if seed is None:
+        seed = random.getrandbits(64)
+    if cache_dir:
+        cache_key = workload_key(
+            params={
+                "num_prompts": num_prompts,
+                "mean_input_tokens": mean_input_tokens,
+                "stddev_input_tokens": stddev_input_tokens,
+                "mean_output_tokens": mean_output_tokens,
+                "stddev_output_tokens": stddev_output_tokens,
+                "disable_prefix_caching": disable_prefix_caching,
+                "seed": seed,
+            },
+            corpus_digest=sonnet_digest(),
+            tokenizer_id=get_tokenizer_id(),
+        )
+        prompt_pool = load_workload(cache_dir, cache_key)
+        if prompt_pool is not None:
+            print(f"Loaded {num_prompts} prompts from the workload cache")
+            return prompt_pool
+    request_ids = None
+    if disable_prefix_caching:
+        # Generate unique request_ids for cache prevention
+        run_id = int(time.time() * 1000)
+        request_ids = [f"req_{i}_{run_id}" for i in range(num_prompts)]
+    prompt_pool = generate_sonnet_prompt_pool(
+        num_prompts=num_prompts,
+        mean_input_tokens=mean_input_tokens,
+        stddev_input_tokens=stddev_input_tokens,
+        mean_output_tokens=mean_output_tokens,
+        stddev_output_tokens=stddev_output_tokens,
+        tokenizer=get_tokenizer(),
+        seed=seed,
+        request_ids=request_ids,
+    )
+    if cache_dir:
+        save_workload(cache_dir, cache_key, *prompt_pool)
+    return prompt_pool
+
 
 def get_token_throughput_latencies(
     model: str,
@@ -40,6 +137,20 @@ def get_token_throughput_latencies(
     llm_api="openai",
     disable_prefix_caching: bool = False,
     unique_prompts: bool = False,
+    engine: str = "ray",
+    request_rate: Optional[float] = None,
+    arrival_distribution: str = "poisson",
+    burstiness: float = 1.0,
+    connection_pool_size: int = 1,
+    client_pool: Optional[ClientPool] = None,
+    prompt_pool: Optional[Tuple[List[Tuple[str, int]], List[int]]] = None,
+    streaming_summary: bool = False,
+    request_slos: Optional[Dict[str, float]] = None,
+    individual_responses_path: Optional[str] = None,
+    endpoints: Optional[List[Tuple[str, float]]] = None,
+    routing_policy: str = "round-robin",
+    trace_path: Optional[str] = None,
+    trace_speedup: float = 1.0,
 ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
     """Get the token throughput and latencies for the given model.
 
@@ -57,130 +168,413 @@ def get_token_throughput_latencies(
         llm_api: The name of the llm api to use. Either "openai" or "litellm".
         disable_prefix_caching: If True, add unique prefix to each prompt to prevent VLLM KV caching.
         unique_prompts: If True, use unique random seed per prompt for maximum uniqueness.
+        engine: How requests are driven. "ray" runs one thread and one ray actor per
+            concurrent request. "asyncio" runs every concurrent request from a single
+            event loop sharing one async HTTP client.
+        request_rate: If set, send requests open-loop at this many requests per second
+            instead of sending the next request when the previous one finishes. At most
+            num_concurrent_requests requests are in flight at once; sends that have to
+            wait for a free slot are reported as schedule lag.
+        arrival_distribution: The distribution of gaps between sends when request_rate
+            is set. One of "poisson", "constant" or "gamma".
+        burstiness: The gamma shape used by the "gamma" arrival distribution.
+        connection_pool_size: The number of keep-alive connections each ray client
+            holds open and reuses across requests.
+        client_pool: The ray clients to send requests with. It must hold at least
+            num_concurrent_requests clients. If not provided, a pool of
+            num_concurrent_requests clients is created for this run.
+        prompt_pool: Prompts and max output tokens from generate_prompt_pool, holding at
+            least max_num_completed_requests entries. If not provided, they are
+            generated for this run.
+        streaming_summary: If True, aggregate each result into quantile sketches as it
+            arrives and summarize those, instead of summarizing every result once the
+            run ends.
+        request_slos: Per-request SLOs in seconds on common_metrics.TTFT,
+            common_metrics.INTER_TOKEN_LAT and common_metrics.E2E_LAT. If set, the
+            summary reports the goodput and SLO attainment against them.
+        individual_responses_path: If set, write the metrics of each request to this
+            JSON lines file as soon as they are final. Combined with
+            streaming_summary, the metrics are not also kept in memory.
+        endpoints: If set, spread the requests across these (base URL, weight)
+            endpoints instead of sending them all to OPENAI_API_BASE, tag the metrics
+            of each request with its endpoint and summarize each endpoint too. The
+            client_pool must then have been constructed with num_endpoints set.
+        routing_policy: How requests are spread across endpoints, one of
+            llmperf.endpoints.ROUTING_POLICIES.
+        trace_path: If set, replay the requests of this trace (see llmperf.trace)
+            open-loop at their recorded offsets, instead of sending the prompt pool.
+            At most max_num_completed_requests requests of the trace are sent, with at
+            most num_concurrent_requests of them in flight. The summary reports how
+            late each was sent as schedule lag. request_rate must not be set.
+        trace_speedup: The factor to divide the gaps between trace arrivals by.
 
     Returns:
         A summary of the performance metrics collected across all completed requests
         (e.g. throughput, latencies, etc.)
-        The individual metrics for each request.
+        The individual metrics for each request, empty if they were only written to
+        individual_responses_path.
     """
     # Only use fixed seed if unique_prompts is False (default behavior)
     if not unique_prompts:
         random.seed(11111)
 
-    tokenizer = LlamaTokenizerFast.from_pretrained(
-        "hf-internal-testing/llama-tokenizer"
-    )
-    get_token_length = lambda text: len(tokenizer.encode(text))
-    
     if not additional_sampling_params:
         additional_sampling_params = {}
 
     completed_requests_lock = threading.Lock()
     completed_requests = []
+    uncounted_requests = []
     num_completed_requests = 0
+    summary = None
+    if streaming_summary:
+        summary = StreamingSummary(
+            SUMMARY_KEYS + [common_metrics.SCHEDULE_LAG, common_metrics.CONNECT_TIME],
+            request_slos=request_slos,
+        )
+    if trace_path is not None and request_rate is not None:
+        raise ValueError("request_rate can't be set when replaying a trace")
     # make up prompts outside of send loop for faster benchmarking loop
-    num_output_tokens_list = []
-    prompts = []
-    for i in range(max_num_completed_requests):
-        num_output_tokens = (sample_random_positive_int(
-            mean_output_tokens, stddev_output_tokens
-        ))
-        num_output_tokens_list.append(num_output_tokens)
-
-        # Generate unique request_id for cache prevention
-        request_id = f"req_{i}_{int(time.time() * 1000)}" if disable_prefix_caching else None
-
-        prompts.append(randomly_sample_sonnet_lines_prompt(
-            prompt_tokens_mean=mean_input_tokens,
-            prompt_tokens_stddev=stddev_input_tokens,
-            expect_output_tokens=num_output_tokens,
-            tokenizer=tokenizer,
+    if trace_path is not None:
+        prompt_pool = ([], [])
+    elif prompt_pool is None:
+        prompt_pool = generate_prompt_pool(
+            num_prompts=max_num_completed_requests,
+            mean_input_tokens=mean_input_tokens,
+            stddev_input_tokens=stddev_input_tokens,
+            mean_output_tokens=mean_output_tokens,
+            stddev_output_tokens=stddev_output_tokens,
             disable_prefix_caching=disable_prefix_caching,
-            request_id=request_id,
-        ))
+        )
+    prompts, num_output_tokens_list = prompt_pool
+
+    # The (send offset, request) of each request of an open-loop test, where the
+    # request is an index into the prompt pool or a request read from the trace.
+    schedule = None
+    trace_requests = None
+    if trace_path is not None:
+        trace_requests = prefetch(
+            itertools.islice(
+                read_trace(trace_path, speedup=trace_speedup),
+                max_num_completed_requests,
+            )
+        )
+        schedule = (
+            (offset, (prompt, sampling_params))
+            for offset, prompt, sampling_params in trace_requests
+        )
+    elif request_rate is not None:
+        arrival_times = generate_arrival_times(
+            num_requests=max_num_completed_requests,
+            request_rate=request_rate,
+            distribution=arrival_distribution,
+            burstiness=burstiness,
+        )
+        schedule = ((offset, i) for i, offset in enumerate(arrival_times))
+    num_scheduled = 0
+    last_offset = 0.0
+
+    def scheduled_requests():
+        nonlocal num_scheduled, last_offset
+        for offset, request in schedule:
+            if time.monotonic() - start_time >= test_timeout_s:
+                return
+            num_scheduled += 1
+            last_offset = offset
+            yield offset, request
+
+    router = None
+    if endpoints:
+        router = EndpointRouter(endpoints, routing_policy)
+
+    # Start every client before the clock starts so actor startup isn't measured.
+    async_client = None
+    if engine == "asyncio":
+        async_client = construct_async_client(
+            llm_api=llm_api,
+            max_connections=num_concurrent_requests,
+            num_endpoints=len(endpoints or []),
+        )
+    else:
+        if client_pool is None:
+            client_pool = ClientPool(
+                construct_clients(
+                    llm_api=llm_api,
+                    num_clients=num_concurrent_requests,
+                    connection_pool_size=connection_pool_size,
+                    num_endpoints=len(endpoints or []),
+                )
+            )
+        client_pool.warm_up()
+
+    responses_writer = None
+    if individual_responses_path is not None:
+        responses_writer = JsonlWriter(individual_responses_path)
+    keep_responses = summary is None or responses_writer is None
+    cpu_sampler = CpuSampler()
+    cpu_sampler.start()
+    client_cpu_sampler = None
+    if client_pool is not None:
+        client_cpu_sampler = CpuSampler(cpu_time=client_pool.cpu_time)
+        client_cpu_sampler.start()
     start_time = time.monotonic()
     pbar = tqdm(total=max_num_completed_requests)
 
-    def launch_request(thread_index):
+    def record_result(out, send_time: Optional[float] = None) -> bool:
+        """Finalize and store the metrics of a finished request.
+
+        Args:
+            out: The result returned by the client.
+            send_time: When the request was sent. If not known, it is derived from
+                the end to end latency.
+
+        Returns:
+            False if the result was dropped because enough requests already completed.
+        """
         nonlocal num_completed_requests
-        clients = construct_clients(llm_api=llm_api, num_clients=1)
-        req_launcher = RequestsLauncher(clients)
-        request_index = thread_index % max_num_completed_requests
+        request_metrics, gen_text, request_config = out
+        if request_config.endpoint is not None:
+            request_metrics[common_metrics.ENDPOINT] = request_config.endpoint
+        end_time = time.monotonic() - start_time
+        request_metrics[common_metrics.REQUEST_START_TIME] = (
+            send_time - start_time
+            if send_time is not None
+            else end_time - request_metrics[common_metrics.E2E_LAT]
+        )
+        request_metrics[common_metrics.REQUEST_END_TIME] = end_time
+        with completed_requests_lock:
+            if num_completed_requests >= max_num_completed_requests:
+                return False
+            num_output_tokens = request_metrics.get(common_metrics.SERVER_OUTPUT_TOKENS)
+            if num_output_tokens is not None:
+                set_output_token_metrics(request_metrics, num_output_tokens)
+                if summary is not None:
+                    summary.add(request_metrics)
+                if responses_writer is not None:
+                    responses_writer.write(request_metrics)
+            else:
+                # Counted in one batch after the run, so tokenizing never delays
+                # sending the next request.
+                uncounted_requests.append((request_metrics, gen_text))
+            if keep_responses:
+                completed_requests.append(request_metrics)
+            pbar.update(1)
+            num_completed_requests += 1
+        return True
+
+    def build_request_config(
+        request: Union[int, Tuple[Tuple[str, int], Dict[str, Any]]],
+    ) -> RequestConfig:
+        if isinstance(request, int):
+            prompt = prompts[request]
+            default_sampling_params = {"max_tokens": num_output_tokens_list[request]}
+            default_sampling_params.update(additional_sampling_params)
+        else:
+            # The trace's own sampling params take precedence.
+            prompt, trace_sampling_params = request
+            default_sampling_params = dict(additional_sampling_params)
+            default_sampling_params.update(trace_sampling_params)
+        return RequestConfig(
+            model=model,
+            prompt=prompt,
+            sampling_params=default_sampling_params,
+            llm_api=llm_api,
+            endpoint=router.acquire() if router is not None else None,
+        )
 
-        while (
+    def release_endpoint(request_config: RequestConfig) -> None:
+        if router is not None:
+            router.release(request_config.endpoint)
+
+    def should_continue() -> bool:
+        return (
             time.monotonic() - start_time < test_timeout_s
             and num_completed_requests < max_num_completed_requests
-        ):
+        )
 
-            default_sampling_params = {"max_tokens": num_output_tokens_list[request_index] }
-            default_sampling_params.update(additional_sampling_params)
-            request_config = RequestConfig(
-                model=model,
-                prompt=prompts[request_index],
-                sampling_params=default_sampling_params,
-                llm_api=llm_api,
-            )
-            req_launcher.launch_requests(request_config)
-
-            outs = req_launcher.get_next_ready()
-            all_metrics = []
-            for out in outs:
-                request_metrics, gen_text, _ = out
-                num_output_tokens = get_token_length(gen_text)
-                with completed_requests_lock:
-                    if num_completed_requests < max_num_completed_requests:
-                        if num_output_tokens > 1:
-                            request_metrics[common_metrics.INTER_TOKEN_LAT] = (
-                                request_metrics[common_metrics.E2E_LAT] - request_metrics[common_metrics.TTFT]
-                            ) / (num_output_tokens - 1)
-                        else:
-                            request_metrics[common_metrics.INTER_TOKEN_LAT] = 0
-                        request_metrics[common_metrics.NUM_OUTPUT_TOKENS] = num_output_tokens
-                        request_metrics[common_metrics.NUM_TOTAL_TOKENS] = request_metrics[common_metrics.NUM_INPUT_TOKENS] + num_output_tokens
-                        request_metrics[common_metrics.REQ_OUTPUT_THROUGHPUT] = num_output_tokens / request_metrics[common_metrics.E2E_LAT]
-                        all_metrics.append(request_metrics)
-                        completed_requests.extend(all_metrics)
-                        pbar.update(len(all_metrics))
-                        num_completed_requests += len(all_metrics)
-                        request_index = (request_index + num_concurrent_requests) % max_num_completed_requests
-
-    threads = []
-    for i in range(num_concurrent_requests):
-        thread = threading.Thread(target=launch_request, args=(i,))
-        threads.append(thread)
-        thread.start()
-
-    for thread in threads:
-        thread.join()
+    def launch_request(thread_index):
+        request_index = thread_index % max_num_completed_requests
+
+        while should_continue():
+            request_config = build_request_config(request_index)
+            send_time = time.monotonic()
+            try:
+                out = client_pool.request(request_config)
+            finally:
+                release_endpoint(request_config)
+            if out is not None and record_result(out, send_time):
+                request_index = (
+                    request_index + num_concurrent_requests
+                ) % max_num_completed_requests
+
+    async def launch_request_async(client, worker_index):
+        request_index = worker_index % max_num_completed_requests
+
+        while should_continue():
+            request_config = build_request_config(request_index)
+            send_time = time.monotonic()
+            try:
+                out = await client.llm_request(request_config)
+            finally:
+                release_endpoint(request_config)
+            if record_result(out, send_time):
+                request_index = (
+                    request_index + num_concurrent_requests
+                ) % max_num_completed_requests
+
+    def launch_scheduled_requests(send_queue):
+        while True:
+            item = send_queue.get()
+            if item is None:
+                return
+            request, scheduled_time = item
+            if time.monotonic() - start_time >= test_timeout_s:
+                continue
+            request_config = build_request_config(request)
+            send_time = time.monotonic()
+            schedule_lag = send_time - scheduled_time
+            try:
+                out = client_pool.request(request_config)
+            finally:
+                release_endpoint(request_config)
+            if out is not None:
+                out[0][common_metrics.SCHEDULE_LAG] = schedule_lag
+                record_result(out, send_time)
+
+    def run_ray_workers():
+        threads = []
+        if schedule is None:
+            for i in range(num_concurrent_requests):
+                thread = threading.Thread(target=launch_request, args=(i,))
+                threads.append(thread)
+                thread.start()
+        else:
+            send_queue = queue.Queue()
+            for _ in range(num_concurrent_requests):
+                thread = threading.Thread(
+                    target=launch_scheduled_requests, args=(send_queue,)
+                )
+                threads.append(thread)
+                thread.start()
+            for offset, request in scheduled_requests():
+                delay = start_time + offset - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                send_queue.put((request, start_time + offset))
+            for _ in threads:
+                send_queue.put(None)
+
+        for thread in threads:
+            thread.join()
+
+    async def launch_scheduled_request_async(client, slots, request, scheduled_time):
+        request_config = build_request_config(request)
+        try:
+            send_time = time.monotonic()
+            schedule_lag = send_time - scheduled_time
+            out = await client.llm_request(request_config)
+        finally:
+            release_endpoint(request_config)
+            slots.release()
+        out[0][common_metrics.SCHEDULE_LAG] = schedule_lag
+        record_result(out, send_time)
+
+    async def run_async_workers():
+        try:
+            if schedule is None:
+                await asyncio.gather(
+                    *[
+                        launch_request_async(async_client, i)
+                        for i in range(num_concurrent_requests)
+                    ]
+                )
+            else:
+                slots = asyncio.Semaphore(num_concurrent_requests)
+                tasks = []
+                for offset, request in scheduled_requests():
+                    delay = start_time + offset - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    await slots.acquire()
+                    tasks.append(
+                        asyncio.create_task(
+                            launch_scheduled_request_async(
+                                async_client, slots, request, start_time + offset
+                            )
+                        )
+                    )
+                await asyncio.gather(*tasks)
+        finally:
+            await async_client.close()
+
+    if engine == "asyncio":
+        asyncio.run(run_async_workers())
+    else:
+        run_ray_workers()
+        # collect requests that are still in flight, e.g. from a worker that failed.
+        for out in client_pool.drain():
+            record_result(out)
 
     pbar.close()
     end_time = time.monotonic()
+    driver_cpu_samples = cpu_sampler.stop()
+    client_cpu_samples = client_cpu_sampler.stop() if client_cpu_sampler else None
+    if trace_requests is not None:
+        trace_requests.close()
+        # The offered rate of a replay is that of the part of the trace it sent.
+        if last_offset > 0:
+            request_rate = (num_scheduled - 1) / last_offset
     if end_time - start_time >= test_timeout_s:
         print("Test timed out before all requests could be completed.")
 
-    # check one last time that there are no remaining results to collect.
-    clients = construct_clients(llm_api=llm_api, num_clients=1)
-    req_launcher = RequestsLauncher(clients)
-    outs = req_launcher.get_next_ready()
-    all_metrics = []
-    for out in outs:
-        request_metrics, gen_text, _ = out
-        num_output_tokens = get_token_length(gen_text)
-        with completed_requests_lock:
-            if num_completed_requests < max_num_completed_requests:
-                if num_output_tokens > 1:
-                    request_metrics[common_metrics.INTER_TOKEN_LAT] = (
-                        request_metrics[common_metrics.E2E_LAT] - request_metrics[common_metrics.TTFT]
-                    ) / (num_output_tokens - 1)
-                else:
-                    request_metrics[common_metrics.INTER_TOKEN_LAT] = 0
-                request_metrics[common_metrics.NUM_OUTPUT_TOKENS] = num_output_tokens
-                request_metrics[common_metrics.NUM_TOTAL_TOKENS] = request_metrics[common_metrics.NUM_INPUT_TOKENS] + num_output_tokens
-                request_metrics[common_metrics.REQ_OUTPUT_THROUGHPUT] = num_output_tokens / request_metrics[common_metrics.E2E_LAT]
-                completed_requests.extend(request_metrics)
+    if uncounted_requests:
+        num_output_tokens_list = count_tokens([text for _, text in uncounted_requests])
+        for (request_metrics, _), num_output_tokens in zip(
+            uncounted_requests, num_output_tokens_list
+        ):
+            set_output_token_metrics(request_metrics, num_output_tokens)
+            if summary is not None:
+                summary.add(request_metrics)
+            if responses_writer is not None:
+                responses_writer.write(request_metrics)
+    if responses_writer is not None:
+        responses_writer.close()
 
     print(f"\Results for token benchmark for {model} queried with the {llm_api} api.\n")
-    ret = metrics_summary(completed_requests, start_time, end_time)
+    ret = metrics_summary(
+        completed_requests,
+        start_time,
+        end_time,
+        request_rate=request_rate,
+        driver_cpu_samples=driver_cpu_samples,
+        client_cpu_samples=client_cpu_samples,
+        streaming_summary=summary,
+        request_slos=request_slos,
+    )
+    steady_state = steady_state_metrics(
+        completed_requests
+        if keep_responses
+        else iter_jsonl(individual_responses_path, keys=TIMELINE_KEYS)
+    )
+    if steady_state is not None:
+        ret[common_metrics.STEADY_STATE] = steady_state
+    if trace_path is not None:
+        # Offsets are measured after the speed-up, so the span of the trace itself
+        # is that much longer than the replay.
+        trace_duration = last_offset * trace_speedup
+        print(
+            f"Trace Replay: sent {num_scheduled} requests spanning {trace_duration}s "
+            f"of the trace, replayed over {last_offset}s at a speed-up of "
+            f"{trace_speedup}"
+        )
+        ret[common_metrics.TRACE_DURATION] = trace_duration
+        ret[common_metrics.REPLAY_DURATION] = last_offset
+        schedule_lag = ret.get(common_metrics.SCHEDULE_LAG)
+        if schedule_lag is not None:
+            print(
+                f"Schedule Slip: p50 = {schedule_lag['quantiles']['p50']}, "
+                f"p99 = {schedule_lag['quantiles']['p99']}, "
+                f"max = {schedule_lag['max']}"
+            )
 
     metadata = {
         "model": model,
@@ -190,22 +584,202 @@ def get_token_throughput_latencies(
         "stddev_output_tokens": stddev_output_tokens,
         "num_concurrent_requests": num_concurrent_requests,
         "additional_sampling_params": additional_sampling_params,
+        "engine": engine,
+        "connection_pool_size": connection_pool_size,
     }
+    if trace_path is not None:
+        metadata["trace_path"] = trace_path
+        metadata["trace_speedup"] = trace_speedup
+    elif request_rate is not None:
+        metadata["request_rate"] = request_rate
+        metadata["arrival_distribution"] = arrival_distribution
+        metadata["burstiness"] = burstiness
+    if endpoints:
+        metadata["endpoints"] = [url for url, _ in endpoints]
+        metadata["endpoint_weights"] = [weight for _, weight in endpoints]
+        metadata["routing_policy"] = routing_policy
 
     metadata["results"] = ret
-        
+
     return metadata, completed_requests
 
 
+# The metrics whose distribution every summary reports.
+SUMMARY_KEYS = [
+    common_metrics.INTER_TOKEN_LAT,
+    common_metrics.TTFT,
+    common_metrics.E2E_LAT,
+    common_metrics.REQ_OUTPUT_THROUGHPUT,
+    common_metrics.NUM_INPUT_TOKENS,
+    common_metrics.NUM_OUTPUT_TOKENS,
+]
+
+
+def steady_state_metrics(metrics: Iterable) -> Optional[Dict[str, Any]]:
+    """Detect the steady state window of a run and summarize the requests within it.
+
+    Args:
+        metrics: The metrics of every request of the run. Read one at a time, and
+            only their per-request values are kept, so they can be streamed from the
+            individual responses file.
+
+    Returns:
+        The steady state summary, or None if the run never reached a steady state.
+    """
+    builder = TimelineBuilder()
+    for request_metrics in metrics:
+        builder.add(request_metrics)
+    timeline = builder.build()
+    window = detect_steady_state(timeline, builder.requests)
+    if window is None:
+        print("No steady state window detected.")
+        return None
+    ret = steady_state_summary(timeline, builder.requests, window)
+    print(f"Steady State Window: {window[0]}s - {window[1]}s")
+    print(f"    Output Throughput: {ret[common_metrics.OUTPUT_THROUGHPUT]}")
+    print(
+        "    Completed Requests Per Minute: "
+        f"{ret[common_metrics.COMPLETED_REQUESTS_PER_MIN]}"
+    )
+    for key in [
+        common_metrics.TTFT,
+        common_metrics.INTER_TOKEN_LAT,
+        common_metrics.E2E_LAT,
+    ]:
+        quantiles = ", ".join(
+            f"{quantile} = {value}" for quantile, value in ret[key]["quantiles"].items()
+        )
+        print(f"    {key}: {quantiles}")
+    return ret
+
+
+# The loads run_saturation_search can search over.
+SEARCH_LOADS = ["concurrency", "request-rate"]
+
+
+def set_output_token_metrics(
+    request_metrics: Dict[str, Any], num_output_tokens: int
+) -> None:
+    """Set the metrics of a finished request that depend on its output token count."""
+    if num_output_tokens > 1:
+        request_metrics[common_metrics.INTER_TOKEN_LAT] = (
+            request_metrics[common_metrics.E2E_LAT]
+            - request_metrics[common_metrics.TTFT]
+        ) / (num_output_tokens - 1)
+    else:
+        request_metrics[common_metrics.INTER_TOKEN_LAT] = 0
+    request_metrics[common_metrics.NUM_OUTPUT_TOKENS] = num_output_tokens
+    request_metrics[common_metrics.NUM_TOTAL_TOKENS] = (
+        request_metrics[common_metrics.NUM_INPUT_TOKENS] + num_output_tokens
+    )
+    request_metrics[common_metrics.REQ_OUTPUT_THROUGHPUT] = (
+        num_output_tokens / request_metrics[common_metrics.E2E_LAT]
+        if request_metrics[common_metrics.E2E_LAT]
+        else 0
+    )
+
+
+def token_gap_series(token_arrival_times: Iterable) -> Dict[str, pd.Series]:
+    """Compute inter-token latency distributions from per-request token arrival times.
+
+    Args:
+        token_arrival_times: For each request, the offsets at which its tokens arrived.
+
+    Returns:
+        The per-request p50 and p99 of the gaps between consecutive tokens, and the
+        gaps of all requests pooled together.
+    """
+    gaps = [
+        np.diff(np.asarray(arrivals, dtype=np.float64))
+        for arrivals in token_arrival_times
+        if arrivals is not None and len(arrivals) > 1
+    ]
+    per_request = (
+        np.array([np.quantile(g, [0.5, 0.99]) for g in gaps])
+        if gaps
+        else np.empty((0, 2))
+    )
+    return {
+        common_metrics.ITL_P50: pd.Series(per_request[:, 0]),
+        common_metrics.ITL_P99: pd.Series(per_request[:, 1]),
+        common_metrics.POOLED_ITL: pd.Series(
+            np.concatenate(gaps) if gaps else np.empty(0)
+        ),
+    }
+
+
+# The distributions reported for each endpoint of a routed run.
+ENDPOINT_SUMMARY_KEYS = [
+    common_metrics.TTFT,
+    common_metrics.INTER_TOKEN_LAT,
+    common_metrics.E2E_LAT,
+]
+ENDPOINT_QUANTILES = [0.5, 0.9, 0.99]
+
+
+def endpoint_result(
+    num_started: int,
+    num_errors: int,
+    num_output_tokens: float,
+    distributions: Dict[str, Tuple[Dict[float, float], float]],
+    duration: float,
+) -> Dict[str, Any]:
+    """Summarize the requests a routed run sent to one endpoint.
+
+    Args:
+        num_started: The number of requests sent to the endpoint.
+        num_errors: The number of them that errored.
+        num_output_tokens: The output tokens of the requests that didn't error.
+        distributions: The quantiles and mean of each of ENDPOINT_SUMMARY_KEYS.
+        duration: The duration of the test in seconds.
+
+    Returns:
+        The request counts, error rate, output throughput and latency distributions
+        of the endpoint.
+    """
+    ret = {
+        common_metrics.NUM_REQ_STARTED: num_started,
+        common_metrics.NUM_COMPLETED_REQUESTS: num_started - num_errors,
+        common_metrics.ERROR_RATE: num_errors / num_started if num_started else 0,
+        common_metrics.OUTPUT_THROUGHPUT: num_output_tokens / duration,
+    }
+    for key, (quantiles, mean) in distributions.items():
+        ret[key] = {
+            "quantiles": {
+                f"p{int(quantile * 100)}": value
+                for quantile, value in quantiles.items()
+            },
+            "mean": mean,
+        }
+    return ret
+
+
 def metrics_summary(
-    metrics: List[Dict[str, Any]], start_time: int, end_time: int
+    metrics: List[Dict[str, Any]],
+    start_time: int,
+    end_time: int,
+    request_rate: Optional[float] = None,
+    driver_cpu_samples: Optional[List[float]] = None,
+    client_cpu_samples: Optional[List[float]] = None,
+    streaming_summary: Optional[StreamingSummary] = None,
+    request_slos: Optional[Dict[str, float]] = None,
 ) -> Dict[str, Any]:
     """Generate a summary over metrics generated from potentially multiple instances of this client.
 
     Args:
-        metrics: The metrics to summarize.
+        metrics: The metrics to summarize. Ignored if streaming_summary is set.
         start_time: The time the test started.
         end_time: The time the test ended.
+        request_rate: The offered request rate of an open-loop test, if any.
+        driver_cpu_samples: The CPU utilization of the driver sampled during the test.
+        client_cpu_samples: The CPU utilization of the client actors sampled during
+            the test, in cores.
+        streaming_summary: If set, summarize the aggregates it accumulated during the
+            test instead of metrics. Quantiles are then estimated to within its
+            relative accuracy; all other values are exact.
+        request_slos: If set, report the goodput and SLO attainment of the requests
+            against these per-request SLOs, keyed by metric. With streaming_summary,
+            its own SLOs are used instead.
 
     Returns:
         A summary with the following information:
@@ -220,69 +794,184 @@ def metrics_summary(
                 - Number of tokens processed per request
                 - Number of tokens generated per request
                 - User throughput (tokens / s)
+                - Schedule lag, for open-loop tests
+                - The p50 and p99 of each request's gaps between tokens, and the
+                  gaps between tokens pooled across requests, when clients report
+                  token arrival times
+            - Offered and achieved request rate, for open-loop tests
+            - Client overhead: the share of request time clients spent processing
+              responses, driver and client CPU use, and warnings when the load
+              generator itself was likely the bottleneck
+            - For runs routed across several endpoints, the request counts, error
+              rate, output throughput and TTFT, inter token latency and end to end
+              latency quantiles of each endpoint
     """
     ret = {}
+    quantile_levels = [0.25, 0.5, 0.75, 0.9, 0.95, 0.99]
 
-    def flatten(item):
-        for sub_item in item:
-            if isinstance(sub_item, Iterable) and not isinstance(sub_item, str):
-                yield from flatten(sub_item)
-            else:
-                yield sub_item
+    if streaming_summary is not None:
+        distributions = {
+            key: (
+                sketch.quantiles(quantile_levels),
+                sketch.mean,
+                sketch.min,
+                sketch.max,
+                sketch.stddev,
+            )
+            for key, sketch in streaming_summary.sketches.items()
+            if sketch.count or key in SUMMARY_KEYS
+        }
+        num_started = streaming_summary.num_started
+        error_code_frequency = dict(streaming_summary.error_codes)
+        connection_reuse_rate = streaming_summary.connection_reuse_rate()
+        num_output_tokens = streaming_summary.totals[common_metrics.NUM_OUTPUT_TOKENS]
+        num_completed_requests = streaming_summary.num_completed
+        # The client overhead only depends on the sums of the per-request metrics.
+        overhead_df = pd.DataFrame([streaming_summary.totals])
+        goodput = streaming_summary.goodput
+        endpoint_results = {
+            endpoint: endpoint_result(
+                endpoint_summary.num_started,
+                sum(endpoint_summary.error_codes.values()),
+                endpoint_summary.totals[common_metrics.NUM_OUTPUT_TOKENS],
+                {
+                    key: (
+                        endpoint_summary.sketches[key].quantiles(ENDPOINT_QUANTILES),
+                        endpoint_summary.sketches[key].mean,
+                    )
+                    for key in ENDPOINT_SUMMARY_KEYS
+                },
+                end_time - start_time,
+            )
+            for endpoint, endpoint_summary in streaming_summary.endpoints.items()
+        }
+    else:
 
-    df = pd.DataFrame(metrics)
-    df_without_errored_req = df[df[common_metrics.ERROR_CODE].isna()]
-    
-    for key in [
-        common_metrics.INTER_TOKEN_LAT,
-        common_metrics.TTFT,
-        common_metrics.E2E_LAT,
-        common_metrics.REQ_OUTPUT_THROUGHPUT,
-        common_metrics.NUM_INPUT_TOKENS,
-        common_metrics.NUM_OUTPUT_TOKENS
-    ]:
+        def flatten(item):
+            for sub_item in item:
+                if isinstance(sub_item, Iterable) and not isinstance(sub_item, str):
+                    yield from flatten(sub_item)
+                else:
+                    yield sub_item
+
+        df = pd.DataFrame(metrics)
+        df_without_errored_req = df[df[common_metrics.ERROR_CODE].isna()]
+
+        summary_keys = list(SUMMARY_KEYS)
+        if common_metrics.SCHEDULE_LAG in df.columns:
+            summary_keys.append(common_metrics.SCHEDULE_LAG)
+        if common_metrics.CONNECT_TIME in df.columns:
+            summary_keys.append(common_metrics.CONNECT_TIME)
+
+        summary_series = {
+            key: pd.Series(list(flatten(df_without_errored_req[key]))).dropna()
+            for key in summary_keys
+        }
+        if common_metrics.TOKEN_ARRIVAL_TIMES in df.columns:
+            summary_series.update(
+                token_gap_series(
+                    df_without_errored_req[common_metrics.TOKEN_ARRIVAL_TIMES]
+                )
+            )
+        distributions = {
+            key: (
+                series.quantile(quantile_levels).to_dict(),
+                series.mean(),
+                series.min(),
+                series.max(),
+                series.std(),
+            )
+            for key, series in summary_series.items()
+        }
+        num_started = len(metrics)
+        error_code_frequency = dict(
+            df[common_metrics.ERROR_CODE].dropna().value_counts()
+        )
+        connection_reuse_rate = None
+        if common_metrics.CONNECTION_REUSED in df.columns:
+            connection_reuse_rate = df[common_metrics.CONNECTION_REUSED].mean()
+        num_output_tokens = df_without_errored_req[
+            common_metrics.NUM_OUTPUT_TOKENS
+        ].sum()
+        num_completed_requests = len(df_without_errored_req)
+        overhead_df = df_without_errored_req
+        goodput = None
+        if request_slos:
+            goodput = GoodputCounter(request_slos)
+            for request_metrics in metrics:
+                goodput.add(request_metrics)
+        endpoint_results = {}
+        if common_metrics.ENDPOINT in df.columns:
+            for endpoint, endpoint_df in df.groupby(
+                common_metrics.ENDPOINT, sort=False
+            ):
+                completed_df = endpoint_df[
+                    endpoint_df[common_metrics.ERROR_CODE].isna()
+                ]
+                endpoint_results[endpoint] = endpoint_result(
+                    len(endpoint_df),
+                    len(endpoint_df) - len(completed_df),
+                    completed_df[common_metrics.NUM_OUTPUT_TOKENS].sum(),
+                    {
+                        key: (
+                            completed_df[key]
+                            .dropna()
+                            .quantile(ENDPOINT_QUANTILES)
+                            .to_dict(),
+                            completed_df[key].mean(),
+                        )
+                        for key in ENDPOINT_SUMMARY_KEYS
+                    },
+                    end_time - start_time,
+                )
+
+    for key, (quantiles, mean, min_value, max_value, stddev) in distributions.items():
         print(key)
         ret[key] = {}
-        series = pd.Series(list(flatten(df_without_errored_req[key]))).dropna()
-        quantiles = series.quantile([0.25, 0.5, 0.75, 0.9, 0.95, 0.99]).to_dict()
         quantiles_reformatted_keys = {}
         for quantile, value in quantiles.items():
             reformatted_key = f"p{int(quantile * 100)}"
             print(f"    {reformatted_key} = {value}")
             quantiles_reformatted_keys[reformatted_key] = value
         ret[key]["quantiles"] = quantiles_reformatted_keys
-        mean = series.mean()
         print(f"    mean = {mean}")
         ret[key]["mean"] = mean
-        print(f"    min = {series.min()}")
-        ret[key]["min"] = series.min()
-        print(f"    max = {series.max()}")
-        ret[key]["max"] = series.max()
-        print(f"    stddev = {series.std()}")
-        ret[key]["stddev"] = series.std()
-
-    ret[common_metrics.NUM_REQ_STARTED] = len(metrics)
-
-    error_codes = df[common_metrics.ERROR_CODE].dropna()
-    num_errors = len(error_codes)
-    ret[common_metrics.ERROR_RATE] = num_errors / len(metrics) if len(metrics) else 0
+        print(f"    min = {min_value}")
+        ret[key]["min"] = min_value
+        print(f"    max = {max_value}")
+        ret[key]["max"] = max_value
+        print(f"    stddev = {stddev}")
+        ret[key]["stddev"] = stddev
+
+    if streaming_summary is not None:
+        print(
+            "Quantiles are estimated from streaming sketches to within a relative "
+            f"error of {streaming_summary.relative_accuracy}"
+        )
+        ret[common_metrics.QUANTILE_RELATIVE_ACCURACY] = (
+            streaming_summary.relative_accuracy
+        )
+
+    ret[common_metrics.NUM_REQ_STARTED] = num_started
+
+    if connection_reuse_rate is not None:
+        print(f"Connection Reuse Rate: {connection_reuse_rate}")
+        ret[common_metrics.CONNECTION_REUSE_RATE] = connection_reuse_rate
+
+    num_errors = sum(error_code_frequency.values())
+    ret[common_metrics.ERROR_RATE] = num_errors / num_started if num_started else 0
     ret[common_metrics.NUM_ERRORS] = num_errors
     print(f"Number Of Errored Requests: {num_errors}")
-    error_code_frequency = dict(error_codes.value_counts())
     if num_errors:
-        error_code_frequency = dict(error_codes.value_counts())
         print("Error Code Frequency")
         print(error_code_frequency)
     ret[common_metrics.ERROR_CODE_FREQ] = str(error_code_frequency)
 
-    overall_output_throughput = df_without_errored_req[
-        common_metrics.NUM_OUTPUT_TOKENS
-    ].sum() / (end_time - start_time)
+    overall_output_throughput = num_output_tokens / (end_time - start_time)
 
     print(f"Overall Output Throughput: {overall_output_throughput}")
     ret[common_metrics.OUTPUT_THROUGHPUT] = overall_output_throughput
 
-    num_completed_requests = len(df_without_errored_req)
     num_completed_requests_per_min = (
         num_completed_requests / (end_time - start_time) * 60
     )
@@ -291,16 +980,229 @@ def metrics_summary(
 
     ret[common_metrics.NUM_COMPLETED_REQUESTS] = num_completed_requests
     ret[common_metrics.COMPLETED_REQUESTS_PER_MIN] = num_completed_requests_per_min
-    
+
+    if goodput is not None:
+        goodput_summary = goodput.summary(end_time - start_time)
+        print(f"Request SLOs: {goodput_summary[common_metrics.REQUEST_SLOS]}")
+        print(f"Goodput: {goodput_summary[common_metrics.GOODPUT]}")
+        print(f"SLO Attainment: {goodput_summary[common_metrics.SLO_ATTAINMENT]}")
+        print(f"SLO Misses: {goodput_summary[common_metrics.SLO_MISSES]}")
+        ret.update(goodput_summary)
+
+    if request_rate is not None:
+        achieved_request_rate = num_completed_requests / (end_time - start_time)
+        print(f"Offered Request Rate: {request_rate}")
+        print(f"Achieved Request Rate: {achieved_request_rate}")
+        ret[common_metrics.OFFERED_REQUEST_RATE] = request_rate
+        ret[common_metrics.ACHIEVED_REQUEST_RATE] = achieved_request_rate
+
+    client_overhead = client_overhead_summary(
+        overhead_df, end_time - start_time, driver_cpu_samples, client_cpu_samples
+    )
+    print("Client Overhead")
+    for key, value in client_overhead.items():
+        if key != common_metrics.CLIENT_OVERHEAD_WARNINGS:
+            print(f"    {key} = {value}")
+    for warning in client_overhead[common_metrics.CLIENT_OVERHEAD_WARNINGS]:
+        print(
+            f"WARNING: {warning}. The load generator may be the bottleneck; "
+            "consider discarding these results."
+        )
+    ret[common_metrics.CLIENT_OVERHEAD] = client_overhead
+
+    if endpoint_results:
+        print("Per Endpoint")
+        for endpoint, result in endpoint_results.items():
+            print(
+                f"    {endpoint}: "
+                f"{result[common_metrics.NUM_REQ_STARTED]} requests, "
+                f"error rate {result[common_metrics.ERROR_RATE]}, "
+                f"output throughput {result[common_metrics.OUTPUT_THROUGHPUT]}, "
+                + ", ".join(
+                    f"{key} p50 {result[key]['quantiles']['p50']} "
+                    f"p99 {result[key]['quantiles']['p99']}"
+                    for key in ENDPOINT_SUMMARY_KEYS
+                )
+            )
+        ret[common_metrics.ENDPOINTS] = endpoint_results
+
     return ret
 
 
+def results_filename(
+    model: str, mean_input_tokens: int, mean_output_tokens: int
+) -> str:
+    """The prefix of the names of the result files of a load test."""
+    filename = f"{model}_{mean_input_tokens}_{mean_output_tokens}"
+    filename = re.sub(r"[^\w\d-]+", "-", filename)
+    return re.sub(r"-{2,}", "-", filename)
+
+
+def individual_responses_jsonl_path(
+    results_dir: str, model: str, mean_input_tokens: int, mean_output_tokens: int
+) -> str:
+    """Create results_dir and return where to write the JSON lines individual responses."""
+    Path(results_dir).mkdir(parents=True, exist_ok=True)
+    filename = results_filename(model, mean_input_tokens, mean_output_tokens)
+    return os.path.join(results_dir, f"{filename}_individual_responses.jsonl")
+
+
+def write_summary(
+    summary: Dict[str, Any],
+    results_dir: Path,
+    filename: str,
+    catalog_path: Optional[str] = None,
+) -> None:
+    """Write a summary as the flattened <filename>_summary.json in results_dir.
+
+    If catalog_path is set, the summary is also registered in the results catalog
+    there.
+    """
+    summary_filename = f"{filename}_summary"
+    summary_path = results_dir / f"{summary_filename}.json"
+    results = LLMPerfResults(name=summary_filename, metadata=summary)
+    try:
+        with open(summary_path, "w") as f:
+            json.dump(results.to_dict(), f, indent=4, default=str)
+    except Exception as e:
+        print(results.to_dict())
+        raise e
+    if catalog_path:
+        with ResultsCatalog(catalog_path) as catalog:
+            catalog.register(str(summary_path))
+
+
+def save_results(
+    summary: Dict[str, Any],
+    individual_responses: Optional[List[Dict[str, Any]]],
+    results_dir: str,
+    model: str,
+    mean_input_tokens: int,
+    mean_output_tokens: int,
+    user_metadata: Dict[str, Any],
+    columnar_format: Optional[str] = None,
+    catalog_path: Optional[str] = None,
+) -> None:
+    """Write the summary, individual responses and timeline of a load test to results_dir.
+
+    Args:
+        summary: The summary returned by get_token_throughput_latencies.
+        individual_responses: The individual metrics for each request, or None if they
+            were already written to <results_dir>/<name>_individual_responses.jsonl
+            during the test.
+        results_dir: The directory to save the results to.
+        model: The name of the model that was queried.
+        mean_input_tokens: The mean number of tokens sent in the prompt for the request.
+        mean_output_tokens: The mean number of tokens generated per request.
+        user_metadata: Additional metadata to include in the results.
+        columnar_format: If set, also write the individual responses to a columnar
+            file of this format, one of llmperf.columnar.COLUMNAR_FORMATS.
+        catalog_path: If set, register the summary in the results catalog there.
+    """
+    filename = results_filename(model, mean_input_tokens, mean_output_tokens)
+    individual_responses_filename = f"{filename}_individual_responses"
+    timeline_filename = f"{filename}_timeline"
+
+    # Update to metadata.
+    summary.update(user_metadata)
+
+    results_dir = Path(results_dir)
+    if not results_dir.exists():
+        results_dir.mkdir(parents=True)
+    elif not results_dir.is_dir():
+        raise ValueError(f"{results_dir} is not a directory")
+
+    write_summary(summary, results_dir, filename, catalog_path)
+
+    jsonl_path = results_dir / f"{individual_responses_filename}.jsonl"
+    if columnar_format is not None:
+        write_columnar_responses(
+            str(results_dir / f"{individual_responses_filename}.{columnar_format}"),
+            (
+                read_jsonl(jsonl_path)
+                if individual_responses is None
+                else [individual_responses]
+            ),
+            columnar_format,
+        )
+
+    if individual_responses is None:
+        individual_responses = iter_jsonl(jsonl_path, keys=TIMELINE_KEYS)
+    else:
+        try:
+            with open(results_dir / f"{individual_responses_filename}.json", "w") as f:
+                # Token arrival times are arrays, written out as lists.
+                json.dump(individual_responses, f, indent=4, default=list)
+        except Exception as e:
+            print(individual_responses)
+            raise e
+
+    timeline = build_timeline(individual_responses)
+    if not timeline.empty:
+        timeline.to_csv(results_dir / f"{timeline_filename}.csv", index=False)
+
+
+def summarize_individual_responses(
+    path: str,
+    request_slos: Optional[Dict[str, float]] = None,
+    chunk_size: int = 10000,
+    num_concurrent_requests: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Summarize the JSON lines individual responses of a load test.
+
+    The file is read in chunks into a streaming summary, so runs of any length can be
+    summarized, including runs that were interrupted before writing their summary.
+
+    Args:
+        path: The individual responses file.
+        request_slos: If set, report the goodput against these per-request SLOs.
+        chunk_size: The number of responses to read at once.
+        num_concurrent_requests: The concurrency level of the run, if known. It is
+            not in the responses, and charts and the results catalog need it.
+
+    Returns:
+        The summary, with the same results as get_token_throughput_latencies.
+    """
+    summary = StreamingSummary(
+        SUMMARY_KEYS + [common_metrics.SCHEDULE_LAG, common_metrics.CONNECT_TIME],
+        request_slos=request_slos,
+    )
+    end_time = 0
+    for chunk in read_jsonl(path, chunk_size=chunk_size):
+        for request_metrics in chunk:
+            summary.add(request_metrics)
+            end_time = max(
+                end_time, request_metrics.get(common_metrics.REQUEST_END_TIME) or 0
+            )
+    print(f"\nResults for the {summary.num_started} requests in {path}.\n")
+    ret = metrics_summary(None, 0, end_time, streaming_summary=summary)
+    steady_state = steady_state_metrics(iter_jsonl(path, keys=TIMELINE_KEYS))
+    if steady_state is not None:
+        ret[common_metrics.STEADY_STATE] = steady_state
+    metadata = {"results": ret, "partial_summary": True}
+    if num_concurrent_requests is not None:
+        metadata["num_concurrent_requests"] = num_concurrent_requests
+    return metadata
+
+
+def validate_endpoints(llm_api: str, routing_policy: str) -> None:
+    """Raise if requests of llm_api can't be routed across endpoints with routing_policy."""
+    if llm_api not in ENDPOINT_SUPPORTED_APIS:
+        raise ValueError(
+            f"only the llm apis {ENDPOINT_SUPPORTED_APIS} can be routed across endpoints"
+        )
+    if routing_policy not in ROUTING_POLICIES:
+        raise ValueError(
+            f"routing_policy must be one of {ROUTING_POLICIES}, got {routing_policy}"
+        )
+
+
 def run_token_benchmark(
     llm_api: str,
     model: str,
     test_timeout_s: int,
     max_num_completed_requests: int,
-    num_concurrent_requests: int,
+    num_concurrent_requests: Union[int, List[int]],
     mean_input_tokens: int,
     stddev_input_tokens: int,
     mean_output_tokens: int,
@@ -310,6 +1212,23 @@ def run_token_benchmark(
     user_metadata: Dict[str, Any],
     disable_prefix_caching: bool = False,
     unique_prompts: bool = False,
+    engine: str = "ray",
+    request_rate: Optional[float] = None,
+    arrival_distribution: str = "poisson",
+    burstiness: float = 1.0,
+    connection_pool_size: int = 1,
+    rounds: Optional[int] = None,
+    cooldown_s: float = 0,
+    workload_cache_dir: Optional[str] = None,
+    streaming_summary: bool = False,
+    request_slos: Optional[Dict[str, float]] = None,
+    jsonl_responses: bool = False,
+    columnar_format: Optional[str] = None,
+    catalog_path: Optional[str] = None,
+    endpoints: Optional[List[Tuple[str, float]]] = None,
+    routing_policy: str = "round-robin",
+    trace_path: Optional[str] = None,
+    trace_speedup: float = 1.0,
 ):
     """
     Args:
@@ -318,7 +1237,10 @@ def run_token_benchmark(
         max_num_completed_requests: The number of requests to complete before finishing the test.
         test_timeout_s: The amount of time to run the test for before reporting results.
         num_concurrent_requests: The number of concurrent requests to make. Increase
-            this to increase the amount of load and vice versa.
+            this to increase the amount of load and vice versa. If a list is given,
+            the whole sweep runs in this process, sharing the tokenizer, prompt pool and
+            clients. When sweeping or when rounds is set, each level's results are saved
+            to results_dir/<level>.
         mean_input_tokens: The mean number of tokens to send in the prompt for the request.
         stddev_input_tokens: The standard deviation of the number of tokens to send in the prompt for the request.
         mean_output_tokens: The mean number of tokens to generate per request.
@@ -329,58 +1251,390 @@ def run_token_benchmark(
         user_metadata: Additional metadata to include in the results.
         disable_prefix_caching: If True, add unique prefix to each prompt to prevent VLLM KV caching.
         unique_prompts: If True, use unique random seed per prompt for maximum uniqueness.
+        engine: The load engine to drive requests with, either "ray" or "asyncio".
+        request_rate: If set, send requests open-loop at this many requests per second.
+        arrival_distribution: The distribution of gaps between open-loop sends.
+        burstiness: The gamma shape used by the "gamma" arrival distribution.
+        connection_pool_size: The number of keep-alive connections each ray client holds.
+        rounds: If set, each level completes num_concurrent_requests * rounds requests
+            instead of max_num_completed_requests.
+        cooldown_s: The time to wait between the levels of a sweep so the server can
+            drain its queues.
+        workload_cache_dir: If set, reuse the prompt pool of an earlier run with the
+            same parameters from this directory instead of generating it again.
+        streaming_summary: If True, summarize each level from quantile sketches
+            updated as results arrive instead of from every result at the end.
+        request_slos: If set, report the goodput and SLO attainment of each level
+            against these per-request SLOs.
+        jsonl_responses: If True, write the individual responses of each level to a
+            JSON lines file as requests complete instead of to a JSON file at the end.
+        columnar_format: If set, also write the individual responses of each level
+            to a columnar file of this format, "parquet" or "arrow".
+        catalog_path: If set, register the summary of each level in the results
+            catalog there.
+        endpoints: If set, spread the requests across these (base URL, weight)
+            endpoints and summarize each endpoint too.
+        routing_policy: How requests are spread across endpoints.
+        trace_path: If set, each level replays this trace instead of sending
+            generated prompts, and request_rate must not be set.
+        trace_speedup: The factor to divide the gaps between trace arrivals by.
     """
-    if mean_input_tokens < 40:
+    if engine == "asyncio" and llm_api not in ASYNC_SUPPORTED_APIS:
+        raise ValueError(
+            f"the asyncio engine only supports the llm apis {ASYNC_SUPPORTED_APIS}"
+        )
+    if request_slos:
+        validate_request_slos(request_slos)
+    if columnar_format is not None:
+        validate_columnar_format(columnar_format)
+    if endpoints:
+        validate_endpoints(llm_api, routing_policy)
+    if trace_path is not None and request_rate is not None:
+        raise ValueError("request_rate can't be set when replaying a trace")
+
+    if mean_input_tokens < 40 and trace_path is None:
         print(
             "the minimum number of input tokens that will be sent is 41"
             " because of the prompting logic right now"
         )
 
-    summary, individual_responses = get_token_throughput_latencies(
-        model=model,
-        llm_api=llm_api,
-        test_timeout_s=test_timeout_s,
-        max_num_completed_requests=max_num_completed_requests,
-        mean_input_tokens=mean_input_tokens,
-        stddev_input_tokens=stddev_input_tokens,
-        mean_output_tokens=mean_output_tokens,
-        stddev_output_tokens=stddev_output_tokens,
-        num_concurrent_requests=num_concurrent_requests,
-        additional_sampling_params=json.loads(additional_sampling_params),
-        disable_prefix_caching=disable_prefix_caching,
-        unique_prompts=unique_prompts,
-    )
+    if isinstance(num_concurrent_requests, int):
+        concurrency_levels = [num_concurrent_requests]
+    else:
+        concurrency_levels = list(num_concurrent_requests)
+    is_sweep = len(concurrency_levels) > 1 or rounds is not None
+    level_num_requests = [
+        level * rounds if rounds else max_num_completed_requests
+        for level in concurrency_levels
+    ]
 
-    if results_dir:
-        filename = f"{model}_{mean_input_tokens}_{mean_output_tokens}"
-        filename = re.sub(r"[^\w\d-]+", "-", filename)
-        filename = re.sub(r"-{2,}", "-", filename)
-        summary_filename = f"{filename}_summary"
-        individual_responses_filename = f"{filename}_individual_responses"
-
-        # Update to metadata.
-        summary.update(user_metadata)
-
-        results = LLMPerfResults(name=summary_filename, metadata=summary)
-        results_dir = Path(results_dir)
-        if not results_dir.exists():
-            results_dir.mkdir(parents=True)
-        elif not results_dir.is_dir():
-            raise ValueError(f"{results_dir} is not a directory")
+    # Only use fixed seed if unique_prompts is False (default behavior)
+    if not unique_prompts:
+        random.seed(11111)
+    # Levels get disjoint slices of the pool when prompts must not repeat, otherwise
+    # they share a prefix of it, matching what separate runs with the fixed seed send.
+    unique_per_level = disable_prefix_caching or unique_prompts
+    if workload_cache_dir and unique_per_level:
+        # Unique prompts are drawn from an unseeded pool, and cache busting prefixes
+        # must not be reused across runs, so such pools are never cached.
+        print(
+            "Not using the workload cache, since prompts are unique per run with "
+            "--unique-prompts or --disable-prefix-caching."
+        )
+        workload_cache_dir = None
+    # A replay sends the prompts of the trace.
+    prompts, num_output_tokens_list = [], []
+    if trace_path is None:
+        prompts, num_output_tokens_list = generate_prompt_pool(
+            num_prompts=(
+                sum(level_num_requests) if unique_per_level else max(level_num_requests)
+            ),
+            mean_input_tokens=mean_input_tokens,
+            stddev_input_tokens=stddev_input_tokens,
+            mean_output_tokens=mean_output_tokens,
+            stddev_output_tokens=stddev_output_tokens,
+            disable_prefix_caching=disable_prefix_caching,
+            cache_dir=workload_cache_dir,
+        )
 
-        try:
-            with open(results_dir / f"{summary_filename}.json", "w") as f:
-                json.dump(results.to_dict(), f, indent=4, default=str)
-        except Exception as e:
-            print(results.to_dict())
-            raise e
+    client_pool = None
+    if engine == "ray":
+        client_pool = ClientPool(
+            construct_clients(
+                llm_api=llm_api,
+                num_clients=max(concurrency_levels),
+                connection_pool_size=connection_pool_size,
+                num_endpoints=len(endpoints or []),
+            )
+        )
+        client_pool.warm_up()
 
-        try:
-            with open(results_dir / f"{individual_responses_filename}.json", "w") as f:
-                json.dump(individual_responses, f, indent=4)
-        except Exception as e:
-            print(individual_responses)
-            raise e
+    prompt_offset = 0
+    for i, (level, num_requests) in enumerate(
+        zip(concurrency_levels, level_num_requests)
+    ):
+        if i and cooldown_s:
+            print(f"Cooling down for {cooldown_s}s before the next level.")
+            time.sleep(cooldown_s)
+        if is_sweep:
+            print(f"Running {num_requests} requests with {level} concurrent requests.")
+
+        prompt_pool = (
+            prompts[prompt_offset : prompt_offset + num_requests],
+            num_output_tokens_list[prompt_offset : prompt_offset + num_requests],
+        )
+        if unique_per_level:
+            prompt_offset += num_requests
+        level_results_dir = (
+            os.path.join(results_dir, str(level)) if is_sweep else results_dir
+        )
+        individual_responses_path = None
+        if results_dir and jsonl_responses:
+            individual_responses_path = individual_responses_jsonl_path(
+                level_results_dir, model, mean_input_tokens, mean_output_tokens
+            )
+
+        summary, individual_responses = get_token_throughput_latencies(
+            model=model,
+            llm_api=llm_api,
+            test_timeout_s=test_timeout_s,
+            max_num_completed_requests=num_requests,
+            mean_input_tokens=mean_input_tokens,
+            stddev_input_tokens=stddev_input_tokens,
+            mean_output_tokens=mean_output_tokens,
+            stddev_output_tokens=stddev_output_tokens,
+            num_concurrent_requests=level,
+            additional_sampling_params=json.loads(additional_sampling_params),
+            disable_prefix_caching=disable_prefix_caching,
+            unique_prompts=unique_prompts,
+            engine=engine,
+            request_rate=request_rate,
+            arrival_distribution=arrival_distribution,
+            burstiness=burstiness,
+            connection_pool_size=connection_pool_size,
+            client_pool=client_pool,
+            prompt_pool=prompt_pool,
+            streaming_summary=streaming_summary,
+            request_slos=request_slos,
+            individual_responses_path=individual_responses_path,
+            endpoints=endpoints,
+            routing_policy=routing_policy,
+            trace_path=trace_path,
+            trace_speedup=trace_speedup,
+        )
+
+        if results_dir:
+            save_results(
+                summary,
+                None if individual_responses_path else individual_responses,
+                results_dir=level_results_dir,
+                model=model,
+                mean_input_tokens=mean_input_tokens,
+                mean_output_tokens=mean_output_tokens,
+                user_metadata=user_metadata,
+                columnar_format=columnar_format,
+                catalog_path=catalog_path,
+            )
+
+
+def run_saturation_search(
+    llm_api: str,
+    model: str,
+    test_timeout_s: int,
+    max_num_completed_requests: int,
+    mean_input_tokens: int,
+    stddev_input_tokens: int,
+    mean_output_tokens: int,
+    stddev_output_tokens: int,
+    additional_sampling_params: str,
+    results_dir: str,
+    user_metadata: Dict[str, Any],
+    slos: List[str],
+    search: str = "concurrency",
+    min_load: float = 1,
+    max_load: float = 64,
+    search_mode: str = "bisect",
+    search_step: Optional[float] = None,
+    search_tolerance: float = 0.1,
+    max_concurrent_requests: int = 1,
+    disable_prefix_caching: bool = False,
+    unique_prompts: bool = False,
+    engine: str = "ray",
+    arrival_distribution: str = "poisson",
+    burstiness: float = 1.0,
+    connection_pool_size: int = 1,
+    rounds: Optional[int] = None,
+    cooldown_s: float = 0,
+    workload_cache_dir: Optional[str] = None,
+    streaming_summary: bool = False,
+    request_slos: Optional[Dict[str, float]] = None,
+    jsonl_responses: bool = False,
+    columnar_format: Optional[str] = None,
+    catalog_path: Optional[str] = None,
+    endpoints: Optional[List[Tuple[str, float]]] = None,
+    routing_policy: str = "round-robin",
+) -> Dict[str, Any]:
+    """Find the highest load at which the model meets every SLO.
+
+    Each probe is a run of get_token_throughput_latencies at one load, saved to
+    results_dir/<load> like the levels of a concurrency sweep. The search and every
+    probe are written to results_dir/saturation_search.json. Arguments not listed
+    below are the same as for run_token_benchmark; rounds only applies when
+    searching over concurrency.
+
+    Args:
+        slos: The SLOs to meet, e.g. "ttft:p99<2". See llmperf.saturation.parse_slo.
+        search: The load to search over, either "concurrency" or "request-rate".
+        min_load: The lowest load to probe.
+        max_load: The highest load to probe.
+        search_mode: "bisect" to bracket and bisect the load, or "step" to increase
+            it by search_step until an SLO is missed.
+        search_step: The load increment in "step" mode.
+        search_tolerance: Bisection stops once the bracket is narrower than this
+            fraction of the highest load that met the SLOs.
+        max_concurrent_requests: The cap on requests in flight when searching over
+            the request rate.
+
+    Returns:
+        The result of llmperf.saturation.search_saturation.
+    """
+    if search not in SEARCH_LOADS:
+        raise ValueError(f"search must be one of {SEARCH_LOADS}, got {search}")
+    if engine == "asyncio" and llm_api not in ASYNC_SUPPORTED_APIS:
+        raise ValueError(
+            f"the asyncio engine only supports the llm apis {ASYNC_SUPPORTED_APIS}"
+        )
+    parsed_slos = [parse_slo(slo) for slo in slos]
+    if request_slos:
+        validate_request_slos(request_slos)
+    if columnar_format is not None:
+        validate_columnar_format(columnar_format)
+    if endpoints:
+        validate_endpoints(llm_api, routing_policy)
+    by_concurrency = search == "concurrency"
+
+    def num_requests(load: float) -> int:
+        if by_concurrency and rounds:
+            return int(load) * rounds
+        return max_num_completed_requests
+
+    if not unique_prompts:
+        random.seed(11111)
+    # Prompts must not repeat across probes when prefix caching is disabled, so each
+    # probe gets a pool of its own. Otherwise every probe sends a prefix of one pool.
+    unique_per_probe = disable_prefix_caching or unique_prompts
+    shared_prompt_pool = None
+    if not unique_per_probe:
+        shared_prompt_pool = generate_prompt_pool(
+            num_prompts=num_requests(max_load),
+            mean_input_tokens=mean_input_tokens,
+            stddev_input_tokens=stddev_input_tokens,
+            mean_output_tokens=mean_output_tokens,
+            stddev_output_tokens=stddev_output_tokens,
+            disable_prefix_caching=disable_prefix_caching,
+            cache_dir=workload_cache_dir,
+        )
+
+    client_pool = None
+    if engine == "ray":
+        client_pool = ClientPool(
+            construct_clients(
+                llm_api=llm_api,
+                num_clients=(
+                    int(max_load) if by_concurrency else max_concurrent_requests
+                ),
+                connection_pool_size=connection_pool_size,
+                num_endpoints=len(endpoints or []),
+            )
+        )
+        client_pool.warm_up()
+
+    num_probes = 0
+
+    def probe(load: float) -> Dict[str, Any]:
+        nonlocal num_probes
+        if num_probes and cooldown_s:
+            print(f"Cooling down for {cooldown_s}s before the next probe.")
+            time.sleep(cooldown_s)
+        num_probes += 1
+
+        probe_num_requests = num_requests(load)
+        if unique_per_probe:
+            prompt_pool = generate_prompt_pool(
+                num_prompts=probe_num_requests,
+                mean_input_tokens=mean_input_tokens,
+                stddev_input_tokens=stddev_input_tokens,
+                mean_output_tokens=mean_output_tokens,
+                stddev_output_tokens=stddev_output_tokens,
+                disable_prefix_caching=disable_prefix_caching,
+            )
+        else:
+            prompts, num_output_tokens_list = shared_prompt_pool
+            prompt_pool = (
+                prompts[:probe_num_requests],
+                num_output_tokens_list[:probe_num_requests],
+            )
+        probe_results_dir = (
+            os.path.join(results_dir, str(load)) if results_dir else None
+        )
+        individual_responses_path = None
+        if results_dir and jsonl_responses:
+            individual_responses_path = individual_responses_jsonl_path(
+                probe_results_dir, model, mean_input_tokens, mean_output_tokens
+            )
+        summary, individual_responses = get_token_throughput_latencies(
+            model=model,
+            llm_api=llm_api,
+            test_timeout_s=test_timeout_s,
+            max_num_completed_requests=probe_num_requests,
+            mean_input_tokens=mean_input_tokens,
+            stddev_input_tokens=stddev_input_tokens,
+            mean_output_tokens=mean_output_tokens,
+            stddev_output_tokens=stddev_output_tokens,
+            num_concurrent_requests=(
+                int(load) if by_concurrency else max_concurrent_requests
+            ),
+            additional_sampling_params=json.loads(additional_sampling_params),
+            disable_prefix_caching=disable_prefix_caching,
+            unique_prompts=unique_prompts,
+            engine=engine,
+            request_rate=None if by_concurrency else load,
+            arrival_distribution=arrival_distribution,
+            burstiness=burstiness,
+            connection_pool_size=connection_pool_size,
+            client_pool=client_pool,
+            prompt_pool=prompt_pool,
+            streaming_summary=streaming_summary,
+            request_slos=request_slos,
+            individual_responses_path=individual_responses_path,
+            endpoints=endpoints,
+            routing_policy=routing_policy,
+        )
+        results = summary["results"]
+        if results_dir:
+            save_results(
+                summary,
+                None if individual_responses_path else individual_responses,
+                results_dir=probe_results_dir,
+                model=model,
+                mean_input_tokens=mean_input_tokens,
+                mean_output_tokens=mean_output_tokens,
+                user_metadata=user_metadata,
+                columnar_format=columnar_format,
+                catalog_path=catalog_path,
+            )
+        return results
+
+    ret = search_saturation(
+        probe,
+        parsed_slos,
+        min_load=min_load,
+        max_load=max_load,
+        mode=search_mode,
+        step=search_step,
+        tolerance=search_tolerance,
+        granularity=1 if by_concurrency else 0,
+    )
+    ret["search"] = search
+
+    print(f"\nSaturation search over {search} for {model}, SLOs {ret['slos']}")
+    for probe_result in ret["probes"]:
+        print(
+            f"    {search} = {probe_result['load']}: "
+            f"{'met' if probe_result['slos_met'] else 'missed'} "
+            f"{probe_result['slo_values']}, output throughput "
+            f"{probe_result[common_metrics.OUTPUT_THROUGHPUT]}"
+        )
+    if ret["max_load_meeting_slos"] is None:
+        print(f"No probed {search} met every SLO.")
+    else:
+        print(f"Highest {search} meeting every SLO: {ret['max_load_meeting_slos']}")
+
+    if results_dir:
+        Path(results_dir).mkdir(parents=True, exist_ok=True)
+        with open(Path(results_dir) / "saturation_search.json", "w") as f:
+            json.dump(ret, f, indent=4, default=str)
+    return ret
 
 
 args = argparse.ArgumentParser(
@@ -429,9 +1683,14 @@ args.add_argument(
 )
 args.add_argument(
     "--num-concurrent-requests",
-    type=int,
-    default=10,
-    help=("The number of concurrent requests to send (default: %(default)s)"),
+    type=str,
+    default="10",
+    help=(
+        "The number of concurrent requests to send. A comma separated list, e.g. "
+        "1,10,20, runs a sweep over the levels in this process. With a list or with "
+        "--rounds, each level's results are saved to <results-dir>/<level>. "
+        "(default: %(default)s)"
+    ),
 )
 args.add_argument(
     "--timeout",
@@ -533,25 +1792,282 @@ args.add_argument(
         "Prevents any form of prompt caching across requests."
     ),
 )
+args.add_argument(
+    "--engine",
+    type=str,
+    choices=["ray", "asyncio"],
+    default="ray",
+    help=(
+        "The load engine. ray uses one thread and one ray actor per concurrent "
+        "request. asyncio drives all concurrent requests from a single event loop, "
+        f"which scales to thousands of streams but only supports {ASYNC_SUPPORTED_APIS}. "
+        "(default: %(default)s)"
+    ),
+)
+args.add_argument(
+    "--request-rate",
+    type=float,
+    default=None,
+    help=(
+        "Send requests open-loop at this many requests per second, independent of "
+        "when earlier requests finish. --num-concurrent-requests then caps the number "
+        "of requests in flight. Use inf to send every request at once. "
+        "(default: %(default)s) Requests are sent closed-loop."
+    ),
+)
+args.add_argument(
+    "--arrival-distribution",
+    type=str,
+    choices=ARRIVAL_DISTRIBUTIONS,
+    default="poisson",
+    help=(
+        "The distribution of the gaps between sends when --request-rate is set. "
+        "(default: %(default)s)"
+    ),
+)
+args.add_argument(
+    "--burstiness",
+    type=float,
+    default=1.0,
+    help=(
+        "The shape of the gamma arrival distribution. 1.0 matches poisson, lower "
+        "values are burstier and higher values smoother. (default: %(default)s)"
+    ),
+)
+args.add_argument(
+    "--connection-pool-size",
+    type=int,
+    default=1,
+    help=(
+        "The number of keep-alive HTTP connections each openai ray client holds open "
+        "and reuses across requests. (default: %(default)s)"
+    ),
+)
+args.add_argument(
+    "--rounds",
+    type=int,
+    default=None,
+    help=(
+        "If set, each concurrency level completes num-concurrent-requests * rounds "
+        "requests instead of --max-num-completed-requests. (default: %(default)s)"
+    ),
+)
+args.add_argument(
+    "--cooldown",
+    type=float,
+    default=0,
+    help=(
+        "Seconds to wait between the levels of a concurrency sweep so the server can "
+        "drain. (default: %(default)s)"
+    ),
+)
+args.add_argument(
+    "--workload-cache-dir",
+    type=str,
+    default=None,
+    help=(
+        "Directory to cache generated prompt pools in. Runs with the same token "
+        "parameters, seed and tokenizer load the pool from it instead of generating "
+        "it again. It is not used with --unique-prompts or --disable-prefix-caching, "
+        "whose prompts must differ between runs. (default: %(default)s)"
+    ),
+)
+args.add_argument(
+    "--streaming-summary",
+    action="store_true",
+    help=(
+        "Summarize results with mergeable quantile sketches updated as each request "
+        "finishes instead of from all results at the end. Quantiles are within 1%% "
+        "relative error of the exact ones; counts, means and extremes are exact. "
+        "(default: %(default)s)"
+    ),
+)
+args.add_argument(
+    "--slo",
+    type=str,
+    action="append",
+    default=None,
+    help=(
+        "An SLO as <metric>[:<statistic>]<threshold in seconds, e.g. ttft:p99<2 or "
+        "itl:p95<0.05. Metrics are summary keys or the shorthands ttft, itl and e2e. "
+        "Repeat for several SLOs. If given, search for the highest load that meets "
+        "every SLO instead of running the levels of --num-concurrent-requests. "
+        "(default: %(default)s)"
+    ),
+)
+args.add_argument(
+    "--search",
+    type=str,
+    default="concurrency",
+    choices=SEARCH_LOADS,
+    help=(
+        "The load to search over with --slo. Request rate searches cap requests in "
+        "flight at the highest level of --num-concurrent-requests. "
+        "(default: %(default)s)"
+    ),
+)
+args.add_argument(
+    "--search-min",
+    type=float,
+    default=1,
+    help="The lowest load to probe. (default: %(default)s)",
+)
+args.add_argument(
+    "--search-max",
+    type=float,
+    default=64,
+    help="The highest load to probe. (default: %(default)s)",
+)
+args.add_argument(
+    "--search-mode",
+    type=str,
+    default="bisect",
+    choices=SEARCH_MODES,
+    help=(
+        "bisect doubles the load until an SLO is missed and then bisects; step adds "
+        "--search-step until an SLO is missed. (default: %(default)s)"
+    ),
+)
+args.add_argument(
+    "--search-step",
+    type=float,
+    default=None,
+    help="The load increment of the step search mode. (default: %(default)s)",
+)
+args.add_argument(
+    "--search-tolerance",
+    type=float,
+    default=0.1,
+    help=(
+        "Stop bisecting once the bracket is narrower than this fraction of the "
+        "highest load that met the SLOs. (default: %(default)s)"
+    ),
+)
+args.add_argument(
+    "--ttft-slo",
+    type=float,
+    default=None,
+    help=(
+        "Per-request TTFT SLO in seconds. If any per-request SLO is set, the summary "
+        "reports the goodput, the output throughput of the requests that met every "
+        "SLO, and the share of requests that did. (default: %(default)s)"
+    ),
+)
+args.add_argument(
+    "--itl-slo",
+    type=float,
+    default=None,
+    help="Per-request mean inter-token latency SLO in seconds. (default: %(default)s)",
+)
+args.add_argument(
+    "--e2e-slo",
+    type=float,
+    default=None,
+    help="Per-request end to end latency SLO in seconds. (default: %(default)s)",
+)
+args.add_argument(
+    "--jsonl-responses",
+    action="store_true",
+    help=(
+        "Write individual responses to <name>_individual_responses.jsonl as each "
+        "request completes, flushed every second, instead of to a JSON file once the "
+        "run ends. An interrupted run keeps the responses written so far; summarize "
+        "them with generate_charts.py. With --streaming-summary, responses are not "
+        "also kept in memory. (default: %(default)s)"
+    ),
+)
+args.add_argument(
+    "--columnar-responses",
+    type=str,
+    default=None,
+    choices=COLUMNAR_FORMATS,
+    help=(
+        "Also write individual responses to a typed columnar file, with token "
+        "arrival times as list columns, for analysis with llmperf.columnar. parquet "
+        "is compressed, arrow can be memory mapped without copying. Requires pyarrow. "
+        "(default: %(default)s)"
+    ),
+)
+args.add_argument(
+    "--catalog",
+    type=str,
+    default=None,
+    help=(
+        "The SQLite results catalog to register each summary in, for querying runs "
+        "with llmperf.catalog. Set to an empty string to not register summaries. "
+        "(default: catalog.sqlite in the closest result_outputs directory containing "
+        "--results-dir, or else in --results-dir)"
+    ),
+)
+args.add_argument(
+    "--endpoints",
+    type=parse_endpoints,
+    default=None,
+    help=(
+        "Comma separated base URLs of replicas to spread the requests across instead "
+        "of sending them all to OPENAI_API_BASE, each optionally weighted, e.g. "
+        "http://a:8000/v1=2,http://b:8000/v1. The metrics of each request are tagged "
+        "with its endpoint and the summary reports every endpoint too. Only the openai "
+        "api supports it. (default: %(default)s)"
+    ),
+)
+args.add_argument(
+    "--routing-policy",
+    type=str,
+    choices=ROUTING_POLICIES,
+    default="round-robin",
+    help=(
+        "How requests are spread across --endpoints. round-robin interleaves them by "
+        "weight, least-outstanding picks the endpoint with the fewest requests in "
+        "flight per unit of weight and random draws one by weight. "
+        "(default: %(default)s)"
+    ),
+)
+args.add_argument(
+    "--trace",
+    type=str,
+    default=None,
+    help=(
+        "Replay the requests of this JSON lines trace open-loop at their recorded "
+        "arrival offsets instead of sending generated prompts. Each line has an "
+        "offset_s, a prompt or input_tokens, and optionally output_tokens and "
+        "sampling_params. At most --max-num-completed-requests requests are replayed "
+        "and --num-concurrent-requests caps the requests in flight. The summary "
+        "reports the schedule slip as schedule_lag_s. (default: %(default)s)"
+    ),
+)
+args.add_argument(
+    "--trace-speedup",
+    type=float,
+    default=1.0,
+    help=(
+        "Replay the trace this many times faster than it was recorded. "
+        "(default: %(default)s)"
+    ),
+)
 
 if __name__ == "__main__":
-    # Suppress Ray metrics agent error logs
-    logging.getLogger("ray").setLevel(logging.WARNING)
-
-    env_vars = dict(os.environ)
-    ray.init(
-        runtime_env={"env_vars": env_vars},
-        logging_level=logging.WARNING,
-        log_to_driver=False,
-    )
     args = args.parse_args()
 
+    if args.engine == "ray":
+        # Suppress Ray metrics agent error logs
+        logging.getLogger("ray").setLevel(logging.WARNING)
+
+        env_vars = dict(os.environ)
+        ray.init(
+            runtime_env={"env_vars": env_vars},
+            logging_level=logging.WARNING,
+            log_to_driver=False,
+        )
+
     # Parse user metadata.
     user_metadata = {}
     if args.metadata:
         for item in args.metadata.split(","):
             key, value = item.split("=")
             user_metadata[key] = value
+    if args.use_case:
+        user_metadata.setdefault("use_case", args.use_case)
 
     # Resolve token parameters based on priority:
     # 1. --use-case preset (highest priority)
@@ -583,19 +2099,92 @@ if __name__ == "__main__":
         mean_output = args.mean_output_tokens
         stddev_output = args.stddev_output_tokens
 
-    run_token_benchmark(
-        llm_api=args.llm_api,
-        model=args.model,
-        test_timeout_s=args.timeout,
-        max_num_completed_requests=args.max_num_completed_requests,
-        mean_input_tokens=mean_input,
-        stddev_input_tokens=stddev_input,
-        mean_output_tokens=mean_output,
-        stddev_output_tokens=stddev_output,
-        num_concurrent_requests=args.num_concurrent_requests,
-        additional_sampling_params=args.additional_sampling_params,
-        results_dir=args.results_dir,
-        user_metadata=user_metadata,
-        disable_prefix_caching=args.disable_prefix_caching,
-        unique_prompts=args.unique_prompts,
-    )
+    concurrency_levels = [
+        int(level) for level in args.num_concurrent_requests.split(",")
+    ]
+    request_slos = {
+        key: threshold
+        for key, threshold in [
+            (common_metrics.TTFT, args.ttft_slo),
+            (common_metrics.INTER_TOKEN_LAT, args.itl_slo),
+            (common_metrics.E2E_LAT, args.e2e_slo),
+        ]
+        if threshold is not None
+    }
+    if args.trace and args.slo:
+        raise ValueError("--trace can't be combined with a saturation search")
+    catalog_path = args.catalog
+    if catalog_path is None and args.results_dir:
+        catalog_path = default_catalog_path(args.results_dir)
+    if args.slo:
+        run_saturation_search(
+            llm_api=args.llm_api,
+            model=args.model,
+            test_timeout_s=args.timeout,
+            max_num_completed_requests=args.max_num_completed_requests,
+            mean_input_tokens=mean_input,
+            stddev_input_tokens=stddev_input,
+            mean_output_tokens=mean_output,
+            stddev_output_tokens=stddev_output,
+            additional_sampling_params=args.additional_sampling_params,
+            results_dir=args.results_dir,
+            user_metadata=user_metadata,
+            slos=args.slo,
+            search=args.search,
+            min_load=args.search_min,
+            max_load=args.search_max,
+            search_mode=args.search_mode,
+            search_step=args.search_step,
+            search_tolerance=args.search_tolerance,
+            max_concurrent_requests=max(concurrency_levels),
+            disable_prefix_caching=args.disable_prefix_caching,
+            unique_prompts=args.unique_prompts,
+            engine=args.engine,
+            arrival_distribution=args.arrival_distribution,
+            burstiness=args.burstiness,
+            connection_pool_size=args.connection_pool_size,
+            rounds=args.rounds,
+            cooldown_s=args.cooldown,
+            workload_cache_dir=args.workload_cache_dir,
+            streaming_summary=args.streaming_summary,
+            request_slos=request_slos,
+            jsonl_responses=args.jsonl_responses,
+            columnar_format=args.columnar_responses,
+            catalog_path=catalog_path,
+            endpoints=args.endpoints,
+            routing_policy=args.routing_policy,
+        )
+    else:
+        run_token_benchmark(
+            llm_api=args.llm_api,
+            model=args.model,
+            test_timeout_s=args.timeout,
+            max_num_completed_requests=args.max_num_completed_requests,
+            mean_input_tokens=mean_input,
+            stddev_input_tokens=stddev_input,
+            mean_output_tokens=mean_output,
+            stddev_output_tokens=stddev_output,
+            num_concurrent_requests=concurrency_levels,
+            additional_sampling_params=args.additional_sampling_params,
+            results_dir=args.results_dir,
+            user_metadata=user_metadata,
+            disable_prefix_caching=args.disable_prefix_caching,
+            unique_prompts=args.unique_prompts,
+            engine=args.engine,
+            request_rate=args.request_rate,
+            arrival_distribution=args.arrival_distribution,
+            burstiness=args.burstiness,
+            connection_pool_size=args.connection_pool_size,
+            rounds=args.rounds,
+            cooldown_s=args.cooldown,
+            workload_cache_dir=args.workload_cache_dir,
+            streaming_summary=args.streaming_summary,
+            request_slos=request_slos,
+            jsonl_responses=args.jsonl_responses,
+            columnar_format=args.columnar_responses,
+            catalog_path=catalog_path,
+            endpoints=args.endpoints,
+            routing_policy=args.routing_policy,
+            trace_path=args.trace,
+            trace_speedup=args.trace_speedup,
+        )